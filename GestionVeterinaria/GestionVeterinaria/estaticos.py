@@ -0,0 +1,140 @@
+"""
+Pipeline de archivos estáticos para producción.
+
+- ComprimidoManifestStaticFilesStorage: en collectstatic, además de los nombres
+  con hash del manifest (app.3f2a9c1b7d4e.css), deja variantes .gz (y .br si
+  está instalado el paquete `brotli`) de los archivos de texto.
+- ArchivosEstaticos: capa WSGI delante de Django que sirve STATIC_ROOT sin pasar
+  por vistas. Elige la variante comprimida según Accept-Encoding y manda
+  cache de un año (immutable) para los nombres con hash.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan .gz
+    brotli = None
+
+EXTENSIONES_COMPRIMIBLES = (".css", ".js", ".svg", ".txt", ".html", ".json", ".map", ".ico")
+TAMANIO_MINIMO = 256
+_HASHEADO = re.compile(r"\.[0-9a-f]{12}\.\w+$")
+
+
+class ComprimidoManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        procesados = set()
+        for nombre, nombre_hasheado, procesado in super().post_process(paths, dry_run, **options):
+            if nombre_hasheado and not isinstance(procesado, Exception):
+                procesados.update([nombre, nombre_hasheado])
+            yield nombre, nombre_hasheado, procesado
+
+        if dry_run:
+            return
+        for nombre in sorted(procesados):
+            if nombre.endswith(EXTENSIONES_COMPRIMIBLES):
+                self._comprimir(nombre)
+
+    def _comprimir(self, nombre):
+        ruta = self.path(nombre)
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        if len(datos) < TAMANIO_MINIMO:
+            return
+
+        variantes = [(".gz", gzip.compress(datos, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variantes.append((".br", brotli.compress(datos, quality=11)))
+        for sufijo, comprimido in variantes:
+            # Solo vale la pena si ahorra algo
+            if len(comprimido) < len(datos) * 0.95:
+                with open(ruta + sufijo, "wb") as f:
+                    f.write(comprimido)
+
+
+class ArchivosEstaticos:
+    """Middleware WSGI: sirve STATIC_URL desde STATIC_ROOT o delega en la aplicación."""
+
+    def __init__(self, application, raiz=None, prefijo=None):
+        self.application = application
+        self.raiz = os.path.realpath(str(raiz or settings.STATIC_ROOT))
+        self.prefijo = prefijo or settings.STATIC_URL
+        if not self.prefijo.startswith("/"):
+            self.prefijo = "/" + self.prefijo
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if environ.get("REQUEST_METHOD") in ("GET", "HEAD") and path.startswith(self.prefijo):
+            respuesta = self._servir(path[len(self.prefijo):], environ, start_response)
+            if respuesta is not None:
+                return respuesta
+        return self.application(environ, start_response)
+
+    def _resolver(self, relativo):
+        ruta = os.path.realpath(os.path.join(self.raiz, relativo))
+        if not ruta.startswith(self.raiz + os.sep) or not os.path.isfile(ruta):
+            return None
+        return ruta
+
+    def _servir(self, relativo, environ, start_response):
+        ruta = self._resolver(relativo)
+        if ruta is None:
+            return None
+
+        aceptadas = environ.get("HTTP_ACCEPT_ENCODING", "")
+        encoding = None
+        for sufijo, nombre in ((".br", "br"), (".gz", "gzip")):
+            if nombre in aceptadas and os.path.isfile(ruta + sufijo):
+                ruta_envio, encoding = ruta + sufijo, nombre
+                break
+        else:
+            ruta_envio = ruta
+
+        stat = os.stat(ruta_envio)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        if _HASHEADO.search(relativo):
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = "public, max-age=60"
+        headers = [
+            ("Cache-Control", cache_control),
+            ("ETag", etag),
+            ("Last-Modified", formatdate(stat.st_mtime, usegmt=True)),
+            ("Vary", "Accept-Encoding"),
+        ]
+
+        if environ.get("HTTP_IF_NONE_MATCH") == etag:
+            start_response("304 Not Modified", headers)
+            return []
+
+        content_type, _ = mimetypes.guess_type(ruta)
+        if content_type and (content_type.startswith("text/") or content_type in ("application/javascript", "image/svg+xml")):
+            content_type += "; charset=utf-8"
+        headers += [
+            ("Content-Type", content_type or "application/octet-stream"),
+            ("Content-Length", str(stat.st_size)),
+        ]
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+        start_response("200 OK", headers)
+
+        if environ["REQUEST_METHOD"] == "HEAD":
+            return []
+        archivo = open(ruta_envio, "rb")
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper:
+            return file_wrapper(archivo, 64 * 1024)
+        return _leer(archivo)
+
+
+def _leer(archivo, bloque=64 * 1024):
+    with archivo:
+        while datos := archivo.read(bloque):
+            yield datos
@@ -0,0 +1,22 @@
+"""
+Settings por perfil. DJANGO_ENTORNO elige cuál se carga:
+
+- dev  (por defecto): DEBUG, auditoría de cargas perezosas, caché en memoria.
+- prod: sin DEBUG, SECRET_KEY y ALLOWED_HOSTS desde el entorno, middleware y
+  context processors recortados, loader de plantillas cacheado, logging y
+  caché compartida (Redis o archivos).
+
+DJANGO_SETTINGS_MODULE sigue siendo 'GestionVeterinaria.settings'.
+"""
+import os
+
+_ENTORNO = os.environ.get('DJANGO_ENTORNO', 'dev').strip().lower()
+
+if _ENTORNO == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif _ENTORNO == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(f"DJANGO_ENTORNO desconocido: {_ENTORNO!r} (usar 'dev' o 'prod').")
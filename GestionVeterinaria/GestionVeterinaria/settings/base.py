@@ -0,0 +1,255 @@
+"""
+Django settings for GestionVeterinaria project.
+
+Generated by 'django-admin startproject' using Django 4.2.
+
+Configuración común a todos los perfiles. No se usa directamente: el paquete
+GestionVeterinaria.settings carga dev.py o prod.py según DJANGO_ENTORNO.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/4.2/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def env_bool(nombre, defecto=False):
+    valor = os.environ.get(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ('1', 'true', 'si', 'sí', 'yes', 'on')
+
+
+def env_lista(nombre, defecto=()):
+    valor = os.environ.get(nombre)
+    if not valor:
+        return list(defecto)
+    return [x.strip() for x in valor.split(',') if x.strip()]
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+# (prod.py exige DJANGO_SECRET_KEY; esta clave solo sirve para desarrollo)
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'django-insecure-vc=7+-r718ad9uau%%!60dg&ltq$6u=2&)e8=926myty3y5t6-',
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = env_lista('DJANGO_ALLOWED_HOSTS')
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'GestionVeterinaria_app',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',  # usuario vía CachedModelBackend
+    'GestionVeterinaria_app.auditoria.AuditoriaMiddleware',  # un solo INSERT de auditoría por request
+    'GestionVeterinaria_app.cambios.CambiosMiddleware',  # ídem para el registro de cambios (feed de sincronización)
+    'GestionVeterinaria_app.replica.ReplicaMiddleware',  # quien acaba de escribir no lee de la réplica
+    'GestionVeterinaria_app.sucursales.SucursalMiddleware',  # alcance por sucursal de Cita/Veterinario.objects
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'GestionVeterinaria.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [
+            BASE_DIR / 'templates',
+        ],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+
+                # Roles del usuario (cacheados) para el menú lateral
+                'GestionVeterinaria_app.context_processors.roles',
+
+                # ⬇️ Agregado: campanita global (citas hoy/mañana)
+                'GestionVeterinaria_app.context_processors.alertas_hoy_maniana',
+
+                # Selector de sucursal del menú (administrativos)
+                'GestionVeterinaria_app.context_processors.sucursal',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'GestionVeterinaria.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_PATH', BASE_DIR / 'db.sqlite3'),
+    }
+}
+
+# Réplica de lectura para estadísticas y búsquedas (replica.py). En SQLite es
+# una copia que refresca `manage.py actualizar_replica`; sin DJANGO_DB_REPLICA
+# todo lee de 'default'.
+if os.environ.get('DJANGO_DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DJANGO_DB_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['GestionVeterinaria_app.replica.ReplicaRouter']
+
+# Segundos de atraso tolerados: con una copia más vieja se lee de 'default'
+REPLICA_RETRASO_MAX = int(os.environ.get('DJANGO_REPLICA_RETRASO_MAX', 120))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gestion-veterinaria',
+    }
+}
+
+
+# Sesiones y autenticación: sesión desde la caché (respaldada en la base) y
+# usuario + roles cacheados por el backend. Un request autenticado no toca la base.
+# Las sesiones vencidas se limpian por lotes con `manage.py limpiar_sesiones`.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = [
+    'GestionVeterinaria_app.sesiones.CachedModelBackend',
+]
+
+# Ver GestionVeterinaria_app/hashers.py para la política de iteraciones
+PBKDF2_ITERACIONES = 600_000
+
+PASSWORD_HASHERS = [
+    'GestionVeterinaria_app.hashers.PBKDF2KioscoPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
+# Password validation
+# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+# Destino de collectstatic; en producción lo sirve GestionVeterinaria.estaticos.ArchivosEstaticos
+# (capa WSGI, ver wsgi.py) con nombres con hash, variantes .gz/.br y cache de un año.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # Archivos tal cual (no hace falta correr collectstatic); prod.py la reemplaza por la versión con hash y precomprimida
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# URL pública del sitio, para enlaces en correos enviados fuera de un request
+SITIO_URL = os.environ.get('DJANGO_SITIO_URL', 'http://localhost:8000')
+
+# Correo (enlaces del portal de propietarios)
+DEFAULT_FROM_EMAIL = os.environ.get('DJANGO_DEFAULT_FROM_EMAIL', 'Veterinaria SHIBA <no-responder@localhost>')
+EMAIL_HOST = os.environ.get('DJANGO_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('DJANGO_EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('DJANGO_EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('DJANGO_EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = env_bool('DJANGO_EMAIL_USE_TLS')
+
+# Auditoría de cambios (auditoria.py): por defecto en la tabla RegistroAuditoria;
+# con DJANGO_AUDITORIA_ARCHIVO se agrega a ese archivo JSON-lines en su lugar.
+AUDITORIA_ARCHIVO = os.environ.get('DJANGO_AUDITORIA_ARCHIVO') or None
+
+# Adjuntos del historial médico (adjuntos.py): un archivo en disco por contenido
+ADJUNTOS_RAIZ = Path(os.environ.get('DJANGO_ADJUNTOS_RAIZ', BASE_DIR / 'adjuntos'))
+ADJUNTOS_MAX_BYTES = int(os.environ.get('DJANGO_ADJUNTOS_MAX_MB', 100)) * 1024 * 1024
+# Procesos que arman miniaturas y vistas previas de PDF fuera del request
+ADJUNTOS_PROCESOS = int(os.environ.get('DJANGO_ADJUNTOS_PROCESOS', 2))
+# Descargas: None (Django, FileResponse), "x-sendfile" (Apache) o "x-accel" (nginx,
+# con una location internal en ADJUNTOS_ACCEL_PREFIJO que apunte a ADJUNTOS_RAIZ)
+ADJUNTOS_ENVIO = os.environ.get('DJANGO_ADJUNTOS_ENVIO') or None
+ADJUNTOS_ACCEL_PREFIJO = os.environ.get('DJANGO_ADJUNTOS_ACCEL_PREFIJO', '/_adjuntos/')
+
+# Expedientes clínicos exportados (expediente.py): se regeneran solo si cambió el historial
+EXPEDIENTES_RAIZ = Path(os.environ.get('DJANGO_EXPEDIENTES_RAIZ', BASE_DIR / 'expedientes'))
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Auditoría de cargas perezosas de FK (N+1) al renderizar: None, "log" o "raise"
+AUDITAR_CARGAS_PEREZOSAS = None
@@ -0,0 +1,17 @@
+"""Perfil de desarrollo: lo que antes era settings.py."""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import MIDDLEWARE, env_bool
+
+DEBUG = env_bool('DJANGO_DEBUG', True)
+
+# Auditoría de cargas perezosas de FK (N+1) al renderizar: None, "log" o "raise"
+AUDITAR_CARGAS_PEREZOSAS = os.environ.get('AUDITAR_CARGAS_PEREZOSAS', 'log') or None
+
+# Los correos (p.ej. enlaces del portal) se imprimen en la consola
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+MIDDLEWARE = MIDDLEWARE + [
+    'GestionVeterinaria_app.carga_perezosa.CargaPerezosaMiddleware',
+]
@@ -0,0 +1,121 @@
+"""
+Perfil de producción. Todo lo sensible sale del entorno:
+
+    DJANGO_ENTORNO=prod
+    DJANGO_SECRET_KEY=...                 (obligatoria)
+    DJANGO_ALLOWED_HOSTS=vet.example.com  (obligatoria, separadas por coma)
+    DJANGO_REDIS_URL=redis://...          (opcional; si no, caché en archivos)
+    DJANGO_CACHE_DIR=/var/tmp/...         (opcional, para la caché en archivos)
+    DJANGO_LOG_LEVEL=INFO
+    DJANGO_HTTPS=1                        (cookies seguras y HSTS detrás de TLS)
+    DJANGO_AUDITORIA_ARCHIVO=/var/log/... (opcional; auditoría en JSON-lines en vez de la base)
+    DJANGO_DB_REPLICA=/var/lib/...        (opcional; réplica de lectura, ver replica.py)
+    DJANGO_ADJUNTOS_RAIZ=/var/lib/...     (adjuntos del historial; por defecto BASE_DIR/adjuntos)
+    DJANGO_ADJUNTOS_ENVIO=x-accel         (opcional; el servidor web envía los adjuntos)
+    DJANGO_EXPEDIENTES_RAIZ=/var/lib/...  (expedientes exportados; por defecto BASE_DIR/expedientes)
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, env_bool, env_lista
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured("DJANGO_SECRET_KEY es obligatoria con DJANGO_ENTORNO=prod.")
+
+ALLOWED_HOSTS = env_lista('DJANGO_ALLOWED_HOSTS')
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured("DJANGO_ALLOWED_HOSTS es obligatoria con DJANGO_ENTORNO=prod.")
+
+
+# MIDDLEWARE: el de base tal cual (la auditoría de cargas perezosas la agrega solo dev.py)
+
+
+# Plantillas compiladas una vez por proceso y sin el context processor `debug`
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [
+            BASE_DIR / 'templates',
+        ],
+        'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'GestionVeterinaria_app.context_processors.roles',
+                # No consulta nada en páginas públicas ni para anónimos
+                'GestionVeterinaria_app.context_processors.alertas_hoy_maniana',
+                'GestionVeterinaria_app.context_processors.sucursal',
+            ],
+        },
+    },
+]
+
+
+# Caché compartida entre workers: las invalidaciones (agendas, usuarios,
+# fragmentos) tienen que verse en todos los procesos, así que nada de locmem.
+if os.environ.get('DJANGO_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_REDIS_URL'],
+            'KEY_PREFIX': 'gv',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+            'OPTIONS': {'MAX_ENTRIES': 20_000},
+        }
+    }
+
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'GestionVeterinaria.estaticos.ComprimidoManifestStaticFilesStorage',
+    },
+}
+
+
+if env_bool('DJANGO_HTTPS'):
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+    SESSION_COOKIE_SECURE = True
+    CSRF_COOKIE_SECURE = True
+    SECURE_HSTS_SECONDS = 60 * 60 * 24 * 30
+
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{asctime} {levelname} {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        # 4xx ya quedan en el log del servidor web
+        'django.request': {'level': 'ERROR'},
+        'django.db.backends': {'level': 'WARNING'},
+    },
+}
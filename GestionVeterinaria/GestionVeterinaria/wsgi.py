@@ -1,16 +1,21 @@
-"""
-WSGI config for GestionVeterinaria project.
-
-It exposes the WSGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
-"""
-
-import os
-
-from django.core.wsgi import get_wsgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'GestionVeterinaria.settings')
-
-application = get_wsgi_application()
+"""
+WSGI config for GestionVeterinaria project.
+
+It exposes the WSGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'GestionVeterinaria.settings')
+
+application = get_wsgi_application()
+
+# Los estáticos (salida de collectstatic) se sirven antes de llegar a Django
+from GestionVeterinaria.estaticos import ArchivosEstaticos  # noqa: E402
+
+application = ArchivosEstaticos(application)
@@ -0,0 +1,450 @@
+"""
+Adjuntos del historial médico (radiografías, análisis en PDF, fotos).
+
+- Almacenamiento por contenido: cada archivo se guarda una sola vez en
+  ADJUNTOS_RAIZ/objetos/ab/cd/<sha256>. Subir lo mismo otra vez (o a otra
+  atención) solo agrega un Adjunto que apunta al mismo ArchivoAdjunto.
+- Subida por partes y reanudable: iniciar() crea la SubidaAdjunto y el
+  cliente (js/adjuntos.js) manda partes con Content-Range. Cada parte se
+  copia del request al archivo parcial de a BLOQUE bytes, sin transacción
+  abierta y con el parcial bloqueado (flock). Lo recibido es el
+  tamaño del parcial: después de un corte el cliente pregunta cuánto llegó y
+  sigue desde ahí. Con la última parte, completar() calcula el SHA-256
+  leyendo el parcial por bloques y lo mueve a su lugar (os.replace).
+- Descarga (servir): con ADJUNTOS_ENVIO la manda el servidor web
+  (X-Sendfile / X-Accel-Redirect, que también resuelve los Range); si no,
+  FileResponse (sendfile del servidor WSGI si lo tiene) o, para un Range,
+  el tramo leído por bloques. Nunca se carga el archivo entero en memoria.
+  El contenido no cambia nunca: el ETag es el hash.
+- Miniaturas y vistas previas de PDF: cada ArchivoAdjunto nuevo se encola
+  en un ProcessPoolExecutor (miniaturas.py, procesos "spawn" que no heredan
+  hilos ni conexiones del servidor) y al terminar se guarda el estado. El
+  comando limpiar_adjuntos reencola las que quedaron pendientes por un
+  reinicio, borra subidas abandonadas, adjuntos de atenciones borradas y
+  archivos que ya no usa ningún adjunto.
+"""
+import hashlib
+import logging
+import mimetypes
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+from . import miniaturas
+from .models import Adjunto, ArchivoAdjunto, HistorialMedico, HistorialMedicoArchivado, SubidaAdjunto
+
+try:
+    import fcntl
+except ImportError:  # Windows: los bloqueos quedan entre hilos de un mismo proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BLOQUE = 64 * 1024
+# El cliente manda partes de TAMANIO_PARTE; el servidor acepta hasta MAX_PARTE
+TAMANIO_PARTE = 2 * 1024 * 1024
+MAX_PARTE = 8 * 1024 * 1024
+# Subidas sin movimiento en este tiempo se consideran abandonadas
+VIGENCIA_SUBIDA = timedelta(hours=48)
+LOTE = 500
+# Firmas (desplazamiento, bytes) de los formatos que interesan; el resto, por extensión
+FIRMAS = [
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF8", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    (128, b"DICM", "application/dicom"),
+]
+# Se abren en el navegador; el resto se descarga
+EN_LINEA = {"application/pdf", "image/png", "image/jpeg", "image/gif", "image/webp"}
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_pool = None
+_pool_lock = threading.Lock()
+_bloqueos_hilos = [threading.Lock() for _ in range(64)]
+
+
+class SubidaInvalida(Exception):
+    """Parte mal formada, tamaño que no coincide o archivo demasiado grande."""
+
+
+class FueraDeOrden(SubidaInvalida):
+    """La parte no empieza donde termina lo recibido (el cliente tiene que seguir desde `recibido`)."""
+
+    def __init__(self, recibido):
+        super().__init__(f"Se esperaba la parte que empieza en {recibido}.")
+        self.recibido = recibido
+
+
+# ------------------------------
+# Rutas
+# ------------------------------
+def _raiz():
+    return Path(settings.ADJUNTOS_RAIZ)
+
+
+def relativa(archivo):
+    sha = archivo.sha256
+    return f"objetos/{sha[:2]}/{sha[2:4]}/{sha}"
+
+
+def ruta(archivo):
+    return _raiz() / relativa(archivo)
+
+
+def ruta_miniatura(archivo):
+    return _raiz() / "miniaturas" / archivo.sha256[:2] / f"{archivo.sha256}.jpg"
+
+
+def ruta_bloqueo(sha256):
+    """Archivo de bloqueo del contenido (uno cada 256 hashes: no se acumulan)."""
+    return _raiz() / "bloqueos" / f"{sha256[:2]}.lock"
+
+
+def ruta_parcial(subida):
+    return _raiz() / "parciales" / f"{subida.pk}.part"
+
+
+def detectar_tipo(cabecera, nombre):
+    for desde, firma, tipo in FIRMAS:
+        if cabecera[desde:desde + len(firma)] == firma:
+            return tipo
+    return mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+
+
+# ------------------------------
+# Bloqueos entre procesos
+# ------------------------------
+@contextmanager
+def _bloqueo(camino):
+    """
+    Abre `camino` para agregar y lo bloquea en exclusiva (flock) hasta salir.
+    Sin fcntl (Windows, desarrollo) el bloqueo es solo entre hilos del proceso.
+    """
+    camino.parent.mkdir(parents=True, exist_ok=True)
+    with open(camino, "ab") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            with _bloqueos_hilos[hash(str(camino)) % len(_bloqueos_hilos)]:
+                yield f
+
+
+# ------------------------------
+# Subida
+# ------------------------------
+def iniciar(historial, nombre, tamanio, usuario):
+    """Nueva subida por partes para la atención `historial` (viva)."""
+    if not 0 < tamanio <= settings.ADJUNTOS_MAX_BYTES:
+        raise SubidaInvalida(f"El archivo tiene que pesar menos de {settings.ADJUNTOS_MAX_BYTES // (1024 * 1024)} MB.")
+    nombre = os.path.basename((nombre or "").replace("\\", "/")).strip()[:255] or "adjunto"
+    subida = SubidaAdjunto.objects.create(
+        historial_id=historial.pk, paciente_id=historial.paciente_id, nombre=nombre, tamanio=tamanio, usuario=usuario,
+    )
+    parcial = ruta_parcial(subida)
+    parcial.parent.mkdir(parents=True, exist_ok=True)
+    parcial.touch()
+    return subida
+
+
+def recibido(subida):
+    try:
+        return os.path.getsize(ruta_parcial(subida))
+    except FileNotFoundError:
+        return 0
+
+
+def parte(content_range, subida):
+    """(inicio, largo) de la cabecera Content-Range "bytes <inicio>-<fin>/<total>"."""
+    m = _CONTENT_RANGE.match((content_range or "").strip())
+    if not m:
+        raise SubidaInvalida("Falta Content-Range o está mal formado.")
+    inicio, fin, total = map(int, m.groups())
+    if total != subida.tamanio or fin < inicio or fin >= total:
+        raise SubidaInvalida("El rango no coincide con el tamaño de la subida.")
+    if fin - inicio + 1 > MAX_PARTE:
+        raise SubidaInvalida("Parte demasiado grande.")
+    return inicio, fin - inicio + 1
+
+
+def recibir(subida, inicio, largo, flujo):
+    """
+    Agrega `largo` bytes de `flujo` al parcial. Devuelve el total recibido.
+
+    La copia (que dura lo que tarde el cliente) va fuera de toda transacción,
+    con el parcial bloqueado: una parte a la vez por subida. Después, un
+    UPDATE corto deja anotado el avance.
+    """
+    if not ruta_parcial(subida).exists():
+        raise SubidaInvalida("La subida ya no existe.")
+    with _bloqueo(ruta_parcial(subida)) as f:
+        actual = os.fstat(f.fileno()).st_size
+        if inicio != actual:
+            raise FueraDeOrden(actual)
+        faltan = largo
+        while faltan:
+            datos = flujo.read(min(BLOQUE, faltan))
+            if not datos:  # se cortó: queda lo que llegó y el cliente sigue desde ahí
+                break
+            f.write(datos)
+            faltan -= len(datos)
+        f.flush()
+    total = actual + largo - faltan
+    SubidaAdjunto.objects.filter(pk=subida.pk).update(recibido=total, actualizada_en=timezone.now())
+    return total
+
+
+def completar(subida):
+    """Subida completa: la guarda por su contenido y crea el Adjunto."""
+    parcial = ruta_parcial(subida)
+    if recibido(subida) != subida.tamanio:
+        raise SubidaInvalida("Todavía faltan partes.")
+    sha = hashlib.sha256()
+    with open(parcial, "rb") as f:
+        cabecera = f.read(BLOQUE)
+        sha.update(cabecera)
+        while datos := f.read(BLOQUE):
+            sha.update(datos)
+
+    # Con el contenido bloqueado: borrar_huerfanos no puede borrar la fila ni
+    # el archivo entre que se asocia el Adjunto y se deja el archivo en su lugar
+    with _bloqueo(ruta_bloqueo(sha.hexdigest())):
+        with transaction.atomic():
+            archivo, creado = ArchivoAdjunto.objects.get_or_create(
+                sha256=sha.hexdigest(),
+                defaults={"tamanio": subida.tamanio, "tipo": detectar_tipo(cabecera, subida.nombre)},
+            )
+            adjunto = Adjunto.objects.create(
+                historial_id=subida.historial_id, paciente_id=subida.paciente_id, archivo=archivo,
+                nombre=subida.nombre, subido_por_id=subida.usuario_id,
+            )
+            subida.delete()
+        # Ya confirmado: el archivo queda (o vuelve a quedar) en su lugar
+        destino = ruta(archivo)
+        if destino.exists():
+            parcial.unlink()  # el mismo contenido ya está guardado
+        else:
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(parcial, destino)
+    if creado:
+        transaction.on_commit(lambda: encolar_miniaturas([archivo]))
+    return adjunto
+
+
+def cancelar(subida):
+    ruta_parcial(subida).unlink(missing_ok=True)
+    subida.delete()
+
+
+# ------------------------------
+# Descarga
+# ------------------------------
+class _RangoNoSatisfacible(Exception):
+    pass
+
+
+def _rango(request, etag, tamanio):
+    """(inicio, fin) inclusive del Range pedido, o None para mandar el archivo completo."""
+    cabecera = request.headers.get("Range")
+    if not cabecera or request.headers.get("If-Range", etag) != etag:
+        return None
+    m = _RANGE.match(cabecera.strip())
+    if not m or m.groups() == ("", ""):
+        return None  # varios rangos o formato desconocido: el archivo completo
+    desde, hasta = m.groups()
+    if desde == "":  # sufijo: los últimos N bytes
+        if int(hasta) == 0:
+            raise _RangoNoSatisfacible
+        return max(tamanio - int(hasta), 0), tamanio - 1
+    inicio, fin = int(desde), min(int(hasta), tamanio - 1) if hasta else tamanio - 1
+    if inicio >= tamanio or inicio > fin:
+        raise _RangoNoSatisfacible
+    return inicio, fin
+
+
+def _tramo(camino, inicio, largo):
+    with open(camino, "rb") as f:
+        f.seek(inicio)
+        while largo > 0:
+            datos = f.read(min(BLOQUE, largo))
+            if not datos:
+                return
+            largo -= len(datos)
+            yield datos
+
+
+def servir(request, archivo, nombre):
+    """Respuesta de descarga del archivo, con soporte de Range y ETag."""
+    etag = f'"{archivo.sha256}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        respuesta = HttpResponseNotModified()
+        respuesta["ETag"] = etag
+        return respuesta
+
+    camino = ruta(archivo)
+    envio = settings.ADJUNTOS_ENVIO
+    if envio == "x-accel":
+        respuesta = HttpResponse(content_type=archivo.tipo)
+        respuesta["X-Accel-Redirect"] = settings.ADJUNTOS_ACCEL_PREFIJO.rstrip("/") + "/" + relativa(archivo)
+    elif envio == "x-sendfile":
+        respuesta = HttpResponse(content_type=archivo.tipo)
+        respuesta["X-Sendfile"] = str(camino)
+    else:
+        try:
+            rango = _rango(request, etag, archivo.tamanio)
+        except _RangoNoSatisfacible:
+            respuesta = HttpResponse(status=416)
+            respuesta["Content-Range"] = f"bytes */{archivo.tamanio}"
+            return respuesta
+        if not camino.exists():
+            raise Http404("El archivo no está en el almacenamiento.")
+        if rango is None:
+            respuesta = FileResponse(open(camino, "rb"), content_type=archivo.tipo)
+        else:
+            inicio, fin = rango
+            respuesta = StreamingHttpResponse(_tramo(camino, inicio, fin - inicio + 1), status=206, content_type=archivo.tipo)
+            respuesta["Content-Range"] = f"bytes {inicio}-{fin}/{archivo.tamanio}"
+            respuesta["Content-Length"] = str(fin - inicio + 1)
+
+    respuesta["Content-Disposition"] = content_disposition_header(archivo.tipo not in EN_LINEA, nombre)
+    respuesta["Accept-Ranges"] = "bytes"
+    respuesta["ETag"] = etag
+    respuesta["Cache-Control"] = "private, max-age=86400"
+    return respuesta
+
+
+def servir_miniatura(request, archivo):
+    if archivo.miniatura != "lista" or not ruta_miniatura(archivo).exists():
+        raise Http404("Sin miniatura.")
+    etag = f'"m-{archivo.sha256}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        respuesta = HttpResponseNotModified()
+    else:
+        respuesta = FileResponse(open(ruta_miniatura(archivo), "rb"), content_type="image/jpeg")
+    respuesta["ETag"] = etag
+    respuesta["Cache-Control"] = "private, max-age=86400"
+    return respuesta
+
+
+# ------------------------------
+# Miniaturas (procesos aparte)
+# ------------------------------
+def _ejecutor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(settings.ADJUNTOS_PROCESOS, 1), mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _guardar_miniatura(archivo_id, futuro, cerrar):
+    try:
+        estado = futuro.result()
+    except Exception:
+        logger.exception("Falló la miniatura del archivo adjunto %s", archivo_id)
+        estado = "error"
+    try:
+        ArchivoAdjunto.objects.filter(pk=archivo_id).update(miniatura=estado)
+    finally:
+        if cerrar:  # hilo del pool: su conexión no la cierra nadie más
+            connection.close()
+
+
+def encolar_miniaturas(archivos, esperar=False):
+    """
+    Manda a generar las miniaturas; el estado se guarda al terminar cada una.
+    Con esperar=True (comando limpiar_adjuntos) espera y lo guarda en este hilo.
+    """
+    futuros = [
+        (a.pk, _ejecutor().submit(miniaturas.generar, str(ruta(a)), str(ruta_miniatura(a)), a.tipo))
+        for a in archivos
+    ]
+    origen = threading.get_ident()
+    for pk, futuro in futuros:
+        if esperar:
+            _guardar_miniatura(pk, futuro, cerrar=False)
+        else:
+            # Si ya terminó, el callback corre acá mismo: no cerrar la conexión del request
+            futuro.add_done_callback(lambda f, pk=pk: _guardar_miniatura(pk, f, cerrar=threading.get_ident() != origen))
+
+
+# ------------------------------
+# Limpieza
+# ------------------------------
+def limpiar_subidas(vigencia=VIGENCIA_SUBIDA):
+    """Borra las subidas sin movimiento desde hace `vigencia`. Devuelve cuántas."""
+    vencidas = list(SubidaAdjunto.objects.filter(actualizada_en__lt=timezone.now() - vigencia))
+    for subida in vencidas:
+        ruta_parcial(subida).unlink(missing_ok=True)
+    SubidaAdjunto.objects.filter(pk__in=[s.pk for s in vencidas]).delete()
+    return len(vencidas)
+
+
+def _sin_atencion(qs):
+    """Filas cuya atención ya no está ni viva ni en el archivo (p. ej. se borró la cita)."""
+    return qs.filter(
+        ~Exists(HistorialMedico.objects.filter(pk=OuterRef("historial_id"))),
+        ~Exists(HistorialMedicoArchivado.objects.filter(pk=OuterRef("historial_id"))),
+    )
+
+
+def borrar_sueltos(lote=LOTE):
+    """
+    Adjuntos y subidas de atenciones que ya no existen: nadie puede abrirlos
+    (la FK no tiene constraint para sobrevivir al archivado). Devuelve
+    cuántos adjuntos se borraron; sus archivos los libera borrar_huerfanos().
+    """
+    for subida in _sin_atencion(SubidaAdjunto.objects.all()):
+        cancelar(subida)
+    total = 0
+    while True:
+        pks = list(_sin_atencion(Adjunto.objects.all()).order_by("pk").values_list("pk", flat=True)[:lote])
+        if not pks:
+            return total
+        with transaction.atomic():
+            Adjunto.objects.filter(pk__in=pks).delete()
+        total += len(pks)
+
+
+def borrar_huerfanos(lote=LOTE):
+    """ArchivoAdjunto que ya no usa ningún Adjunto: fila, archivo y miniatura. Devuelve cuántos."""
+    total = 0
+    ultimo = 0
+    while True:
+        candidatos = list(
+            ArchivoAdjunto.objects.filter(pk__gt=ultimo, adjuntos__isnull=True).order_by("pk")[:lote]
+        )
+        if not candidatos:
+            return total
+        ultimo = candidatos[-1].pk
+        for archivo in candidatos:
+            # Mismo bloqueo que completar(): se vuelve a mirar si nadie lo usa
+            # y se borran fila y archivo sin que otra subida los tome en el medio
+            with _bloqueo(ruta_bloqueo(archivo.sha256)):
+                with transaction.atomic():
+                    borrado, _ = ArchivoAdjunto.objects.filter(pk=archivo.pk, adjuntos__isnull=True).delete()
+                if borrado:
+                    ruta(archivo).unlink(missing_ok=True)
+                    ruta_miniatura(archivo).unlink(missing_ok=True)
+                    total += 1
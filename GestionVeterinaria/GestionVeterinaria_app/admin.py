@@ -1,3 +1,293 @@
-from django.contrib import admin
-
-# Register your models here.
+from django.contrib import admin, messages
+
+from . import archivo
+from .models import (
+    Adjunto, AgregadoSalud, ArchivoAdjunto, AusenciaVeterinario, Cambio, CitaArchivada, HistorialMedicoArchivado,
+    Paciente, Propietario, HistorialMedico, Veterinario, Administrativo, Cita, CodigoClinico,
+    ListaEspera, RegistroAuditoria, ReglaVencimiento, Rol, SubidaAdjunto, Sucursal, Vencimiento,
+)
+
+# Todos los listados precargan las FK que muestran (list_select_related),
+# paginan corto y evitan el COUNT(*) completo (show_full_result_count=False)
+# para que el admin siga siendo rápido con tablas grandes.
+# Las FK se editan con raw_id_fields: un <select> con __str__ de cada fila
+# dispararía una consulta por opción en los modelos cuyo __str__ lee otra FK.
+# En las tablas sin FK real (archivo, adjuntos) las FK se muestran por id
+# (<campo>_id): un JOIN descartaría las filas que apuntan a algo ya borrado.
+
+
+class BaseListadoAdmin(admin.ModelAdmin):
+    list_per_page = 50
+    show_full_result_count = False
+
+
+class SoloLecturaAdmin(BaseListadoAdmin):
+    """Tablas que escribe el sistema (auditoría, feed, archivo, agregados): se consultan, no se editan."""
+
+    def get_queryset(self, request):
+        # El detalle también precarga lo que muestra, no solo el listado
+        qs = super().get_queryset(request)
+        return qs.select_related(*self.list_select_related) if self.list_select_related else qs
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+def _dar_de_baja(modelo, ids):
+    if modelo is Propietario:
+        archivo.dar_de_baja_propietarios(ids)
+    else:
+        archivo.dar_de_baja_pacientes(ids)
+
+
+@admin.action(description="Dar de baja (borrado por lotes en segundo plano)")
+def dar_de_baja(modeladmin, request, queryset):
+    ids = list(queryset.values_list("pk", flat=True))
+    _dar_de_baja(queryset.model, ids)
+    modeladmin.message_user(request, f"{len(ids)} registro(s) dados de baja; la purga sigue en segundo plano.", messages.SUCCESS)
+
+
+class BajaPorLotesAdmin(BaseListadoAdmin):
+    """
+    Propietarios y pacientes no se borran con la cascada sincrónica del admin:
+    el botón Eliminar y la acción de baja hacen la baja lógica y la purga por
+    lotes en segundo plano (archivo.dar_de_baja_*). La confirmación tampoco
+    recorre la cascada para listar lo que se va a borrar.
+    """
+    actions = [dar_de_baja]
+
+    def get_actions(self, request):
+        acciones = super().get_actions(request)
+        acciones.pop("delete_selected", None)
+        return acciones
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        resumen = [f"{obj} (baja inmediata; sus citas e historial se purgan en segundo plano)" for obj in objs]
+        return resumen, {self.model._meta.verbose_name_plural: len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        _dar_de_baja(self.model, [obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        _dar_de_baja(self.model, list(queryset.values_list("pk", flat=True)))
+
+
+@admin.register(Propietario)
+class PropietarioAdmin(BajaPorLotesAdmin):
+    list_display = ("apellido", "nombre", "email", "telefono")
+    search_fields = ("apellido", "nombre", "email", "telefono")
+    ordering = ("apellido", "nombre")
+
+    def get_queryset(self, request):
+        return Propietario.objects.all()
+
+
+@admin.register(Paciente)
+class PacienteAdmin(BajaPorLotesAdmin):
+    list_display = ("nombre", "apellido", "especie", "raza", "propietario")
+    list_select_related = ("propietario",)
+    list_filter = ("especie", "sexo")
+    search_fields = ("nombre", "apellido", "propietario__apellido")
+    raw_id_fields = ("propietario",)
+    ordering = ("apellido", "nombre")
+
+    def get_queryset(self, request):
+        return Paciente.objects.all()
+
+
+@admin.register(Sucursal)
+class SucursalAdmin(BaseListadoAdmin):
+    list_display = ("nombre", "jornada_inicio", "jornada_fin", "intervalo_min")
+    search_fields = ("nombre",)
+    ordering = ("nombre",)
+
+
+@admin.register(Rol)
+class RolAdmin(BaseListadoAdmin):
+    list_display = ("descripcion",)
+
+
+@admin.register(Veterinario)
+class VeterinarioAdmin(BaseListadoAdmin):
+    list_display = ("nombre", "apellido", "especialidad", "sucursal", "rol", "user")
+    list_select_related = ("rol", "user", "sucursal")
+    list_filter = ("sucursal",)
+    search_fields = ("nombre", "apellido", "especialidad")
+    raw_id_fields = ("user",)
+
+
+@admin.register(Administrativo)
+class AdministrativoAdmin(BaseListadoAdmin):
+    list_display = ("nombre", "apellido", "sucursal", "rol", "contacto")
+    list_select_related = ("rol", "sucursal")
+    list_filter = ("sucursal",)
+    search_fields = ("nombre", "apellido")
+
+
+@admin.register(Cita)
+class CitaAdmin(BaseListadoAdmin):
+    list_display = ("fecha_hora", "paciente", "veterinario", "administrativo", "sucursal", "estado")
+    list_select_related = ("paciente", "veterinario", "administrativo", "sucursal")
+    list_filter = ("estado", "sucursal")
+    search_fields = ("paciente__nombre", "veterinario__apellido")
+    raw_id_fields = ("paciente", "veterinario", "administrativo")
+    ordering = ("-fecha_hora",)
+
+
+@admin.register(HistorialMedico)
+class HistorialMedicoAdmin(BaseListadoAdmin):
+    list_display = ("fecha_consulta", "paciente", "diagnostico")
+    list_select_related = ("paciente",)
+    search_fields = ("paciente__nombre", "diagnostico")
+    raw_id_fields = ("paciente", "cita")
+    autocomplete_fields = ("diagnosticos", "tratamientos")
+    ordering = ("-fecha_consulta",)
+
+
+@admin.register(CodigoClinico)
+class CodigoClinicoAdmin(BaseListadoAdmin):
+    list_display = ("codigo", "nombre", "tipo", "activo")
+    list_filter = ("tipo", "activo")
+    search_fields = ("codigo", "nombre", "sinonimos")
+    ordering = ("tipo", "nombre")
+
+
+@admin.register(ListaEspera)
+class ListaEsperaAdmin(BaseListadoAdmin):
+    list_display = ("paciente", "desde", "hasta", "hora_desde", "hora_hasta", "auto_reservar", "estado", "creada_en")
+    list_select_related = ("paciente",)
+    list_filter = ("estado", "auto_reservar")
+    search_fields = ("paciente__nombre", "paciente__propietario__apellido")
+    raw_id_fields = ("paciente", "cita")
+    filter_horizontal = ("veterinarios",)
+    readonly_fields = ("ultimo_aviso",)
+    ordering = ("estado", "creada_en")
+
+
+@admin.register(AusenciaVeterinario)
+class AusenciaVeterinarioAdmin(BaseListadoAdmin):
+    """La reprogramación de las citas se hace desde la pantalla Ausencias."""
+    list_display = ("veterinario", "desde", "hasta", "motivo", "reprogramada_en")
+    list_select_related = ("veterinario",)
+    list_filter = ("veterinario",)
+    raw_id_fields = ("veterinario",)
+    readonly_fields = ("reprogramada_en",)
+    ordering = ("-desde",)
+
+
+@admin.register(Adjunto)
+class AdjuntoAdmin(BaseListadoAdmin):
+    """Solo consulta y borrado: los archivos sin adjuntos los borra limpiar_adjuntos."""
+    list_display = ("nombre", "paciente", "historial_id", "archivo", "subido_por", "subido_en")
+    list_select_related = ("paciente", "archivo", "subido_por")
+    search_fields = ("nombre", "archivo__sha256")
+    raw_id_fields = ("historial", "paciente", "archivo")
+    readonly_fields = ("historial", "paciente", "archivo", "nombre", "subido_por", "subido_en")
+    ordering = ("-subido_en",)
+
+
+@admin.register(ReglaVencimiento)
+class ReglaVencimientoAdmin(BaseListadoAdmin):
+    list_display = ("nombre", "tipo", "especie", "codigo", "edad_dias", "intervalo_dias", "aviso_dias", "activa")
+    list_select_related = ("codigo",)
+    list_filter = ("tipo", "activa")
+    search_fields = ("nombre", "especie")
+    autocomplete_fields = ("codigo",)
+    ordering = ("tipo", "nombre")
+
+
+@admin.register(Vencimiento)
+class VencimientoAdmin(BaseListadoAdmin):
+    """Solo lectura: la tabla la reescribe calcular_vencimientos."""
+    list_display = ("vence", "paciente", "regla", "ultima", "avisado_en")
+    list_select_related = ("paciente", "regla")
+    list_filter = ("regla",)
+    search_fields = ("paciente__nombre", "paciente__propietario__apellido")
+    ordering = ("vence",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RegistroAuditoria)
+class RegistroAuditoriaAdmin(SoloLecturaAdmin):
+    """Solo lectura: el registro de auditoría no se edita ni se borra."""
+    list_display = ("fecha", "modelo", "objeto_id", "accion", "usuario_nombre", "ruta")
+    list_filter = ("modelo", "accion")
+    search_fields = ("=objeto_id", "usuario_nombre")
+    ordering = ("-fecha",)
+
+
+@admin.register(Cambio)
+class CambioAdmin(SoloLecturaAdmin):
+    """Registro de cambios del feed de sincronización; lo compacta compactar_cambios."""
+    list_display = ("id", "modelo", "objeto_id", "accion", "fecha")
+    list_filter = ("modelo", "accion")
+    search_fields = ("=objeto_id",)
+    ordering = ("-id",)
+
+
+@admin.register(AgregadoSalud)
+class AgregadoSaludAdmin(SoloLecturaAdmin):
+    """Contadores de salud.py; se rehacen con recalcular_salud."""
+    list_display = ("dimension", "especie", "clave", "periodo", "total")
+    list_filter = ("dimension", "especie")
+    search_fields = ("clave",)
+    ordering = ("dimension", "especie", "clave", "periodo")
+
+
+@admin.register(CitaArchivada)
+class CitaArchivadaAdmin(SoloLecturaAdmin):
+    """Citas movidas por archivar_historico."""
+    list_display = ("id", "fecha_hora", "paciente", "veterinario_id", "estado", "sucursal", "archivada_en")
+    list_select_related = ("paciente", "sucursal")
+    list_filter = ("estado",)
+    search_fields = ("=id", "=paciente__id", "paciente__nombre")
+    fields = readonly_fields = (
+        "id", "fecha_hora", "paciente", "veterinario_id", "administrativo_id", "estado", "sucursal", "archivada_en",
+    )
+    ordering = ("-fecha_hora",)
+
+
+@admin.register(HistorialMedicoArchivado)
+class HistorialMedicoArchivadoAdmin(SoloLecturaAdmin):
+    """Atenciones movidas por archivar_historico."""
+    list_display = ("id", "fecha_consulta", "paciente", "diagnostico", "archivado_en")
+    list_select_related = ("paciente",)
+    search_fields = ("=id", "=paciente__id", "diagnostico")
+    fields = readonly_fields = (
+        "id", "fecha_consulta", "paciente", "cita_id", "diagnostico", "tratamiento", "nota_veterinaria", "codigos",
+        "archivado_en",
+    )
+    ordering = ("-fecha_consulta",)
+
+
+@admin.register(ArchivoAdjunto)
+class ArchivoAdjuntoAdmin(SoloLecturaAdmin):
+    """Contenido de los adjuntos, uno por sha256; los huérfanos los borra limpiar_adjuntos."""
+    list_display = ("sha256", "tipo", "tamanio", "miniatura", "creado_en")
+    list_filter = ("miniatura",)
+    search_fields = ("^sha256",)
+    ordering = ("-creado_en",)
+
+
+@admin.register(SubidaAdjunto)
+class SubidaAdjuntoAdmin(SoloLecturaAdmin):
+    """Subidas en curso; las abandonadas las cancela limpiar_adjuntos (junto con su archivo parcial)."""
+    list_display = ("nombre", "paciente", "historial_id", "recibido", "tamanio", "usuario", "actualizada_en")
+    list_select_related = ("paciente", "usuario")
+    search_fields = ("nombre",)
+    fields = readonly_fields = (
+        "id", "nombre", "paciente", "historial_id", "recibido", "tamanio", "usuario", "creada_en", "actualizada_en",
+    )
+    ordering = ("-actualizada_en",)
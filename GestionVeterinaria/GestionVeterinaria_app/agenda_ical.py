@@ -0,0 +1,206 @@
+"""
+Feed iCalendar (RFC 5545) de la agenda de cada veterinario.
+
+- El token es una firma de (veterinario, usuario): no se guarda en la base.
+- Cada veterinario tiene una "estampa" en caché que se actualiza cuando cambia
+  alguna de sus citas (ver signals.py). Sirve como Last-Modified y como parte
+  de la clave del cuerpo cacheado, así que un cambio invalida todo solo.
+- Con If-Modified-Since al día el feed responde 304 sin tocar la base.
+- Antes del 304 o del cuerpo cacheado se valida que el token siga vigente
+  (veterinario vinculado a ese usuario, usuario activo) contra un "titular"
+  cacheado por veterinario; invalidar() lo borra junto con la estampa y
+  signals.py lo llama cuando cambia el usuario o el veterinario.
+"""
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import sucursales
+from .forms import jornada
+from .models import Cita, Veterinario
+
+SAL_TOKEN = "GestionVeterinaria_app.agenda_ical"
+VENTANA_ATRAS_DIAS = 30
+VENTANA_ADELANTE_DIAS = 90
+VENTANA_MAX_DIAS = 366
+CACHE_TIMEOUT = 60 * 60 * 24
+
+_signer = signing.Signer(salt=SAL_TOKEN)
+
+
+# ------------------------------
+# Token
+# ------------------------------
+def token_para(vet):
+    return _signer.sign(f"{vet.pk}-{vet.user_id}")
+
+
+def leer_token(token):
+    """Devuelve (vet_id, user_id) o None si la firma no es válida."""
+    try:
+        valor = _signer.unsign(token)
+        vet_id, user_id = valor.split("-")
+        return int(vet_id), int(user_id)
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def _clave_titular(vet_id):
+    return f"agenda_ical:titular:{vet_id}"
+
+
+def titular(vet_id, user_id):
+    """Nombre del veterinario si el token (vet_id, user_id) sigue vigente, o None."""
+    datos = cache.get(_clave_titular(vet_id))
+    if datos is None:
+        fila = (
+            Veterinario.objects.filter(pk=vet_id, user__isnull=False, user__is_active=True)
+            .values_list("user_id", "nombre", "apellido").first()
+        )
+        # False también se cachea: un token revocado no consulta la base en cada pedido
+        datos = (fila[0], f"{fila[1]} {fila[2]}") if fila else False
+        cache.set(_clave_titular(vet_id), datos, CACHE_TIMEOUT)
+    if not datos or datos[0] != user_id:
+        return None
+    return datos[1]
+
+
+# ------------------------------
+# Estampa por veterinario (invalidación)
+# ------------------------------
+def _clave_estampa(vet_id):
+    return f"agenda_ical:estampa:{vet_id}"
+
+
+def estampa(vet_id):
+    """Segundos epoch del último cambio conocido en la agenda del veterinario."""
+    valor = cache.get(_clave_estampa(vet_id))
+    if valor is None:
+        # Sin dato (caché fría): asumimos que cambió ahora.
+        valor = int(time.time())
+        cache.add(_clave_estampa(vet_id), valor, None)
+    return valor
+
+
+def invalidar(vet_id):
+    cache.delete(_clave_titular(vet_id))
+    previa = cache.get(_clave_estampa(vet_id)) or 0
+    # Nunca repetir la estampa: el cliente compara con resolución de segundos.
+    cache.set(_clave_estampa(vet_id), max(previa + 1, int(time.time())), None)
+
+
+# ------------------------------
+# Ventana de fechas
+# ------------------------------
+def ventana(desde_str=None, hasta_str=None):
+    """
+    Parsea ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD. Por defecto, 30 días atrás y
+    90 adelante; la ventana nunca supera VENTANA_MAX_DIAS.
+    """
+    hoy = timezone.localdate()
+    try:
+        desde = datetime.strptime(desde_str, "%Y-%m-%d").date() if desde_str else None
+    except ValueError:
+        desde = None
+    try:
+        hasta = datetime.strptime(hasta_str, "%Y-%m-%d").date() if hasta_str else None
+    except ValueError:
+        hasta = None
+
+    desde = desde or hoy - timedelta(days=VENTANA_ATRAS_DIAS)
+    hasta = hasta or hoy + timedelta(days=VENTANA_ADELANTE_DIAS)
+    if hasta < desde:
+        hasta = desde
+    if (hasta - desde).days > VENTANA_MAX_DIAS:
+        hasta = desde + timedelta(days=VENTANA_MAX_DIAS)
+    return desde, hasta
+
+
+# ------------------------------
+# Generación
+# ------------------------------
+def _escapar(texto):
+    return (
+        str(texto or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _linea(texto):
+    """Línea iCalendar con folding a 75 octetos."""
+    datos = texto.encode("utf-8")
+    if len(datos) <= 75:
+        return texto + "\r\n"
+    partes, actual = [], ""
+    for ch in texto:
+        limite = 75 if not partes else 74
+        if len((actual + ch).encode("utf-8")) > limite:
+            partes.append(actual)
+            actual = ch
+        else:
+            actual += ch
+    partes.append(actual)
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def _fecha_utc(dt):
+    return dt.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def generar(vet_id, desde, hasta, nombre_vet=""):
+    """Generador de líneas del calendario; recorre las citas con un iterator()."""
+    tz = timezone.get_current_timezone()
+    inicio = timezone.make_aware(datetime.combine(desde, datetime.min.time()), tz)
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), datetime.min.time()), tz)
+    dtstamp = _fecha_utc(timezone.now())
+
+    yield _linea("BEGIN:VCALENDAR")
+    yield _linea("VERSION:2.0")
+    yield _linea("PRODID:-//Veterinaria SHIBA//Agenda//ES")
+    yield _linea("CALSCALE:GREGORIAN")
+    yield _linea(f"X-WR-CALNAME:{_escapar('Agenda ' + nombre_vet)}")
+
+    citas = (
+        Cita.objects
+        .filter(veterinario_id=vet_id, fecha_hora__gte=inicio, fecha_hora__lt=fin)
+        .order_by("fecha_hora")
+        .values(
+            "id", "fecha_hora", "estado", "sucursal_id",
+            "paciente__nombre", "paciente__especie",
+            "paciente__propietario__nombre", "paciente__propietario__apellido",
+        )
+    )
+    for c in citas.iterator(chunk_size=500):
+        # Dura un turno de su sucursal (cada una tiene su intervalo)
+        _, _, intervalo = jornada(sucursales.obtener(c["sucursal_id"]))
+        yield _linea("BEGIN:VEVENT")
+        yield _linea(f"UID:cita-{c['id']}@veterinaria-shiba")
+        yield _linea(f"DTSTAMP:{dtstamp}")
+        yield _linea(f"DTSTART:{_fecha_utc(c['fecha_hora'])}")
+        yield _linea(f"DTEND:{_fecha_utc(c['fecha_hora'] + timedelta(minutes=intervalo))}")
+        yield _linea(f"SUMMARY:{_escapar(c['paciente__nombre'] + ' (' + c['paciente__especie'] + ')')}")
+        propietario = f"{c['paciente__propietario__nombre']} {c['paciente__propietario__apellido']}"
+        yield _linea(f"DESCRIPTION:{_escapar('Propietario: ' + propietario + ' · Estado: ' + c['estado'])}")
+        yield _linea("STATUS:CANCELLED" if c["estado"] == "cancelada" else "STATUS:CONFIRMED")
+        yield _linea("END:VEVENT")
+
+    yield _linea("END:VCALENDAR")
+
+
+def clave_cuerpo(vet_id, estampa_vet, desde, hasta):
+    return f"agenda_ical:cuerpo:{vet_id}:{estampa_vet}:{desde:%Y%m%d}:{hasta:%Y%m%d}"
+
+
+def generar_y_cachear(clave, lineas):
+    """Pasa las líneas tal cual al response y, al terminar, guarda el cuerpo completo."""
+    partes = []
+    for linea in lineas:
+        partes.append(linea)
+        yield linea
+    cache.set(clave, "".join(partes), CACHE_TIMEOUT)
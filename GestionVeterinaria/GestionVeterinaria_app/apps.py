@@ -1,6 +1,11 @@
-from django.apps import AppConfig
-
-
-class GestionveterinariaAppConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'GestionVeterinaria_app'
+from django.apps import AppConfig
+
+
+class GestionveterinariaAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'GestionVeterinaria_app'
+
+    def ready(self):
+        from . import carga_perezosa, signals  # noqa: F401  (registra receivers)
+        if carga_perezosa.modo():
+            carga_perezosa.instalar()
@@ -0,0 +1,276 @@
+"""
+Archivo histórico y borrado por lotes.
+
+- archivar(): mueve citas e historiales anteriores a un corte a las tablas
+  CitaArchivada / HistorialMedicoArchivado, en lotes con transacciones cortas.
+- fecha_corte() / necesita_archivo(): las lecturas consultan el archivo solo
+  si la ventana pedida empieza antes del registro archivado más reciente.
+- dar_de_baja_*(): baja lógica inmediata + purga por lotes en segundo plano
+  (lanzada al confirmar la transacción), en lugar de una cascada de
+  on_delete=CASCADE en una sola transacción. La purga solo borra lo que tiene
+  eliminado_en: una baja revertida no pierde datos.
+  Si la purga se corta (reinicio), purgar_pendientes() (comando purgar_bajas)
+  la retoma desde eliminado_en.
+"""
+import logging
+import threading
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from . import auditoria, cambios, replica, salud
+from .models import (
+    Cita, CitaArchivada, HistorialMedico, HistorialMedicoArchivado, Paciente, Propietario, sucursal_activa_id,
+)
+
+logger = logging.getLogger(__name__)
+
+LOTE = 500
+CLAVE_CORTE = "archivo:corte"
+_SIN_DATO = object()
+
+
+# ------------------------------
+# Lectura
+# ------------------------------
+def fecha_corte():
+    """Fecha del registro archivado más reciente (None si el archivo está vacío)."""
+    corte = cache.get(CLAVE_CORTE, _SIN_DATO)
+    if corte is _SIN_DATO:
+        with replica.en_principal():  # queda cacheada hasta el próximo archivado
+            fechas = [
+                CitaArchivada.objects.aggregate(m=Max("fecha_hora"))["m"],
+                HistorialMedicoArchivado.objects.aggregate(m=Max("fecha_consulta"))["m"],
+            ]
+        fechas = [f for f in fechas if f is not None]
+        corte = max(fechas) if fechas else None
+        cache.set(CLAVE_CORTE, corte, None)
+    return corte
+
+
+def necesita_archivo(desde=None):
+    """True si una ventana que empieza en `desde` (None = desde siempre) toca el archivo."""
+    corte = fecha_corte()
+    return corte is not None and (desde is None or desde <= corte)
+
+
+def historial_de_paciente(paciente, desde=None):
+    """Historial del paciente, más reciente primero, uniendo el archivo solo si hace falta."""
+    vivos = paciente.historial_medico.all()
+    if desde is not None:
+        vivos = vivos.filter(fecha_consulta__gte=desde)
+    if not necesita_archivo(desde):
+        return vivos.order_by("-fecha_consulta")
+
+    archivados = HistorialMedicoArchivado.objects.filter(paciente=paciente)
+    if desde is not None:
+        archivados = archivados.filter(fecha_consulta__gte=desde)
+    return sorted([*vivos, *archivados], key=lambda h: h.fecha_consulta, reverse=True)
+
+
+def fuentes_de_citas(desde, hasta):
+    """
+    Querysets de citas para la ventana: la tabla viva y, si hace falta, el
+    archivo. Ambos limitados a la sucursal activa, si hay una.
+    """
+    fuentes = [Cita.objects.filter(fecha_hora__gte=desde, fecha_hora__lte=hasta)]
+    if necesita_archivo(desde):
+        archivadas = CitaArchivada.objects.filter(fecha_hora__gte=desde, fecha_hora__lte=hasta)
+        sucursal_id = sucursal_activa_id()
+        if sucursal_id is not None:
+            archivadas = archivadas.filter(sucursal_id=sucursal_id)
+        fuentes.append(archivadas)
+    return fuentes
+
+
+def contar_por(fuentes, campos):
+    """Count('id') agrupado por `campos`, sumado entre las fuentes. Devuelve dicts con 'total'."""
+    totales = {}
+    for qs in fuentes:
+        for fila in qs.values(*campos).annotate(total=Count("id")).order_by():
+            clave = tuple(fila[c] for c in campos)
+            totales[clave] = totales.get(clave, 0) + fila["total"]
+    return [{**dict(zip(campos, clave)), "total": n} for clave, n in totales.items()]
+
+
+def contar_distintos_por(fuentes, campos, distinto):
+    """
+    Count(distinto, distinct=True) agrupado por `campos`. Con una sola fuente
+    es un GROUP BY; con archivo se une en memoria (solo ventanas antiguas).
+    """
+    if len(fuentes) == 1:
+        filas = fuentes[0].values(*campos).annotate(total=Count(distinto, distinct=True)).order_by()
+        return [dict(f) for f in filas]
+
+    vistos = {}
+    for qs in fuentes:
+        for fila in qs.values_list(*campos, distinto).distinct():
+            vistos.setdefault(tuple(fila[:-1]), set()).add(fila[-1])
+    return [{**dict(zip(campos, clave)), "total": len(ids)} for clave, ids in vistos.items()]
+
+
+# ------------------------------
+# Archivado
+# ------------------------------
+def _en_lotes(qs, lote):
+    """Itera listas de pks del queryset, de a `lote`, releyendo cada vez (los lotes se borran)."""
+    while True:
+        pks = list(qs.order_by("pk").values_list("pk", flat=True)[:lote])
+        if not pks:
+            return
+        yield pks
+
+
+def archivar(corte, lote=LOTE):
+    """
+    Mueve al archivo historiales y citas anteriores a `corte`. Cada lote es una
+    transacción corta. Devuelve (historiales, citas) archivados.
+    """
+    # Mover al archivo no es un cambio de datos ni de la población
+    with auditoria.pausada(), salud.pausada(), cambios.pausada():
+        n_hist, n_citas = _archivar(corte, lote)
+    cache.delete(CLAVE_CORTE)
+    return n_hist, n_citas
+
+
+def _archivar(corte, lote):
+    n_hist = n_citas = 0
+
+    # Primero historiales: la cita tiene on_delete=CASCADE hacia su atención.
+    viejos = HistorialMedico.objects.filter(fecha_consulta__lt=corte)
+    for pks in _en_lotes(viejos, lote):
+        with transaction.atomic():
+            filas = HistorialMedico.objects.filter(pk__in=pks).values(
+                "id", "fecha_consulta", "diagnostico", "tratamiento",
+                "nota_veterinaria", "paciente_id", "cita_id",
+            )
+            codigos = _codigos_de(pks)
+            HistorialMedicoArchivado.objects.bulk_create(
+                [HistorialMedicoArchivado(**f, codigos=codigos.get(f["id"], [])) for f in filas],
+                ignore_conflicts=True,
+            )
+            HistorialMedico.objects.filter(pk__in=pks).delete()
+        n_hist += len(pks)
+
+    # Citas viejas sin atención viva (si la atención es más nueva que el corte, queda).
+    viejas = Cita.todas.filter(fecha_hora__lt=corte, atencion__isnull=True)
+    for pks in _en_lotes(viejas, lote):
+        with transaction.atomic():
+            filas = Cita.todas.filter(pk__in=pks).values(
+                "id", "fecha_hora", "veterinario_id", "paciente_id", "administrativo_id", "estado", "sucursal_id",
+            )
+            CitaArchivada.objects.bulk_create([CitaArchivada(**f) for f in filas], ignore_conflicts=True)
+            Cita.todas.filter(pk__in=pks).delete()
+        n_citas += len(pks)
+    return n_hist, n_citas
+
+
+def _codigos_de(historial_ids):
+    """{historial_id: [códigos del catálogo]}: la tabla M2M no pasa al archivo."""
+    codigos = {}
+    for relacion in (HistorialMedico.diagnosticos, HistorialMedico.tratamientos):
+        filas = relacion.through.objects.filter(historialmedico_id__in=historial_ids).values_list(
+            "historialmedico_id", "codigoclinico__codigo",
+        )
+        for historial_id, codigo in filas:
+            codigos.setdefault(historial_id, []).append(codigo)
+    return codigos
+
+
+# ------------------------------
+# Baja lógica + purga por lotes
+# ------------------------------
+def _borrar_en_lotes(qs, lote):
+    total = 0
+    for pks in _en_lotes(qs, lote):
+        # La baja ya quedó auditada y descontada (dar_de_baja_*): la purga no registra fila por fila.
+        # Sí anota los borrados para el feed (citas e historiales de los dados de baja), de a lote.
+        with cambios.agrupar(), transaction.atomic(), auditoria.pausada(), salud.pausada():
+            qs.model._base_manager.filter(pk__in=pks).delete()
+        total += len(pks)
+    return total
+
+
+def purgar_pacientes(paciente_ids, lote=LOTE):
+    """
+    Borra físicamente los pacientes y todo lo que cuelga de ellos, de a lotes.
+    Solo los que tienen la baja lógica confirmada (eliminado_en).
+    """
+    paciente_ids = list(
+        Paciente.todos.filter(pk__in=paciente_ids, eliminado_en__isnull=False).values_list("pk", flat=True)
+    )
+    _borrar_en_lotes(HistorialMedico.objects.filter(paciente_id__in=paciente_ids), lote)
+    _borrar_en_lotes(Cita.todas.filter(paciente_id__in=paciente_ids), lote)
+    _borrar_en_lotes(HistorialMedicoArchivado.objects.filter(paciente_id__in=paciente_ids), lote)
+    _borrar_en_lotes(CitaArchivada.objects.filter(paciente_id__in=paciente_ids), lote)
+    _borrar_en_lotes(Paciente.todos.filter(pk__in=paciente_ids), lote)
+
+
+def purgar_propietarios(propietario_ids, lote=LOTE):
+    propietario_ids = list(
+        Propietario.todos.filter(pk__in=propietario_ids, eliminado_en__isnull=False).values_list("pk", flat=True)
+    )
+    paciente_ids = list(Paciente.todos.filter(propietario_id__in=propietario_ids).values_list("pk", flat=True))
+    purgar_pacientes(paciente_ids, lote)
+    _borrar_en_lotes(Propietario.todos.filter(pk__in=propietario_ids), lote)
+
+
+def purgar_pendientes(lote=LOTE):
+    """
+    Purga todo lo dado de baja que siga en la base (una purga en segundo plano
+    cortada por un reinicio). Devuelve (propietarios, pacientes) purgados.
+    """
+    propietario_ids = list(Propietario.todos.filter(eliminado_en__isnull=False).values_list("pk", flat=True))
+    purgar_propietarios(propietario_ids, lote)
+    paciente_ids = list(Paciente.todos.filter(eliminado_en__isnull=False).values_list("pk", flat=True))
+    purgar_pacientes(paciente_ids, lote)
+    return len(propietario_ids), len(paciente_ids)
+
+
+def en_segundo_plano(func, *args):
+    """Corre `func` en un hilo aparte; cierra su conexión a la base al terminar."""
+    def correr():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Falló la tarea en segundo plano %s", func.__name__)
+        finally:
+            connection.close()
+
+    hilo = threading.Thread(target=correr, name=f"bg-{func.__name__}", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def dar_de_baja_pacientes(paciente_ids):
+    """Los oculta ya mismo (eliminado_en) y, al confirmar, purga sus datos en segundo plano."""
+    paciente_ids = list(paciente_ids)
+    ahora = timezone.now()
+    salud.dar_de_baja(paciente_ids)
+    Paciente.todos.filter(pk__in=paciente_ids).update(eliminado_en=ahora, version=F("version") + 1)
+    _auditar_bajas(Paciente, paciente_ids, ahora)
+    cambios.registrar(Paciente, paciente_ids, "b")
+    # Recién al confirmar: si la transacción del llamador se revierte, no se purga nada
+    transaction.on_commit(lambda: en_segundo_plano(purgar_pacientes, paciente_ids))
+
+
+def dar_de_baja_propietarios(propietario_ids):
+    propietario_ids = list(propietario_ids)
+    ahora = timezone.now()
+    Propietario.todos.filter(pk__in=propietario_ids).update(eliminado_en=ahora, version=F("version") + 1)
+    paciente_ids = list(Paciente.todos.filter(propietario_id__in=propietario_ids).values_list("pk", flat=True))
+    salud.dar_de_baja(paciente_ids)
+    Paciente.todos.filter(pk__in=paciente_ids).update(eliminado_en=ahora, version=F("version") + 1)
+    _auditar_bajas(Propietario, propietario_ids, ahora)
+    _auditar_bajas(Paciente, paciente_ids, ahora)
+    cambios.registrar(Propietario, propietario_ids, "b")
+    cambios.registrar(Paciente, paciente_ids, "b")
+    transaction.on_commit(lambda: en_segundo_plano(purgar_propietarios, propietario_ids))
+
+
+def _auditar_bajas(modelo, ids, ahora):
+    # update() no dispara signals
+    for pk in ids:
+        auditoria.registrar(modelo, pk, "baja", {"eliminado_en": [None, ahora]})
@@ -0,0 +1,184 @@
+"""
+Auditoría de cambios en citas, historial médico, pacientes y propietarios.
+
+- Captura: post_init guarda una foto de los campos de la instancia; post_save
+  y post_delete (signals.py) la comparan con los valores actuales y arman un
+  RegistroAuditoria con {campo: [antes, después]}. Si no cambió nada no se
+  registra. Las escrituras con update() no pasan por acá: las que importan
+  (bajas lógicas, fusiones) se registran a mano con registrar().
+- Escritura: dentro de un request (AuditoriaMiddleware) o de agrupar() los
+  registros se acumulan en memoria y se escriben al final con un solo
+  bulk_create, o con una sola escritura al archivo JSON-lines de
+  settings.AUDITORIA_ARCHIVO si está configurado. Fuera de eso (shell,
+  comandos sueltos) se escriben en el momento.
+- Solo se registra lo confirmado: cada registro entra al buffer en
+  transaction.on_commit.
+"""
+import contextvars
+import json
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .models import Cita, HistorialMedico, Paciente, Propietario, RegistroAuditoria
+
+logger = logging.getLogger(__name__)
+
+# Modelos auditados por nombre (RegistroAuditoria.modelo); los receivers están en signals.py
+MODELOS = {m._meta.model_name: m for m in (Cita, HistorialMedico, Paciente, Propietario)}
+# Campos técnicos que cambian solos y no aportan al registro
+IGNORADOS = {"id", "updated_at", "created_at", "version", "telefono_digitos", "telefono_invertido"}
+
+_buffer = contextvars.ContextVar("auditoria_buffer", default=None)
+_ruta = contextvars.ContextVar("auditoria_ruta", default="")
+_pausada = contextvars.ContextVar("auditoria_pausada", default=False)
+
+_campos = {}
+
+
+def campos(modelo):
+    """attnames auditados del modelo (las FK como <campo>_id)."""
+    if modelo not in _campos:
+        _campos[modelo] = tuple(
+            f.attname for f in modelo._meta.concrete_fields if f.attname not in IGNORADOS
+        )
+    return _campos[modelo]
+
+
+def _valores(instance):
+    # Solo lo cargado: los campos diferidos (.only()/.defer()) no se leen
+    datos = instance.__dict__
+    return {a: datos[a] for a in campos(type(instance)) if a in datos}
+
+
+# ------------------------------
+# Captura
+# ------------------------------
+def fotografiar(instance):
+    instance._auditoria_original = _valores(instance)
+
+
+def _iguales(a, b):
+    # Los formularios guardan "" donde la base tenía NULL: no es un cambio
+    return a == b or (a in (None, "") and b in (None, ""))
+
+
+def diferencias(antes, despues):
+    return {
+        campo: [antes.get(campo), valor]
+        for campo, valor in despues.items()
+        if campo not in antes or not _iguales(antes[campo], valor)
+    }
+
+
+def al_guardar(instance, created):
+    actuales = _valores(instance)
+    if created:
+        cambios = {campo: [None, valor] for campo, valor in actuales.items() if valor not in (None, "")}
+        accion = "alta"
+    else:
+        cambios = diferencias(getattr(instance, "_auditoria_original", {}), actuales)
+        accion = "cambio"
+    instance._auditoria_original = actuales
+    if cambios:
+        registrar(type(instance), instance.pk, accion, cambios)
+
+
+def al_borrar(instance):
+    original = getattr(instance, "_auditoria_original", None) or _valores(instance)
+    registrar(type(instance), instance.pk, "baja", {campo: [valor, None] for campo, valor in original.items()})
+
+
+def registrar(modelo, objeto_id, accion, cambios):
+    """Agrega un registro (al buffer del request si hay uno) cuando la transacción confirma."""
+    if _pausada.get():
+        return
+    registro = RegistroAuditoria(
+        modelo=modelo._meta.model_name,
+        objeto_id=objeto_id,
+        accion=accion,
+        # Ida y vuelta por el encoder: fechas/decimales quedan como en la base
+        cambios=json.loads(json.dumps(cambios, cls=DjangoJSONEncoder)),
+        ruta=_ruta.get()[:200],
+    )
+    buffer = _buffer.get()
+    if buffer is not None:
+        transaction.on_commit(lambda: buffer.append(registro))
+    else:
+        transaction.on_commit(lambda: escribir([registro]))
+
+
+def historial(modelo, objeto_id, limite=200):
+    """Registros de un objeto, el más nuevo primero (índice modelo, objeto_id, fecha)."""
+    return RegistroAuditoria.objects.filter(modelo=modelo, objeto_id=objeto_id).order_by("-fecha")[:limite]
+
+
+# ------------------------------
+# Escritura
+# ------------------------------
+def escribir(registros):
+    """Una sola escritura para todos los registros: bulk_create o append al JSON-lines."""
+    if not registros:
+        return
+    archivo = getattr(settings, "AUDITORIA_ARCHIVO", None)
+    if archivo:
+        lineas = "".join(
+            json.dumps({
+                "fecha": r.fecha, "modelo": r.modelo, "objeto_id": r.objeto_id, "accion": r.accion,
+                "cambios": r.cambios, "usuario_id": r.usuario_id, "usuario": r.usuario_nombre, "ruta": r.ruta,
+            }, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+            for r in registros
+        )
+        with open(archivo, "a", encoding="utf-8") as f:
+            f.write(lineas)
+    else:
+        RegistroAuditoria.objects.bulk_create(registros)
+
+
+@contextmanager
+def agrupar(usuario=None, ruta=""):
+    """
+    Acumula los registros del bloque y los escribe juntos al salir.
+    `usuario` puede ser perezoso (request.user): solo se evalúa si hubo cambios.
+    """
+    buffer = []
+    token_buffer, token_ruta = _buffer.set(buffer), _ruta.set(ruta)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token_buffer)
+        _ruta.reset(token_ruta)
+        if buffer:
+            if usuario is not None and getattr(usuario, "is_authenticated", False):
+                for registro in buffer:
+                    registro.usuario_id = usuario.pk
+                    registro.usuario_nombre = usuario.get_username()
+            try:
+                escribir(buffer)
+            except Exception:
+                # Los datos ya están confirmados: no se le devuelve un error al usuario por esto
+                logger.exception("No se pudieron escribir %d registros de auditoría", len(buffer))
+
+
+@contextmanager
+def pausada():
+    """Para movimientos que no son cambios de datos (archivado, purga de bajas ya registradas)."""
+    token = _pausada.set(True)
+    try:
+        yield
+    finally:
+        _pausada.reset(token)
+
+
+class AuditoriaMiddleware:
+    """Junta los registros de auditoría del request y los escribe al final, de una vez."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with agrupar(getattr(request, "user", None), request.path):
+            return self.get_response(request)
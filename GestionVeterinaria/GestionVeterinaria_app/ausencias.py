@@ -0,0 +1,208 @@
+"""
+Ausencias de veterinarios y reprogramación en bloque de sus citas.
+
+- planificar(): las citas programadas que caen en la ausencia (una
+  consulta), los veterinarios de sus sucursales (una) y los turnos libres de
+  todos ellos en la ventana de búsqueda (disponibilidad.slots_libres: una
+  consulta de citas y una de ausencias para lo que no esté en caché). El
+  plan se arma en memoria, cita por cita en orden de fecha: el mismo horario
+  con otro veterinario de la sucursal (primero el que atiende la especie,
+  después el menos cargado ese día) y, si nadie lo tiene libre, el turno
+  libre más cercano hasta DIAS_BUSQUEDA días después de la ausencia (también
+  con el propio veterinario a su vuelta). Cada turno asignado sale de los
+  libres para no darlo dos veces; lo que no entra queda para resolver a mano.
+- El plan se muestra para confirmar y vuelve firmado (firmar / leer) con la
+  versión de cada cita.
+- aplicar(): en una transacción comprueba que ninguna cita cambió y que los
+  turnos destino siguen libres, y guarda todo con un bulk_update. Como
+  bulk_update no dispara signals, los registros de cambios y auditoría y las
+  cachés (turnos, agenda iCal, campanita, carga) se actualizan acá.
+"""
+from datetime import datetime, time, timedelta
+
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from . import agenda_ical, auditoria, cambios, disponibilidad, recomendacion, sucursales
+from .context_processors import invalidar_alertas
+from .forms import generar_slots
+from .models import Cita, Veterinario
+
+DIAS_BUSQUEDA = 7
+SAL_PLAN = "GestionVeterinaria_app.ausencias"
+# El plan firmado vale una hora: después hay que volver a armarlo
+VIGENCIA_PLAN = 60 * 60
+
+
+class PlanVencido(Exception):
+    """Las citas o la agenda cambiaron desde que se armó el plan."""
+
+
+def _aware(fecha, hora=time.min):
+    return timezone.make_aware(datetime.combine(fecha, hora), timezone.get_current_timezone())
+
+
+def afectadas(ausencia):
+    """Citas programadas (todavía no pasadas) del veterinario durante la ausencia."""
+    return (
+        Cita.todas.filter(
+            veterinario_id=ausencia.veterinario_id,
+            estado="programada",
+            fecha_hora__gte=max(_aware(ausencia.desde), timezone.now()),
+            fecha_hora__lt=_aware(ausencia.hasta + timedelta(days=1)),
+        )
+        .select_related("paciente")
+        .order_by("fecha_hora")
+    )
+
+
+# ------------------------------
+# Plan
+# ------------------------------
+def planificar(ausencia, dias_busqueda=DIAS_BUSQUEDA):
+    """
+    [{"cita", "veterinario", "fecha_hora", "mismo_horario"}] en orden de
+    fecha; veterinario y fecha_hora son None si no se encontró lugar.
+    """
+    citas = list(afectadas(ausencia))
+    if not citas:
+        return []
+
+    sucursal_ids = {c.sucursal_id for c in citas}
+    vets = [
+        v for v in Veterinario.todos.order_by("apellido", "nombre")
+        if v.sucursal_id in sucursal_ids
+    ]
+    primer_dia = timezone.localtime(citas[0].fecha_hora).date()
+    ultimo_dia = ausencia.hasta + timedelta(days=dias_busqueda)
+    fechas = [primer_dia + timedelta(days=i) for i in range((ultimo_dia - primer_dia).days + 1)]
+    libres_por_vet = disponibilidad.slots_libres([v.pk for v in vets], primer_dia, len(fechas))
+
+    # Turnos libres y ocupación (turnos tomados) por (veterinario, día), en memoria
+    libres, carga = {}, {}
+    for v in vets:
+        capacidad = len(generar_slots(primer_dia, set(), sucursales.obtener(v.sucursal_id)))
+        for f in fechas:
+            slots = libres_por_vet[v.pk][f]
+            libres[(v.pk, f)] = set(disponibilidad.slots_futuros(slots, f))
+            carga[(v.pk, f)] = capacidad - len(slots)
+
+    plan = []
+    for cita in citas:
+        local = timezone.localtime(cita.fecha_hora)
+        dia, hora = local.date(), local.strftime("%H:%M")
+        candidatos = [v for v in vets if v.sucursal_id == cita.sucursal_id]
+
+        def preferencia(v, f):
+            return (not recomendacion.atiende_especie(v.especialidad, cita.paciente.especie), carga[(v.pk, f)])
+
+        mismo = [v for v in candidatos if v.pk != ausencia.veterinario_id and hora in libres[(v.pk, dia)]]
+        if mismo:
+            elegido, fecha, slot = min(mismo, key=lambda v: preferencia(v, dia)), dia, hora
+        else:
+            original = local.replace(tzinfo=None)
+            opciones = [
+                (abs(datetime.combine(f, time(*map(int, s.split(":")))) - original), preferencia(v, f), f, s, v)
+                for v in candidatos for f in fechas for s in libres[(v.pk, f)]
+            ]
+            if not opciones:
+                plan.append({"cita": cita, "veterinario": None, "fecha_hora": None, "mismo_horario": False})
+                continue
+            *_, fecha, slot, elegido = min(opciones, key=lambda o: o[:4])
+
+        libres[(elegido.pk, fecha)].discard(slot)
+        carga[(elegido.pk, fecha)] += 1
+        plan.append({
+            "cita": cita,
+            "veterinario": elegido,
+            "fecha_hora": _aware(fecha, time(*map(int, slot.split(":")))),
+            "mismo_horario": fecha == dia and slot == hora,
+        })
+    return plan
+
+
+def firmar(ausencia, plan):
+    """Plan (solo lo que tiene destino) para el formulario de confirmación."""
+    pasos = [
+        [p["cita"].pk, p["cita"].version, p["veterinario"].pk, p["fecha_hora"].isoformat()]
+        for p in plan if p["veterinario"]
+    ]
+    return signing.dumps({"ausencia": ausencia.pk, "pasos": pasos}, salt=SAL_PLAN, compress=True)
+
+
+def leer(ausencia, firmado):
+    """[(cita_id, version, vet_id, fecha_hora)] del plan firmado. PlanVencido si no vale."""
+    try:
+        datos = signing.loads(firmado, salt=SAL_PLAN, max_age=VIGENCIA_PLAN)
+    except signing.BadSignature:
+        raise PlanVencido("El plan venció o no es válido.")
+    if datos.get("ausencia") != ausencia.pk:
+        raise PlanVencido("El plan es de otra ausencia.")
+    return [(c, v, vet, datetime.fromisoformat(fh)) for c, v, vet, fh in datos["pasos"]]
+
+
+# ------------------------------
+# Aplicación
+# ------------------------------
+@transaction.atomic
+def aplicar(ausencia, pasos):
+    """Mueve las citas del plan con un bulk_update. Devuelve cuántas se movieron."""
+    if not pasos:
+        return 0
+    ids = [c for c, *_ in pasos]
+    citas = {c.pk: c for c in Cita.todas.select_for_update().filter(pk__in=ids)}
+    for cita_id, version, _, _ in pasos:
+        cita = citas.get(cita_id)
+        if (
+            cita is None or cita.version != version or cita.estado != "programada"
+            or cita.veterinario_id != ausencia.veterinario_id
+        ):
+            raise PlanVencido("Alguna de las citas cambió mientras se revisaba el plan.")
+
+    destinos = {(vet_id, fecha_hora) for _, _, vet_id, fecha_hora in pasos}
+    vet_ids = {vet_id for vet_id, _ in destinos}
+    tomados = set(
+        Cita.todas.filter(
+            estado="programada", veterinario_id__in=vet_ids, fecha_hora__in={fh for _, fh in destinos},
+        ).exclude(pk__in=ids).values_list("veterinario_id", "fecha_hora")
+    )
+    dias = {(vet_id, timezone.localtime(fh).date()) for vet_id, fh in destinos}
+    sin_atencion = disponibilidad.ausentes(vet_ids, min(d for _, d in dias), max(d for _, d in dias))
+    if len(destinos) < len(pasos) or destinos & tomados or dias & sin_atencion:
+        raise PlanVencido("Alguno de los turnos elegidos ya no está libre.")
+
+    sucursal_de = dict(Veterinario.todos.filter(pk__in=vet_ids).values_list("pk", "sucursal_id"))
+    ahora = timezone.now()
+    movidas, movimientos = [], []
+    for cita_id, _, vet_id, fecha_hora in pasos:
+        cita = citas[cita_id]
+        antes = (cita.veterinario_id, cita.fecha_hora, cita.sucursal_id)
+        cita.veterinario_id, cita.fecha_hora, cita.sucursal_id = vet_id, fecha_hora, sucursal_de[vet_id]
+        cita.updated_at = ahora
+        cita.version += 1
+        movidas.append(cita)
+        movimientos.append(((antes[0], timezone.localtime(antes[1]).date()), (vet_id, timezone.localtime(fecha_hora).date())))
+        auditoria.registrar(Cita, cita.pk, "cambio", {
+            "veterinario_id": [antes[0], vet_id],
+            "fecha_hora": [antes[1], fecha_hora],
+            "sucursal_id": [antes[2], cita.sucursal_id],
+        })
+    Cita.todas.bulk_update(movidas, ["veterinario", "fecha_hora", "sucursal", "updated_at", "version"])
+    ausencia.reprogramada_en = ahora
+    ausencia.save(update_fields=["reprogramada_en"])
+
+    cambios.registrar(Cita, ids)
+    recomendacion.mover(movimientos)
+    sucursal_ids = {c.sucursal_id for c in movidas} | {sucursal_de.get(ausencia.veterinario_id)}
+
+    def invalidar():
+        for vet_id in vet_ids | {ausencia.veterinario_id}:
+            agenda_ical.invalidar(vet_id)
+        for antes, despues in movimientos:
+            disponibilidad.invalidar(*antes)
+            disponibilidad.invalidar(*despues)
+        invalidar_alertas(vet_ids | {ausencia.veterinario_id}, sucursal_ids)
+
+    transaction.on_commit(invalidar)
+    return len(movidas)
@@ -0,0 +1,214 @@
+"""
+Registro de cambios para sincronización incremental (feed "lo posterior a N").
+
+- Captura: post_save / post_delete de Cita, HistorialMedico, Paciente,
+  Propietario y Adjunto (signals.py) anotan (modelo, id, acción). Las escrituras con
+  update() se anotan a mano con registrar() (bajas lógicas, fusiones,
+  mudanza de veterinario). El archivado no cuenta: los datos siguen
+  existiendo, solo cambian de tabla.
+- Escritura: como en auditoria.py, solo lo confirmado (on_commit) y por
+  bloques: dentro de un request (CambiosMiddleware) o de agrupar() las filas
+  se juntan y se escriben con un bulk_create al final, una por objeto.
+- Feed: Cambio.id es la secuencia. feed() devuelve los cambios posteriores a
+  un cursor con el estado actual de cada objeto (una consulta por modelo), o
+  "b" si ya no existe o no es visible (baja lógica, otra sucursal). Un
+  cliente nuevo pide desde=0: la tabla compactada tiene una fila por objeto
+  vivo.
+- Compactación (comando compactar_cambios): borra las filas que tienen otra
+  posterior del mismo objeto (el feed lee el estado actual, no aportan) y
+  vence las bajas más viejas que la retención. Las bajas vencidas dejan una
+  fila "corte": un cursor anterior a ese corte ya no puede enterarse de
+  ellas y tiene que resincronizar desde 0 (CursorVencido).
+"""
+import contextvars
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import Adjunto, Cambio, Cita, HistorialMedico, Paciente, Propietario
+
+logger = logging.getLogger(__name__)
+
+# Modelos del feed por nombre (Cambio.modelo); los receivers están en signals.py
+MODELOS = {m._meta.model_name: m for m in (Propietario, Paciente, Cita, HistorialMedico, Adjunto)}
+# Columnas internas que no viajan al cliente
+OMITIDOS = {"eliminado_en", "telefono_digitos", "telefono_invertido"}
+LIMITE = 500
+MAX_LIMITE = 2000
+# Una fila recién insertada puede tener un id menor que otra ya visible si
+# confirmó después: el feed no entrega lo más nuevo que MARGEN para no saltearla
+MARGEN = timedelta(seconds=5)
+RETENCION_BAJAS = timedelta(days=30)
+LOTE = 1000
+
+_buffer = contextvars.ContextVar("cambios_buffer", default=None)
+_pausada = contextvars.ContextVar("cambios_pausada", default=False)
+
+_campos = {}
+
+
+class CursorVencido(Exception):
+    """El cursor es anterior al último corte de compactación: hay que resincronizar desde 0."""
+
+
+def campos(modelo):
+    """attnames que viajan en el feed (las FK como <campo>_id)."""
+    if modelo not in _campos:
+        _campos[modelo] = tuple(f.attname for f in modelo._meta.concrete_fields if f.attname not in OMITIDOS)
+    return _campos[modelo]
+
+
+# ------------------------------
+# Captura
+# ------------------------------
+def registrar(modelo, ids, accion="u"):
+    """Anota los objetos como cambiados ("u") o borrados ("b") cuando la transacción confirma."""
+    if _pausada.get():
+        return
+    nombre = modelo._meta.model_name
+    filas = [(nombre, pk, accion) for pk in ids]
+    if not filas:
+        return
+    buffer = _buffer.get()
+    if buffer is not None:
+        transaction.on_commit(lambda: buffer.extend(filas))
+    else:
+        transaction.on_commit(lambda: escribir(filas))
+
+
+def escribir(filas):
+    """Un bulk_create con la última acción de cada objeto."""
+    ultimas = {}
+    for modelo, pk, accion in filas:
+        ultimas.pop((modelo, pk), None)  # conserva el orden del último cambio
+        ultimas[(modelo, pk)] = accion
+    ahora = timezone.now()
+    Cambio.objects.bulk_create([
+        Cambio(modelo=modelo, objeto_id=pk, accion=accion, fecha=ahora)
+        for (modelo, pk), accion in ultimas.items()
+    ])
+
+
+@contextmanager
+def agrupar():
+    """Acumula los cambios del bloque y los escribe juntos al salir."""
+    buffer = []
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+        if buffer:
+            try:
+                escribir(buffer)
+            except Exception:
+                # Los datos ya están confirmados: no se le devuelve un error al usuario por esto
+                logger.exception("No se pudieron escribir %d cambios para sincronización", len(buffer))
+
+
+@contextmanager
+def pausada():
+    """Para movimientos que no cambian los datos (archivado)."""
+    token = _pausada.set(True)
+    try:
+        yield
+    finally:
+        _pausada.reset(token)
+
+
+class CambiosMiddleware:
+    """Junta los cambios del request y los escribe al final, de una vez."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with agrupar():
+            return self.get_response(request)
+
+
+# ------------------------------
+# Feed
+# ------------------------------
+def corte():
+    """Secuencia hasta la que se vencieron bajas (0 si nunca)."""
+    return Cambio.objects.filter(accion="corte").aggregate(hasta=Max("objeto_id"))["hasta"] or 0
+
+
+def feed(desde=0, limite=LIMITE):
+    """
+    (cambios, hasta, mas) posteriores a `desde`, en orden de secuencia y uno
+    por objeto: {"seq", "modelo", "id", "op": "u", "datos": {...}} o
+    {"seq", "modelo", "id", "op": "b"}. `hasta` es el próximo cursor.
+    """
+    if 0 < desde < corte():
+        raise CursorVencido(desde)
+    filas = list(
+        Cambio.objects.filter(pk__gt=desde, fecha__lte=timezone.now() - MARGEN)
+        .exclude(accion="corte").order_by("pk")
+        .values_list("pk", "modelo", "objeto_id", "accion")[:limite + 1]
+    )
+    mas = len(filas) > limite
+    filas = filas[:limite]
+    hasta = filas[-1][0] if filas else desde
+
+    ultimos = {}
+    for seq, modelo, pk, accion in filas:
+        ultimos.pop((modelo, pk), None)
+        ultimos[(modelo, pk)] = (seq, accion)
+
+    # Estado actual, con el manager que filtra bajas lógicas y sucursal
+    pedidos = defaultdict(list)
+    for (modelo, pk), (_, accion) in ultimos.items():
+        if accion == "u" and modelo in MODELOS:
+            pedidos[modelo].append(pk)
+    actuales = {
+        modelo: {f["id"]: f for f in MODELOS[modelo].objects.filter(pk__in=ids).values(*campos(MODELOS[modelo]))}
+        for modelo, ids in pedidos.items()
+    }
+
+    cambios = []
+    for (modelo, pk), (seq, _) in ultimos.items():
+        datos = actuales.get(modelo, {}).get(pk)
+        cambio = {"seq": seq, "modelo": modelo, "id": pk, "op": "u" if datos else "b"}
+        if datos:
+            cambio["datos"] = datos
+        cambios.append(cambio)
+    return cambios, hasta, mas
+
+
+# ------------------------------
+# Compactación
+# ------------------------------
+def _borrar_en_lotes(qs, lote):
+    total = 0
+    while True:
+        pks = list(qs.values_list("pk", flat=True)[:lote])
+        if not pks:
+            return total
+        with transaction.atomic():
+            Cambio.objects.filter(pk__in=pks).delete()
+        total += len(pks)
+
+
+def compactar(retencion=RETENCION_BAJAS, lote=LOTE):
+    """Deja una fila por objeto y vence las bajas más viejas que `retencion`. Devuelve (repetidas, bajas)."""
+    posterior = Cambio.objects.filter(
+        modelo=OuterRef("modelo"), objeto_id=OuterRef("objeto_id"), pk__gt=OuterRef("pk"),
+    )
+    repetidas = _borrar_en_lotes(Cambio.objects.exclude(accion="corte").filter(Exists(posterior)), lote)
+
+    vencidas = Cambio.objects.filter(accion="b", fecha__lt=timezone.now() - retencion)
+    hasta = vencidas.aggregate(hasta=Max("pk"))["hasta"]
+    if hasta is None:
+        return repetidas, 0
+    # El corte se escribe antes de borrar: si se corta a mitad de camino, los clientes ya resincronizan
+    Cambio.objects.create(modelo="", objeto_id=hasta, accion="corte")
+    bajas = _borrar_en_lotes(vencidas.filter(pk__lte=hasta), lote)
+    Cambio.objects.filter(accion="corte", objeto_id__lt=hasta).delete()
+    return repetidas, bajas
@@ -0,0 +1,143 @@
+"""
+Modo auditoría de cargas perezosas de ForeignKey / OneToOne (consultas N+1).
+
+Con ``settings.AUDITAR_CARGAS_PEREZOSAS`` en "log" o "raise", cada vez que una
+relación se resuelve con una consulta extra mientras se renderiza un template
+(o dentro de ``auditar_serializacion()``) se registra el campo y la vista.
+Al terminar el request el middleware loguea el resumen por vista y campo.
+En modo "raise" se levanta CargaPerezosaError en el primer acceso.
+"""
+import contextvars
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models.fields import related_descriptors
+from django.template import base as template_base
+
+logger = logging.getLogger(__name__)
+
+_vista = contextvars.ContextVar("carga_perezosa_vista", default=None)
+_registro = contextvars.ContextVar("carga_perezosa_registro", default=None)
+_vigilando = contextvars.ContextVar("carga_perezosa_vigilando", default=0)
+
+_instalado = False
+
+
+class CargaPerezosaError(Exception):
+    """Acceso a una relación no precargada durante el render (modo 'raise')."""
+
+
+def modo():
+    return getattr(settings, "AUDITAR_CARGAS_PEREZOSAS", None)
+
+
+@contextmanager
+def auditar_serializacion():
+    """
+    Marca un bloque (p.ej. armar un JSON a partir de una lista) como zona
+    donde no deberían ocurrir cargas perezosas.
+    """
+    token = _vigilando.set(_vigilando.get() + 1)
+    try:
+        yield
+    finally:
+        _vigilando.reset(token)
+
+
+@contextmanager
+def sin_auditar():
+    """Para precargas deliberadas (p.ej. el backend de auth que arma el usuario cacheado)."""
+    token = _vigilando.set(0)
+    try:
+        yield
+    finally:
+        _vigilando.reset(token)
+
+
+def _registrar(campo):
+    vista = _vista.get() or "(sin vista)"
+    if modo() == "raise":
+        raise CargaPerezosaError(
+            f"Carga perezosa de {campo} en la vista {vista}. "
+            f"Agregá select_related()/prefetch_related() al queryset."
+        )
+    registro = _registro.get()
+    if registro is not None:
+        registro[campo] += 1
+    else:
+        logger.warning("Carga perezosa de %s fuera de un request", campo)
+
+
+def _envolver_forward(original):
+    @wraps(original)
+    def get_object(self, instance):
+        if _vigilando.get():
+            _registrar(f"{type(instance).__name__}.{self.field.name}")
+        return original(self, instance)
+    return get_object
+
+
+def _envolver_reverse(original):
+    @wraps(original)
+    def __get__(self, instance, cls=None):
+        if (
+            instance is not None
+            and _vigilando.get()
+            and not self.related.is_cached(instance)
+            and instance.pk is not None
+        ):
+            _registrar(f"{type(instance).__name__}.{self.related.get_accessor_name()}")
+        return original(self, instance, cls)
+    return __get__
+
+
+def _envolver_render(original):
+    @wraps(original)
+    def render(self, context):
+        with auditar_serializacion():
+            return original(self, context)
+    return render
+
+
+def instalar():
+    """Engancha los descriptores de relaciones y el render de templates (una sola vez)."""
+    global _instalado
+    if _instalado:
+        return
+    fwd = related_descriptors.ForwardManyToOneDescriptor
+    fwd.get_object = _envolver_forward(fwd.get_object)
+    rev = related_descriptors.ReverseOneToOneDescriptor
+    rev.__get__ = _envolver_reverse(rev.__get__)
+    template_base.Template.render = _envolver_render(template_base.Template.render)
+    _instalado = True
+
+
+class CargaPerezosaMiddleware:
+    """Acumula las cargas perezosas del request y las reporta por vista y campo."""
+
+    def __init__(self, get_response):
+        if not modo():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token_reg = _registro.set(Counter())
+        token_vista = _vista.set(request.path)
+        try:
+            response = self.get_response(request)
+            registro = _registro.get()
+            if registro:
+                detalle = ", ".join(f"{campo} x{n}" for campo, n in registro.most_common())
+                logger.warning("Cargas perezosas en la vista %s: %s", _vista.get(), detalle)
+            return response
+        finally:
+            _registro.reset(token_reg)
+            _vista.reset(token_vista)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        _vista.set(match.view_name if match else request.path)
@@ -0,0 +1,212 @@
+"""
+Catálogo clínico en memoria: autocompletado por prefijo y codificación de
+texto libre.
+
+- Un trie por tipo (diagnóstico / tratamiento) con el código, el nombre y
+  los sinónimos normalizados (minúsculas, sin tildes). Cada palabra de un
+  término también entra como comienzo parcial: "ext" encuentra "Otitis
+  externa". Se arma una vez por proceso y se rehace solo cuando cambia el
+  catálogo: la versión vive en la caché compartida (ver signals.py), así
+  cada consulta cuesta una lectura de caché y un recorrido del trie.
+- codificar(): recorre un texto libre con el mismo trie y devuelve los
+  códigos cuyos términos completos aparecen en él. codificar_en_lotes() lo
+  aplica a los historiales existentes (comando codificar_historiales).
+"""
+import threading
+import time
+import unicodedata
+from collections import deque
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import replica
+from .models import CodigoClinico, HistorialMedico, HistorialMedicoArchivado
+
+CLAVE_VERSION = "catalogo:version"
+LIMITE = 15
+LOTE = 500
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con los espacios colapsados."""
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", texto or "") if not unicodedata.combining(c)
+    )
+    return " ".join(sin_tildes.lower().split())
+
+
+class Trie:
+    __slots__ = ("hijos", "completos", "parciales")
+
+    def __init__(self):
+        self.hijos = {}
+        self.completos = []  # ids cuyo término termina acá
+        self.parciales = []  # ids con una palabra interna que termina acá
+
+    def insertar(self, termino, item_id):
+        """Inserta el término y, como parcial, cada sufijo que empieza en una palabra."""
+        palabras = termino.split(" ")
+        for i in range(len(palabras)):
+            nodo = self
+            for letra in " ".join(palabras[i:]):
+                nodo = nodo.hijos.setdefault(letra, Trie())
+            (nodo.completos if i == 0 else nodo.parciales).append(item_id)
+
+    def buscar(self, prefijo, limite=LIMITE):
+        """Ids con algún término que empieza por `prefijo`; los más cortos primero."""
+        nodo = self
+        for letra in prefijo:
+            nodo = nodo.hijos.get(letra)
+            if nodo is None:
+                return []
+        encontrados = {}
+        cola = deque([nodo])
+        while cola and len(encontrados) < limite:
+            actual = cola.popleft()
+            for item_id in (*actual.completos, *actual.parciales):
+                encontrados.setdefault(item_id, None)
+            cola.extend(actual.hijos[c] for c in sorted(actual.hijos))
+        return list(encontrados)[:limite]
+
+    def coincidencias(self, texto):
+        """Ids cuyos términos completos aparecen en `texto` (normalizado) como palabras enteras."""
+        encontrados = set()
+        largo = len(texto)
+        for inicio in range(largo):
+            if inicio and texto[inicio - 1].isalnum():
+                continue
+            nodo = self
+            for pos in range(inicio, largo):
+                nodo = nodo.hijos.get(texto[pos])
+                if nodo is None:
+                    break
+                fin = pos + 1
+                if nodo.completos and (fin == largo or not texto[fin].isalnum()):
+                    encontrados.update(nodo.completos)
+        return encontrados
+
+
+# ------------------------------
+# Carga (una vez por proceso y versión)
+# ------------------------------
+_cargado = (None, {}, {})  # (versión, tries, items): se reemplaza entero, nunca se modifica
+_lock = threading.Lock()
+
+
+def version():
+    v = cache.get(CLAVE_VERSION)
+    if v is None:
+        v = time.time_ns()
+        cache.add(CLAVE_VERSION, v, None)
+        v = cache.get(CLAVE_VERSION, v)
+    return v
+
+
+def invalidar():
+    cache.set(CLAVE_VERSION, time.time_ns(), None)
+
+
+def _armar():
+    tries = {tipo: Trie() for tipo, _ in CodigoClinico.TIPO_CHOICES}
+    items = {}
+    with replica.en_principal():
+        activos = list(CodigoClinico.objects.filter(activo=True).order_by("nombre"))
+    for item in activos:
+        items[item.pk] = item
+        for termino in {normalizar(t) for t in (item.codigo, item.nombre, *item.lista_sinonimos())}:
+            if termino:
+                tries[item.tipo].insertar(termino, item.pk)
+    return tries, items
+
+
+def _catalogo():
+    global _cargado
+    v = version()
+    if _cargado[0] != v:
+        with _lock:
+            if _cargado[0] != v:
+                _cargado = (v, *_armar())
+    _, tries, items = _cargado
+    return tries, items
+
+
+def autocompletar(tipo, texto, limite=LIMITE):
+    """CodigoClinico activos del tipo cuyo código, nombre o sinónimo empieza por `texto`."""
+    prefijo = normalizar(texto)
+    if not prefijo:
+        return []
+    tries, items = _catalogo()
+    trie = tries.get(tipo)
+    return [items[i] for i in trie.buscar(prefijo, limite)] if trie else []
+
+
+def codificar(tipo, texto):
+    """Ids de CodigoClinico del tipo mencionados en el texto libre."""
+    tries, _ = _catalogo()
+    trie = tries.get(tipo)
+    texto = normalizar(texto)
+    return trie.coincidencias(texto) if trie and texto else set()
+
+
+# ------------------------------
+# Codificación de historiales existentes
+# ------------------------------
+def _lotes(qs, lote, *campos):
+    """Filas de `qs` en lotes por pk creciente (keyset: cada lote es una consulta corta)."""
+    ultimo = 0
+    while True:
+        filas = list(qs.filter(pk__gt=ultimo).order_by("pk").values_list("pk", *campos)[:lote])
+        if not filas:
+            return
+        ultimo = filas[-1][0]
+        yield filas
+
+
+def codificar_en_lotes(lote=LOTE, todos=False, simular=False):
+    """
+    Vincula los historiales con los códigos que menciona su texto libre: una
+    transacción y un bulk_create por lote. Sin `todos`, solo los que no tienen
+    ningún código. Los archivados guardan los códigos en su campo `codigos`.
+    Devuelve (revisados, codificados, vínculos).
+    """
+    Diagnosticos = HistorialMedico.diagnosticos.through
+    Tratamientos = HistorialMedico.tratamientos.through
+    _, items = _catalogo()
+    revisados = codificados = vinculos = 0
+
+    vivos = HistorialMedico.objects.all()
+    if not todos:
+        vivos = vivos.filter(diagnosticos__isnull=True, tratamientos__isnull=True)
+    for filas in _lotes(vivos, lote, "diagnostico", "tratamiento"):
+        diagnosticos = [
+            Diagnosticos(historialmedico_id=pk, codigoclinico_id=c)
+            for pk, diagnostico, _ in filas for c in codificar("diagnostico", diagnostico)
+        ]
+        tratamientos = [
+            Tratamientos(historialmedico_id=pk, codigoclinico_id=c)
+            for pk, _, tratamiento in filas for c in codificar("tratamiento", tratamiento)
+        ]
+        if not simular:
+            with transaction.atomic():
+                Diagnosticos.objects.bulk_create(diagnosticos, ignore_conflicts=True)
+                Tratamientos.objects.bulk_create(tratamientos, ignore_conflicts=True)
+        revisados += len(filas)
+        codificados += len({v.historialmedico_id for v in (*diagnosticos, *tratamientos)})
+        vinculos += len(diagnosticos) + len(tratamientos)
+
+    archivados = HistorialMedicoArchivado.objects.all()
+    if not todos:
+        archivados = archivados.filter(codigos=[])
+    for filas in _lotes(archivados, lote, "diagnostico", "tratamiento"):
+        cambiados = []
+        for pk, diagnostico, tratamiento in filas:
+            ids = codificar("diagnostico", diagnostico) | codificar("tratamiento", tratamiento)
+            if ids:
+                cambiados.append(HistorialMedicoArchivado(pk=pk, codigos=sorted(items[i].codigo for i in ids)))
+                vinculos += len(ids)
+        if not simular:
+            HistorialMedicoArchivado.objects.bulk_update(cambiados, ["codigos"])
+        revisados += len(filas)
+        codificados += len(cambiados)
+    return revisados, codificados, vinculos
@@ -1,31 +1,103 @@
-from django.utils import timezone
-from .models import Cita
-
-def alertas_hoy_maniana(request):
-    if not request.user.is_authenticated:
-        return {"glob_count_hoy": 0, "glob_count_maniana": 0, "glob_count_total": 0}
-
-    now_local = timezone.localtime(timezone.now())
-    hoy = now_local.date()
-    maniana = hoy + timezone.timedelta(days=1)
-
-    # Base queryset según rol
-    qs = Cita.objects.select_related("veterinario", "paciente")
-    if request.user.groups.filter(name="veterinario").exists():
-        vet = getattr(request.user, 'perfil_veterinario', None)
-        qs = qs.filter(veterinario=vet) if vet else qs.none()
-    elif request.user.groups.filter(name="administrativo").exists():
-        pass  # ve todas
-    else:
-        qs = qs.none()
-
-    # Contadores
-    dts = [timezone.localtime(c.fecha_hora).date() for c in qs]
-    cnt_hoy = sum(1 for d in dts if d == hoy)
-    cnt_man = sum(1 for d in dts if d == maniana)
-
-    return {
-        "glob_count_hoy": cnt_hoy,
-        "glob_count_maniana": cnt_man,
-        "glob_count_total": cnt_hoy + cnt_man,
-    }
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from . import replica, sucursales
+from .models import Cita, sucursal_activa_id
+from .sesiones import roles_de, es_administrativo, es_veterinario
+
+# Páginas públicas / estáticas donde la campanita no se muestra
+RUTAS_SIN_CAMPANITA = {"home", "nosotros", "contacto", "login", "agenda_ical"}
+ESPACIOS_SIN_CAMPANITA = {"portal"}
+
+_SIN_ALERTAS = {"glob_count_hoy": 0, "glob_count_maniana": 0, "glob_count_total": 0}
+ALERTAS_TIMEOUT = 60 * 10
+
+
+def roles(request):
+    # Perezoso: las páginas que no muestran el menú no cargan sesión ni usuario
+    return {"roles_usuario": SimpleLazyObject(lambda: roles_de(request.user))}
+
+
+def _sin_campanita(request):
+    if request.path.startswith(settings.STATIC_URL):
+        return True
+    match = getattr(request, "resolver_match", None)
+    return match is not None and (
+        match.url_name in RUTAS_SIN_CAMPANITA or match.namespace in ESPACIOS_SIN_CAMPANITA
+    )
+
+
+def clave_alertas(ambito, fecha=None):
+    """`ambito`: "vet<id>", "s<sucursal_id>" o "todas"."""
+    return f"alertas:{(fecha or timezone.localdate()).isoformat()}:{ambito}"
+
+
+def invalidar_alertas(vet_ids, sucursal_ids):
+    """Una cita cambió: se recuentan su veterinario, su sucursal y el total."""
+    ambitos = [f"vet{v}" for v in vet_ids if v] + [f"s{s}" for s in sucursal_ids if s] + ["todas"]
+    cache.delete_many([clave_alertas(a) for a in ambitos])
+
+
+def _contar_alertas(user):
+    """
+    Citas de hoy y de mañana (hora local) en una sola consulta agregada,
+    cacheada por veterinario o por sucursal (la activa del administrativo).
+    """
+    if es_veterinario(user):
+        vet = getattr(user, 'perfil_veterinario', None)
+        if vet is None:
+            return _SIN_ALERTAS
+        ambito = f"vet{vet.pk}"
+    elif es_administrativo(user):
+        ambito = sucursales.clave()  # la sucursal elegida, o todas
+    else:
+        return _SIN_ALERTAS
+
+    clave = clave_alertas(ambito)
+    conteo = cache.get(clave)
+    if conteo is None:
+        inicio = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        corte = inicio + timedelta(days=1)
+        fin = corte + timedelta(days=1)
+
+        qs = Cita.objects.filter(fecha_hora__gte=inicio, fecha_hora__lt=fin)
+        if ambito.startswith("vet"):
+            qs = qs.filter(veterinario=vet)
+        with replica.en_principal():
+            conteo = qs.aggregate(
+                hoy=Count("id", filter=Q(fecha_hora__lt=corte)),
+                maniana=Count("id", filter=Q(fecha_hora__gte=corte)),
+            )
+        cache.set(clave, conteo, ALERTAS_TIMEOUT)
+    return {
+        "glob_count_hoy": conteo["hoy"],
+        "glob_count_maniana": conteo["maniana"],
+        "glob_count_total": conteo["hoy"] + conteo["maniana"],
+    }
+
+
+def alertas_hoy_maniana(request):
+    if _sin_campanita(request) or not request.user.is_authenticated:
+        return _SIN_ALERTAS
+
+    # La consulta corre solo si el template usa alguno de los contadores
+    conteo = SimpleLazyObject(lambda: _contar_alertas(request.user))
+    return {clave: SimpleLazyObject(lambda clave=clave: conteo[clave]) for clave in _SIN_ALERTAS}
+
+
+def sucursal(request):
+    """Selector de sucursal del menú (solo administrativos; perezoso como el resto)."""
+    def disponibles():
+        if not request.user.is_authenticated or not es_administrativo(request.user):
+            return []
+        return list(sucursales.todas().values())
+
+    return {
+        "sucursales_disponibles": SimpleLazyObject(disponibles),
+        "sucursal_activa_id": SimpleLazyObject(sucursal_activa_id),
+    }
@@ -0,0 +1,117 @@
+"""
+Turnos libres en bloque.
+
+Los horarios libres de cada (veterinario, día) se calculan con una sola
+consulta para todos los veterinarios y días pedidos, y quedan en caché hasta
+que una cita de ese veterinario/día cambia (ver signals.py). Cada
+veterinario pertenece a una sucursal, así que las entradas quedan separadas
+por sucursal y usan su jornada; si cambia la jornada o el veterinario se
+muda, se invalidan los días próximos de sus veterinarios. Lo usan el
+endpoint de slots del personal y el portal de propietarios. Los días de
+una ausencia registrada (AusenciaVeterinario) el veterinario no tiene turnos.
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import sucursales
+from .forms import generar_slots
+from .models import AusenciaVeterinario, Cita, Veterinario
+
+CACHE_TIMEOUT = 60 * 60
+# Días hacia adelante que se invalidan al cambiar la jornada de una sucursal
+DIAS_INVALIDAR = 60
+
+
+def _clave(vet_id, fecha):
+    return f"disponibilidad:{vet_id}:{fecha.isoformat()}"
+
+
+def invalidar(vet_id, fecha):
+    if vet_id and fecha:
+        cache.delete(_clave(vet_id, fecha))
+
+
+def invalidar_veterinarios(vet_ids, dias=DIAS_INVALIDAR):
+    hoy = timezone.localdate()
+    cache.delete_many([_clave(v, hoy + timedelta(days=i)) for v in vet_ids for i in range(dias)])
+
+
+def invalidar_dias(vet_id, desde, hasta):
+    """Todos los días de desde a hasta (inclusive) del veterinario: ausencias."""
+    cache.delete_many([_clave(vet_id, desde + timedelta(days=i)) for i in range((hasta - desde).days + 1)])
+
+
+def ausentes(vet_ids, desde, hasta):
+    """{(vet_id, fecha)} de los días con ausencia entre desde y hasta, en una consulta."""
+    dias = set()
+    filas = AusenciaVeterinario.objects.filter(
+        veterinario_id__in=vet_ids, desde__lte=hasta, hasta__gte=desde,
+    ).values_list("veterinario_id", "desde", "hasta")
+    for vet_id, inicio, fin in filas:
+        dia = max(inicio, desde)
+        while dia <= min(fin, hasta):
+            dias.add((vet_id, dia))
+            dia += timedelta(days=1)
+    return dias
+
+
+def _inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min), timezone.get_current_timezone())
+
+
+def slots_libres(vet_ids, desde, dias=1):
+    """
+    {vet_id: {fecha: ['09:00', '09:30', ...]}} para `dias` días desde `desde`.
+    Solo las citas programadas ocupan turno (las canceladas liberan el horario);
+    un día de ausencia no tiene turnos.
+    """
+    fechas = [desde + timedelta(days=i) for i in range(dias)]
+    claves = {_clave(v, f): (v, f) for v in vet_ids for f in fechas}
+    resultado = {v: {} for v in vet_ids}
+
+    cacheados = cache.get_many(claves)
+    for clave, slots in cacheados.items():
+        v, f = claves[clave]
+        resultado[v][f] = slots
+
+    faltantes = [claves[k] for k in claves if k not in cacheados]
+    if not faltantes:
+        return resultado
+
+    # Una consulta para todo lo que faltó
+    vets = {v for v, _ in faltantes}
+    dias_faltantes = {f for _, f in faltantes}
+    ocupados = {}
+    filas = Cita.todas.filter(
+        veterinario_id__in=vets,
+        estado="programada",
+        fecha_hora__gte=_inicio_del_dia(min(dias_faltantes)),
+        fecha_hora__lt=_inicio_del_dia(max(dias_faltantes) + timedelta(days=1)),
+    ).values_list("veterinario_id", "fecha_hora")
+    for vet_id, fecha_hora in filas:
+        local = timezone.localtime(fecha_hora)
+        ocupados.setdefault((vet_id, local.date()), set()).add(local.strftime("%H:%M"))
+
+    sin_atencion = ausentes(vets, min(dias_faltantes), max(dias_faltantes))
+
+    sucursal_de = dict(Veterinario.todos.filter(pk__in=vets).values_list("pk", "sucursal_id"))
+    nuevos = {}
+    for v, f in faltantes:
+        if (v, f) in sin_atencion:
+            slots = []
+        else:
+            slots = generar_slots(f, ocupados.get((v, f), set()), sucursales.obtener(sucursal_de.get(v)))
+        resultado[v][f] = slots
+        nuevos[_clave(v, f)] = slots
+    cache.set_many(nuevos, CACHE_TIMEOUT)
+    return resultado
+
+
+def slots_futuros(slots, fecha, margen_min=0):
+    """Descarta los horarios de `fecha` que ya pasaron (o empiezan en menos de `margen_min`)."""
+    limite = timezone.localtime(timezone.now()) + timedelta(minutes=margen_min)
+    if fecha != limite.date():
+        return slots if fecha > limite.date() else []
+    return [s for s in slots if s > limite.strftime("%H:%M")]
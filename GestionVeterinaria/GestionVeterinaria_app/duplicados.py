@@ -0,0 +1,217 @@
+"""
+Detección y fusión de propietarios / pacientes duplicados.
+
+En vez de comparar todos contra todos (O(n²)), cada registro se indexa bajo
+unas pocas claves de bloqueo (teléfono normalizado, que ya viene de la
+columna Propietario.telefono_digitos, soundex de apellido+nombre, parte local
+del email...) en un dict armado con un único recorrido de la tabla.
+Solo se puntúan los pares que comparten alguna clave.
+"""
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import agenda_ical, auditoria, cambios
+from .models import Adjunto, Cita, CitaArchivada, HistorialMedico, HistorialMedicoArchivado, ListaEspera, Paciente, Propietario, SubidaAdjunto
+
+UMBRAL = 0.6
+# Bloques más grandes que esto (p.ej. "Gonzalez Juan") no aportan: se descartan.
+MAX_BLOQUE = 50
+DIGITOS_TELEFONO = 8
+
+
+# ------------------------------
+# Normalización
+# ------------------------------
+def normalizar_texto(s):
+    s = unicodedata.normalize("NFKD", s or "")
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.lower().split())
+
+
+_SOUNDEX = {c: str(d) for d, letras in enumerate(["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for c in letras}
+
+
+def soundex(s):
+    letras = [c for c in normalizar_texto(s) if c.isalpha()]
+    if not letras:
+        return ""
+    codigo, previo = letras[0].upper(), _SOUNDEX.get(letras[0], "")
+    for c in letras[1:]:
+        d = _SOUNDEX.get(c, "")
+        if d and d != "0" and d != previo:
+            codigo += d
+        if c not in "hw":
+            previo = d
+    return (codigo + "000")[:4]
+
+
+def _similitud(a, b):
+    a, b = normalizar_texto(a), normalizar_texto(b)
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+# ------------------------------
+# Bloqueo + puntaje
+# ------------------------------
+def _pares_candidatos(filas, claves_de):
+    """filas: dicts con 'id'. claves_de(fila) -> iterable de claves de bloqueo."""
+    indice = defaultdict(list)
+    for fila in filas:
+        for clave in claves_de(fila):
+            if clave:
+                indice[clave].append(fila["id"])
+    pares = set()
+    for ids in indice.values():
+        if 1 < len(ids) <= MAX_BLOQUE:
+            pares.update(combinations(sorted(ids), 2))
+    return pares
+
+
+def _claves_propietario(p):
+    tel = p["telefono_digitos"]
+    local = (p["email"] or "").split("@")[0].lower()
+    return [
+        f"tel:{tel[-DIGITOS_TELEFONO:]}" if len(tel) >= 6 else None,
+        f"nom:{soundex(p['apellido'])}{soundex(p['nombre'])}",
+        f"mail:{local}" if local else None,
+    ]
+
+
+def _puntaje_propietario(a, b):
+    ta, tb = a["telefono_digitos"], b["telefono_digitos"]
+    tel = 1.0 if ta and ta[-DIGITOS_TELEFONO:] == tb[-DIGITOS_TELEFONO:] else 0.0
+    nombre = _similitud(f"{a['apellido']} {a['nombre']}", f"{b['apellido']} {b['nombre']}")
+    return round(
+        0.35 * tel
+        + 0.30 * nombre
+        + 0.20 * _similitud(a["email"], b["email"])
+        + 0.15 * _similitud(a["direccion"], b["direccion"]),
+        3,
+    )
+
+
+def propietarios_duplicados(umbral=UMBRAL):
+    """Lista de (puntaje, propietario_a, propietario_b), de mayor a menor puntaje."""
+    filas = {
+        f["id"]: f
+        for f in Propietario.objects.values("id", "nombre", "apellido", "telefono_digitos", "email", "direccion")
+    }
+    candidatos = []
+    for a, b in _pares_candidatos(filas.values(), _claves_propietario):
+        puntaje = _puntaje_propietario(filas[a], filas[b])
+        if puntaje >= umbral:
+            candidatos.append((puntaje, a, b))
+    return _con_objetos(Propietario, candidatos)
+
+
+def _claves_paciente(p):
+    return [
+        f"nac:{normalizar_texto(p['especie'])}:{p['fecha_nacimiento']}",
+        f"nom:{p['propietario_id']}:{soundex(p['nombre'])}",
+    ]
+
+
+def _puntaje_paciente(a, b):
+    return round(
+        0.40 * _similitud(a["nombre"], b["nombre"])
+        + 0.20 * (a["fecha_nacimiento"] == b["fecha_nacimiento"])
+        + 0.15 * (normalizar_texto(a["especie"]) == normalizar_texto(b["especie"]))
+        + 0.15 * (a["propietario_id"] == b["propietario_id"])
+        + 0.10 * (a["sexo"] == b["sexo"]),
+        3,
+    )
+
+
+def pacientes_duplicados(umbral=UMBRAL):
+    filas = {
+        f["id"]: f
+        for f in Paciente.objects.values("id", "nombre", "especie", "sexo", "fecha_nacimiento", "propietario_id")
+    }
+    candidatos = []
+    for a, b in _pares_candidatos(filas.values(), _claves_paciente):
+        puntaje = _puntaje_paciente(filas[a], filas[b])
+        if puntaje >= umbral:
+            candidatos.append((puntaje, a, b))
+    return _con_objetos(Paciente, candidatos)
+
+
+def _con_objetos(modelo, candidatos):
+    ids = {i for _, a, b in candidatos for i in (a, b)}
+    qs = modelo.objects.filter(pk__in=ids)
+    if modelo is Paciente:
+        qs = qs.select_related("propietario")
+    objetos = qs.in_bulk()
+    return [
+        (puntaje, objetos[a], objetos[b])
+        for puntaje, a, b in sorted(candidatos, key=lambda c: -c[0])
+        if a in objetos and b in objetos
+    ]
+
+
+# ------------------------------
+# Fusión
+# ------------------------------
+@transaction.atomic
+def fusionar_propietarios(conservar_id, duplicado_id):
+    """Pasa los pacientes del duplicado al propietario que se conserva y borra el duplicado."""
+    if conservar_id == duplicado_id:
+        raise ValueError("No se puede fusionar un propietario consigo mismo.")
+    conservar = Propietario.todos.select_for_update().get(pk=conservar_id)
+    duplicado = Propietario.todos.select_for_update().get(pk=duplicado_id)
+
+    paciente_ids = list(Paciente.todos.filter(propietario=duplicado).values_list("pk", flat=True))
+    movidos = Paciente.todos.filter(pk__in=paciente_ids).update(propietario=conservar, version=F("version") + 1)
+    cambios.registrar(Paciente, paciente_ids)
+    auditoria.registrar(Propietario, conservar.pk, "fusion", {"fusionado_desde": [None, duplicado.pk]})
+    duplicado.delete()
+    return movidos
+
+
+@transaction.atomic
+def fusionar_pacientes(conservar_id, duplicado_id):
+    """
+    Re-apunta citas e historial (vivos y archivados), los adjuntos (también
+    las subidas en curso) y los pedidos de lista de espera al paciente que se
+    conserva. Borrar el duplicado no tiene que arrastrar nada por CASCADE.
+    """
+    if conservar_id == duplicado_id:
+        raise ValueError("No se puede fusionar un paciente consigo mismo.")
+    conservar = Paciente.todos.select_for_update().get(pk=conservar_id)
+    duplicado = Paciente.todos.select_for_update().get(pk=duplicado_id)
+
+    citas = list(Cita.todas.filter(paciente=duplicado).values_list("pk", "veterinario_id"))
+    vet_ids = {vet_id for _, vet_id in citas}
+    Cita.todas.filter(pk__in=[pk for pk, _ in citas]).update(
+        paciente=conservar, updated_at=timezone.now(), version=F("version") + 1
+    )
+    historial_ids = list(HistorialMedico.objects.filter(paciente=duplicado).values_list("pk", flat=True))
+    HistorialMedico.objects.filter(pk__in=historial_ids).update(paciente=conservar, version=F("version") + 1)
+    cambios.registrar(Cita, [pk for pk, _ in citas])
+    cambios.registrar(HistorialMedico, historial_ids)
+    CitaArchivada.objects.filter(paciente=duplicado).update(paciente=conservar)
+    HistorialMedicoArchivado.objects.filter(paciente=duplicado).update(paciente=conservar)
+    adjunto_ids = list(Adjunto.objects.filter(paciente=duplicado).values_list("pk", flat=True))
+    Adjunto.objects.filter(pk__in=adjunto_ids).update(paciente=conservar)
+    cambios.registrar(Adjunto, adjunto_ids)
+    SubidaAdjunto.objects.filter(paciente=duplicado).update(paciente=conservar)
+    # Sus pedidos de turno siguen en pie: pasan al que se conserva con su antigüedad
+    ListaEspera.objects.filter(paciente=duplicado).update(paciente=conservar)
+
+    if duplicado.informacion_medica and duplicado.informacion_medica != conservar.informacion_medica:
+        conservar.informacion_medica = "\n".join(
+            x for x in [conservar.informacion_medica, duplicado.informacion_medica] if x
+        )
+        conservar.save(update_fields=["informacion_medica"])
+    auditoria.registrar(Paciente, conservar.pk, "fusion", {"fusionado_desde": [None, duplicado.pk]})
+    duplicado.delete()
+
+    # update() no dispara signals: las agendas afectadas se invalidan a mano
+    transaction.on_commit(lambda: [agenda_ical.invalidar(v) for v in vet_ids])
@@ -0,0 +1,219 @@
+"""
+Expediente clínico exportable de un paciente (HTML y, con reportlab, PDF).
+
+- clave(): huella de todo lo que entra en el expediente (paciente,
+  propietario, citas y atenciones vivas y archivadas, adjuntos, nombre de
+  los veterinarios), en una consulta agregada por tabla sobre el índice de
+  paciente. Cualquier alta, edición (sube la versión), baja o archivado la
+  cambia; los veterinarios no tienen versión y entran con su nombre.
+- El expediente se guarda en EXPEDIENTES_RAIZ/<paciente>/<clave>.<formato>:
+  si ya existe para la clave actual se sirve tal cual. Si no, se arma en
+  segundo plano (archivo.en_segundo_plano) y la pantalla espera; un pedido
+  repetido mientras tanto no lanza otro. Si el armado falla, la falla queda
+  anotada para esa clave por TIEMPO_ERROR y obtener() la informa
+  (ExpedienteFallido) en lugar de relanzarlo en cada pedido.
+- El armado recorre la línea de tiempo por páginas (linea_tiempo.pagina,
+  keyset): nunca carga el historial completo de una vez. El HTML se
+  escribe página por página a un temporal y se publica con os.replace (el
+  PDF lo arma reportlab y lo escribe al final); los expedientes de claves
+  anteriores se borran.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q, Sum
+from django.template.loader import get_template
+from django.utils import timezone
+
+from . import archivo, linea_tiempo
+from .models import Adjunto, Cita, CitaArchivada, HistorialMedico, HistorialMedicoArchivado, Paciente, Veterinario
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+except ImportError:  # opcional: sin reportlab el expediente sale solo en HTML
+    canvas = None
+
+# Subirlo cuando cambie el formato del expediente: invalida los ya generados
+FORMATO = 1
+FORMATOS = {"html": "text/html; charset=utf-8", "pdf": "application/pdf"}
+PAGINA = linea_tiempo.LIMITE_MAXIMO
+# Tiempo máximo de un armado: después se puede volver a lanzar
+TIEMPO_ARMADO = 10 * 60
+# Tras una falla no se reintenta la misma clave hasta que pase este tiempo
+TIEMPO_ERROR = 10 * 60
+
+
+class ExpedienteFallido(Exception):
+    """El último armado para la clave actual falló: no se relanza hasta TIEMPO_ERROR."""
+
+
+def pdf_disponible():
+    return canvas is not None
+
+
+def clave(paciente):
+    """Huella del expediente: cambia con cualquier cambio del historial del paciente."""
+    pid = paciente.pk
+    partes = [FORMATO, paciente.version, paciente.propietario.version]
+    for qs in (Cita.todas.filter(paciente_id=pid), HistorialMedico.objects.filter(paciente_id=pid)):
+        partes.extend(qs.aggregate(n=Count("pk"), v=Sum("version"), m=Max("pk")).values())
+    consultas = [Adjunto.objects.filter(paciente_id=pid)]
+    if archivo.necesita_archivo():
+        consultas += [CitaArchivada.objects.filter(paciente_id=pid), HistorialMedicoArchivado.objects.filter(paciente_id=pid)]
+    for qs in consultas:
+        partes.extend(qs.aggregate(n=Count("pk"), m=Max("pk")).values())
+    # Un cambio de nombre del veterinario no sube la versión de sus citas
+    atendieron = Q(pk__in=Cita.todas.filter(paciente_id=pid).values("veterinario_id"))
+    if archivo.necesita_archivo():
+        atendieron |= Q(pk__in=CitaArchivada.objects.filter(paciente_id=pid).values("veterinario_id"))
+    partes.extend(Veterinario.todos.filter(atendieron).order_by("pk").values_list("pk", "nombre", "apellido"))
+    return hashlib.sha1(repr(partes).encode()).hexdigest()[:20]
+
+
+def ruta(paciente_id, huella, formato):
+    return Path(settings.EXPEDIENTES_RAIZ) / str(paciente_id) / f"{huella}.{formato}"
+
+
+def _clave_error(paciente_id, huella):
+    return f"expediente:error:{paciente_id}:{huella}"
+
+
+def obtener(paciente, formato):
+    """
+    (ruta, huella) del expediente ya armado, o (None, huella) si se está
+    armando (lo lanza si no había uno en curso). ExpedienteFallido si el
+    último armado de esta clave falló.
+    """
+    huella = clave(paciente)
+    camino = ruta(paciente.pk, huella, formato)
+    if camino.exists():
+        return camino, huella
+    if cache.get(_clave_error(paciente.pk, huella)):
+        raise ExpedienteFallido(huella)
+    if cache.add(f"expediente:armando:{paciente.pk}:{huella}", True, TIEMPO_ARMADO):
+        archivo.en_segundo_plano(armar, paciente.pk, huella)
+    return None, huella
+
+
+# ------------------------------
+# Armado
+# ------------------------------
+def _paginas(paciente_id):
+    """Listas de eventos de la línea de tiempo, de a PAGINA, con sus adjuntos."""
+    cursor = None
+    while True:
+        eventos, cursor = linea_tiempo.pagina(paciente_id, cursor, PAGINA)
+        historiales = {
+            h.pk for h in (e.atencion if e.tipo == "cita" else e.objeto for e in eventos) if h is not None
+        }
+        por_historial = {}
+        for a in Adjunto.objects.filter(historial_id__in=historiales).order_by("subido_en"):
+            por_historial.setdefault(a.historial_id, []).append(a.nombre)
+        for e in eventos:
+            h = e.atencion if e.tipo == "cita" else e.objeto
+            e.adjuntos = por_historial.get(h.pk, []) if h is not None else []
+        yield eventos
+        if cursor is None:
+            return
+
+
+def armar(paciente_id, huella):
+    """Escribe los formatos disponibles del expediente y borra los de claves anteriores."""
+    try:
+        paciente = Paciente.todos.select_related("propietario").get(pk=paciente_id)
+        contexto = {"paciente": paciente, "propietario": paciente.propietario, "generado": timezone.now()}
+        _publicar(ruta(paciente_id, huella, "html"), _escribir_html, paciente_id, contexto)
+        if pdf_disponible():
+            _publicar(ruta(paciente_id, huella, "pdf"), _escribir_pdf, paciente_id, contexto)
+    except Exception:
+        # Antes de soltar el candado: el próximo pedido ve la falla y no relanza
+        cache.set(_clave_error(paciente_id, huella), True, TIEMPO_ERROR)
+        raise
+    finally:
+        cache.delete(f"expediente:armando:{paciente_id}:{huella}")
+    # Solo los anteriores a este: un armado más nuevo pudo terminar antes
+    nuevo = ruta(paciente_id, huella, "html")
+    for viejo in nuevo.parent.iterdir():
+        if viejo.stem != huella and not viejo.name.endswith(".tmp") and viejo.stat().st_mtime < nuevo.stat().st_mtime:
+            viejo.unlink(missing_ok=True)
+
+
+def _publicar(destino, escribir, paciente_id, contexto):
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    try:
+        escribir(temporal, paciente_id, contexto)
+        os.replace(temporal, destino)
+    finally:
+        temporal.unlink(missing_ok=True)
+
+
+def _escribir_html(temporal, paciente_id, contexto):
+    cuerpo = get_template("GestionVeterinaria_app/expediente/eventos.html")
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(get_template("GestionVeterinaria_app/expediente/cabecera.html").render(contexto))
+        for eventos in _paginas(paciente_id):
+            f.write(cuerpo.render({"eventos": eventos}))
+        f.write(get_template("GestionVeterinaria_app/expediente/pie.html").render(contexto))
+
+
+# ------------------------------
+# PDF (reportlab)
+# ------------------------------
+def _lineas(contexto, paciente_id):
+    """(estilo, texto) del expediente, en orden; el estilo es una clave de ESTILOS_PDF."""
+    p, d = contexto["paciente"], contexto["propietario"]
+    yield "titulo", f"Expediente clínico · {p.nombre} {p.apellido}"
+    yield "texto", f"Generado el {timezone.localtime(contexto['generado']):%d/%m/%Y %H:%M}"
+    yield "seccion", "Paciente"
+    yield "texto", f"Especie: {p.especie}{f' / {p.raza}' if p.raza else ''} · Sexo: {p.get_sexo_display()}"
+    yield "texto", f"Fecha de nacimiento: {p.fecha_nacimiento:%d/%m/%Y}"
+    if p.informacion_medica:
+        yield "texto", f"Información médica: {p.informacion_medica}"
+    yield "seccion", "Propietario"
+    yield "texto", f"{d.nombre} {d.apellido} · {d.telefono} · {d.email}"
+    yield "texto", d.direccion
+    yield "seccion", "Historia clínica"
+    for eventos in _paginas(paciente_id):
+        for e in eventos:
+            fecha = f"{timezone.localtime(e.fecha):%d/%m/%Y %H:%M}"
+            if e.tipo == "cita":
+                vet = f"{e.veterinario.nombre} {e.veterinario.apellido}" if e.veterinario else "—"
+                yield "subtitulo", f"{fecha} · Cita ({e.objeto.get_estado_display()}) con {vet}"
+            else:
+                yield "subtitulo", f"{fecha} · Consulta"
+            h = e.atencion if e.tipo == "cita" else e.objeto
+            if h is not None:
+                yield "texto", f"Diagnóstico: {h.diagnostico}"
+                yield "texto", f"Tratamiento: {h.tratamiento}"
+                if h.nota_veterinaria:
+                    yield "texto", f"Nota: {h.nota_veterinaria}"
+            if e.adjuntos:
+                yield "texto", f"Adjuntos: {', '.join(e.adjuntos)}"
+
+
+ESTILOS_PDF = {"titulo": ("Helvetica-Bold", 16, 10), "seccion": ("Helvetica-Bold", 12, 8),
+               "subtitulo": ("Helvetica-Bold", 10, 6), "texto": ("Helvetica", 10, 0)}
+
+
+def _escribir_pdf(temporal, paciente_id, contexto):
+    ancho, alto = A4
+    margen = 50
+    lienzo = canvas.Canvas(str(temporal), pagesize=A4)
+    y = alto - margen
+    for estilo, texto in _lineas(contexto, paciente_id):
+        fuente, tamanio, antes = ESTILOS_PDF[estilo]
+        y -= antes
+        for renglon in simpleSplit(texto, fuente, tamanio, ancho - 2 * margen) or [""]:
+            if y < margen + tamanio:
+                lienzo.showPage()
+                y = alto - margen
+            lienzo.setFont(fuente, tamanio)
+            lienzo.drawString(margen, y - tamanio, renglon)
+            y -= tamanio * 1.4
+    lienzo.save()
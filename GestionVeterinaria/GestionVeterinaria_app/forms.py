@@ -1,197 +1,289 @@
-from django import forms
-from .models import *
-from datetime import timedelta, time, datetime
-from django.utils import timezone
-
-
-class PacienteForm(forms.ModelForm):
-    class Meta:
-        model = Paciente
-        fields = ['nombre', 'apellido', 'especie', 'raza', 'sexo', 'fecha_nacimiento', 'informacion_medica', 'propietario']
-    
-    propietario = forms.ModelChoiceField(queryset=Propietario.objects.all(), empty_label="Seleccione un propietario", required=True)
-
-class PropietarioForm(forms.ModelForm):
-    class Meta:
-        model = Propietario
-        fields = ['nombre', 'apellido', 'direccion', 'telefono', 'email']
-
-JORNADA_INICIO = time(9, 0)
-JORNADA_FIN = time(18, 0)
-INTERVALO_MIN = 30
-
-def generar_slots(fecha, ocupados_set):
-    """
-    Genera lista de strings 'HH:MM' cada 30' entre 09:00 y 18:00, 
-    excluyendo los que ya están ocupados (conjunto de strings 'HH:MM').
-    """
-    slots = []
-    dt = datetime.combine(fecha, JORNADA_INICIO)
-    fin = datetime.combine(fecha, JORNADA_FIN)
-    while dt <= fin - timedelta(minutes=INTERVALO_MIN):
-        s = dt.strftime("%H:%M")
-        if s not in ocupados_set:
-            slots.append(s)
-        dt += timedelta(minutes=INTERVALO_MIN)
-    return slots
-
-
-class CitaForm(forms.ModelForm):
-    # Campos visibles
-    fecha = forms.DateField(
-        label="Fecha",
-        widget=forms.DateInput(attrs={"type": "date"}),
-        required=True,
-    )
-    hora_slot = forms.ChoiceField(
-        label="Horario disponible",
-        choices=[],
-        required=True,
-    )
-
-    # Dropdowns
-    veterinario = forms.ModelChoiceField(
-        queryset=Veterinario.objects.all(),
-        empty_label="Seleccione un Veterinario",
-        required=True,
-    )
-    paciente = forms.ModelChoiceField(
-        queryset=Paciente.objects.all(),
-        empty_label="Seleccione un Paciente",
-        required=True,
-    )
-    administrativo = forms.ModelChoiceField(
-        queryset=Administrativo.objects.all(),
-        empty_label="Seleccione un Administrativo",
-        required=True,
-    )
-
-    # El DateTime final (se arma en clean)
-    fecha_hora = forms.DateTimeField(widget=forms.HiddenInput(), required=False)
-
-    class Meta:
-        model = Cita
-        fields = ["fecha_hora", "veterinario", "paciente", "administrativo"]
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        vet = None
-        fecha_sel = None
-
-        # Desde initial (cuando abrís el form)
-        initial = kwargs.get("initial") or {}
-        vet = initial.get("veterinario") or vet
-        fecha_sel = initial.get("fecha") or fecha_sel
-
-        # Si es POST, priorizamos lo que viene del form
-        if self.is_bound:
-            try:
-                vet_id = int(self.data.get("veterinario") or 0)
-                vet = Veterinario.objects.filter(id=vet_id).first() or vet
-            except (TypeError, ValueError):
-                pass
-
-            fecha_str = self.data.get("fecha")
-            if fecha_str:
-                try:
-                    fecha_sel = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-                except ValueError:
-                    fecha_sel = None
-
-        # Si es edición (instance) y no vino nada arriba
-        if (not vet or not fecha_sel) and self.instance and self.instance.pk:
-            vet = vet or self.instance.veterinario
-            fecha_sel = fecha_sel or timezone.localtime(self.instance.fecha_hora).date()
-
-        # Cargar choices de horas
-        if vet and fecha_sel:
-            # ventana del día
-            desde = datetime.combine(fecha_sel, time(0, 0))
-            hasta = datetime.combine(fecha_sel, time(23, 59))
-            if timezone.is_naive(desde):
-                tz = timezone.get_current_timezone()
-                desde = timezone.make_aware(desde, tz)
-                hasta = timezone.make_aware(hasta, tz)
-
-            # Turnos ocupados SOLO de citas programadas
-            ocupadas = (
-                Cita.objects.filter(
-                    veterinario=vet,
-                    estado="programada",
-                    fecha_hora__range=(desde, hasta),
-                )
-                .values_list("fecha_hora", flat=True)
-            )
-            ocupados_set = {timezone.localtime(dt).strftime("%H:%M") for dt in ocupadas}
-
-            disponibles = generar_slots(fecha_sel, ocupados_set)
-            self.fields["hora_slot"].choices = [("", "Seleccione un horario")] + [(h, h) for h in disponibles]
-
-            # Si estamos editando, preseleccionar el horario actual si aplica
-            if self.instance and self.instance.pk:
-                actual_hhmm = timezone.localtime(self.instance.fecha_hora).strftime("%H:%M")
-                # Si el actual estaba ocupado "por nosotros", igual mostrémoslo
-                if (actual_hhmm not in [c[0] for c in self.fields["hora_slot"].choices]):
-                    self.fields["hora_slot"].choices.append((actual_hhmm, actual_hhmm))
-                self.fields["hora_slot"].initial = actual_hhmm
-                self.fields["fecha"].initial = fecha_sel
-                self.fields["veterinario"].initial = vet
-        else:
-            self.fields["hora_slot"].choices = [("", "Seleccione un horario")]
-
-    def clean(self):
-        cleaned = super().clean()
-
-        fecha = cleaned.get("fecha")
-        slot = cleaned.get("hora_slot")
-        vet = cleaned.get("veterinario")
-
-        if not fecha or not slot or not vet:
-            # faltan datos básicos
-            return cleaned
-
-        # Parsear HH:MM
-        try:
-            hh, mm = map(int, slot.split(":"))
-        except Exception:
-            raise ValidationError("Horario inválido.")
-
-        # Validar rango laboral (inicio <= hora < fin, en pasos de 30')
-        inicio_dt = datetime.combine(fecha, JORNADA_INICIO)
-        fin_dt = datetime.combine(fecha, JORNADA_FIN) - timedelta(minutes=INTERVALO_MIN)
-        dt_local = datetime.combine(fecha, time(hh, mm))
-
-        if dt_local < inicio_dt or dt_local > fin_dt:
-            raise ValidationError("Horario fuera de la jornada laboral (09:00–18:00).")
-
-        # Asegurar tz-aware
-        if timezone.is_naive(dt_local):
-            dt_local = timezone.make_aware(dt_local, timezone.get_current_timezone())
-
-        # Chequear conflicto: solo citas programadas, y excluirse si es edición
-        qs = Cita.objects.filter(
-            veterinario=vet,
-            fecha_hora=dt_local,
-            estado="programada",
-        )
-        if self.instance and self.instance.pk:
-            qs = qs.exclude(pk=self.instance.pk)
-
-        if qs.exists():
-            raise ValidationError("Ese horario ya está ocupado para el veterinario seleccionado.")
-
-        cleaned["fecha_hora"] = dt_local
-        return cleaned
-
-
-
-class HistorialAtencionForm(forms.ModelForm):
-    class Meta:
-        model = HistorialMedico
-        fields = ["diagnostico", "tratamiento", "nota_veterinaria"]
-        widgets = {
-            "diagnostico": forms.Textarea(attrs={"rows": 3}),
-            "tratamiento": forms.Textarea(attrs={"rows": 3}),
-            "nota_veterinaria": forms.Textarea(attrs={"rows": 3}),
-        }
+from django import forms
+from django.core.exceptions import ValidationError
+from .models import *
+from datetime import timedelta, time, datetime
+from django.utils import timezone
+
+from . import sucursales
+
+
+class VersionadoForm(forms.ModelForm):
+    """
+    Lleva la versión leída en un campo oculto y la devuelve a la instancia
+    antes de guardar: si otro guardó en el medio, save() levanta ConflictoVersion.
+    """
+    version = forms.IntegerField(widget=forms.HiddenInput(), required=False, min_value=1)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["version"].initial = self.instance.version
+
+    def clean(self):
+        cleaned = super().clean()
+        if self.instance.pk and cleaned.get("version"):
+            self.instance.version = cleaned["version"]
+        return cleaned
+
+
+class PacienteForm(VersionadoForm):
+    class Meta:
+        model = Paciente
+        fields = ['nombre', 'apellido', 'especie', 'raza', 'sexo', 'fecha_nacimiento', 'informacion_medica', 'propietario']
+    
+    propietario = forms.ModelChoiceField(queryset=Propietario.objects.all(), empty_label="Seleccione un propietario", required=True)
+
+class PropietarioForm(VersionadoForm):
+    class Meta:
+        model = Propietario
+        fields = ['nombre', 'apellido', 'direccion', 'telefono', 'email']
+
+JORNADA_INICIO = time(9, 0)
+JORNADA_FIN = time(18, 0)
+INTERVALO_MIN = 30
+
+def jornada(sucursal=None):
+    """(inicio, fin, intervalo_min) de la sucursal; sin sucursal, la jornada por defecto."""
+    if sucursal is None:
+        return JORNADA_INICIO, JORNADA_FIN, INTERVALO_MIN
+    return sucursal.jornada_inicio, sucursal.jornada_fin, sucursal.intervalo_min
+
+
+def generar_slots(fecha, ocupados_set, sucursal=None):
+    """
+    Genera lista de strings 'HH:MM' cada 30' entre 09:00 y 18:00 (o según la
+    jornada de la sucursal), excluyendo los que ya están ocupados (conjunto
+    de strings 'HH:MM').
+    """
+    inicio, fin, intervalo = jornada(sucursal)
+    slots = []
+    dt = datetime.combine(fecha, inicio)
+    ultimo = datetime.combine(fecha, fin) - timedelta(minutes=intervalo)
+    while dt <= ultimo:
+        s = dt.strftime("%H:%M")
+        if s not in ocupados_set:
+            slots.append(s)
+        dt += timedelta(minutes=intervalo)
+    return slots
+
+
+class CitaForm(VersionadoForm):
+    # Campos visibles
+    fecha = forms.DateField(
+        label="Fecha",
+        widget=forms.DateInput(attrs={"type": "date"}),
+        required=True,
+    )
+    hora_slot = forms.ChoiceField(
+        label="Horario disponible",
+        choices=[],
+        required=True,
+    )
+
+    # Dropdowns
+    veterinario = forms.ModelChoiceField(
+        queryset=Veterinario.objects.all(),
+        empty_label="Seleccione un Veterinario",
+        required=True,
+    )
+    paciente = forms.ModelChoiceField(
+        queryset=Paciente.objects.all(),
+        empty_label="Seleccione un Paciente",
+        required=True,
+    )
+    administrativo = forms.ModelChoiceField(
+        queryset=Administrativo.objects.all(),
+        empty_label="Seleccione un Administrativo",
+        required=True,
+    )
+
+    # El DateTime final (se arma en clean)
+    fecha_hora = forms.DateTimeField(widget=forms.HiddenInput(), required=False)
+
+    class Meta:
+        model = Cita
+        fields = ["fecha_hora", "veterinario", "paciente", "administrativo"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Los querysets se arman por request: así quedan limitados a la sucursal activa
+        self.fields["veterinario"].queryset = Veterinario.objects.all()
+        self.fields["administrativo"].queryset = Administrativo.objects.all()
+
+        vet = None
+        fecha_sel = None
+
+        # Desde initial (cuando abrís el form)
+        initial = kwargs.get("initial") or {}
+        vet = initial.get("veterinario") or vet
+        fecha_sel = initial.get("fecha") or fecha_sel
+
+        # Si es POST, priorizamos lo que viene del form
+        if self.is_bound:
+            try:
+                vet_id = int(self.data.get("veterinario") or 0)
+                vet = Veterinario.objects.filter(id=vet_id).first() or vet
+            except (TypeError, ValueError):
+                pass
+
+            fecha_str = self.data.get("fecha")
+            if fecha_str:
+                try:
+                    fecha_sel = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+                except ValueError:
+                    fecha_sel = None
+
+        # Si es edición (instance) y no vino nada arriba
+        if (not vet or not fecha_sel) and self.instance and self.instance.pk:
+            vet = vet or self.instance.veterinario
+            fecha_sel = fecha_sel or timezone.localtime(self.instance.fecha_hora).date()
+
+        # Cargar choices de horas
+        if vet and fecha_sel:
+            # ventana del día
+            desde = datetime.combine(fecha_sel, time(0, 0))
+            hasta = datetime.combine(fecha_sel, time(23, 59))
+            if timezone.is_naive(desde):
+                tz = timezone.get_current_timezone()
+                desde = timezone.make_aware(desde, tz)
+                hasta = timezone.make_aware(hasta, tz)
+
+            # Turnos ocupados SOLO de citas programadas
+            ocupadas = (
+                Cita.objects.filter(
+                    veterinario=vet,
+                    estado="programada",
+                    fecha_hora__range=(desde, hasta),
+                )
+                .values_list("fecha_hora", flat=True)
+            )
+            ocupados_set = {timezone.localtime(dt).strftime("%H:%M") for dt in ocupadas}
+
+            disponibles = generar_slots(fecha_sel, ocupados_set, sucursales.obtener(vet.sucursal_id))
+            self.fields["hora_slot"].choices = [("", "Seleccione un horario")] + [(h, h) for h in disponibles]
+
+            # Si estamos editando, preseleccionar el horario actual si aplica
+            if self.instance and self.instance.pk:
+                actual_hhmm = timezone.localtime(self.instance.fecha_hora).strftime("%H:%M")
+                # Si el actual estaba ocupado "por nosotros", igual mostrémoslo
+                if (actual_hhmm not in [c[0] for c in self.fields["hora_slot"].choices]):
+                    self.fields["hora_slot"].choices.append((actual_hhmm, actual_hhmm))
+                self.fields["hora_slot"].initial = actual_hhmm
+                self.fields["fecha"].initial = fecha_sel
+                self.fields["veterinario"].initial = vet
+        else:
+            self.fields["hora_slot"].choices = [("", "Seleccione un horario")]
+
+    def clean(self):
+        cleaned = super().clean()
+
+        fecha = cleaned.get("fecha")
+        slot = cleaned.get("hora_slot")
+        vet = cleaned.get("veterinario")
+
+        if not fecha or not slot or not vet:
+            # faltan datos básicos
+            return cleaned
+
+        # Parsear HH:MM
+        try:
+            hh, mm = map(int, slot.split(":"))
+        except Exception:
+            raise ValidationError("Horario inválido.")
+
+        # Validar rango laboral (inicio <= hora < fin) según la jornada de la sucursal del veterinario
+        inicio, fin, intervalo = jornada(sucursales.obtener(vet.sucursal_id))
+        inicio_dt = datetime.combine(fecha, inicio)
+        fin_dt = datetime.combine(fecha, fin) - timedelta(minutes=intervalo)
+        dt_local = datetime.combine(fecha, time(hh, mm))
+
+        if dt_local < inicio_dt or dt_local > fin_dt:
+            raise ValidationError(f"Horario fuera de la jornada laboral ({inicio:%H:%M}–{fin:%H:%M}).")
+
+        # Asegurar tz-aware
+        if timezone.is_naive(dt_local):
+            dt_local = timezone.make_aware(dt_local, timezone.get_current_timezone())
+
+        # Chequear conflicto: solo citas programadas, y excluirse si es edición
+        qs = Cita.objects.filter(
+            veterinario=vet,
+            fecha_hora=dt_local,
+            estado="programada",
+        )
+        if self.instance and self.instance.pk:
+            qs = qs.exclude(pk=self.instance.pk)
+
+        if qs.exists():
+            raise ValidationError("Ese horario ya está ocupado para el veterinario seleccionado.")
+
+        # Ausencia registrada (solo si cambia el veterinario o el día: editar otra cosa de la cita sigue valiendo)
+        original = self.instance.pk and (self.instance.veterinario_id, timezone.localtime(self.instance.fecha_hora).date())
+        if original != (vet.pk, fecha) and AusenciaVeterinario.objects.filter(
+            veterinario=vet, desde__lte=fecha, hasta__gte=fecha,
+        ).exists():
+            raise ValidationError("El veterinario no atiende ese día (ausencia registrada).")
+
+        cleaned["fecha_hora"] = dt_local
+        return cleaned
+
+
+class AusenciaForm(forms.ModelForm):
+    class Meta:
+        model = AusenciaVeterinario
+        fields = ["veterinario", "desde", "hasta", "motivo"]
+        widgets = {
+            "desde": forms.DateInput(attrs={"type": "date"}),
+            "hasta": forms.DateInput(attrs={"type": "date"}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Limitado a la sucursal activa, como en CitaForm
+        self.fields["veterinario"].queryset = Veterinario.objects.all()
+
+    def clean(self):
+        cleaned = super().clean()
+        desde, hasta = cleaned.get("desde"), cleaned.get("hasta")
+        if desde and hasta and hasta < desde:
+            raise ValidationError("La fecha de fin no puede ser anterior a la de inicio.")
+        return cleaned
+
+
+class CatalogoWidget(forms.SelectMultiple):
+    """
+    Select múltiple que solo renderiza los códigos elegidos: el resto del
+    catálogo llega por autocompletado (api_catalogo + js/catalogo.js).
+    """
+
+    def __init__(self, tipo, attrs=None):
+        super().__init__(attrs={"class": "catalogo", "data-tipo": tipo, **(attrs or {})})
+
+    def optgroups(self, name, value, attrs=None):
+        ids = [v for v in value if str(v).isdigit()]
+        self.choices = [(c.pk, str(c)) for c in CodigoClinico.objects.filter(pk__in=ids).order_by("nombre")]
+        return super().optgroups(name, value, attrs)
+
+
+class HistorialAtencionForm(VersionadoForm):
+    diagnosticos = forms.ModelMultipleChoiceField(
+        label="Diagnósticos codificados",
+        queryset=CodigoClinico.objects.filter(tipo="diagnostico", activo=True),
+        widget=CatalogoWidget("diagnostico"),
+        required=False,
+    )
+    tratamientos = forms.ModelMultipleChoiceField(
+        label="Tratamientos codificados",
+        queryset=CodigoClinico.objects.filter(tipo="tratamiento", activo=True),
+        widget=CatalogoWidget("tratamiento"),
+        required=False,
+    )
+
+    class Meta:
+        model = HistorialMedico
+        fields = ["diagnostico", "diagnosticos", "tratamiento", "tratamientos", "nota_veterinaria"]
+        widgets = {
+            "diagnostico": forms.Textarea(attrs={"rows": 3}),
+            "tratamiento": forms.Textarea(attrs={"rows": 3}),
+            "nota_veterinaria": forms.Textarea(attrs={"rows": 3}),
+        }
@@ -0,0 +1,24 @@
+"""
+Política de hashing de contraseñas.
+
+Los puestos de recepción (kioscos compartidos) hacen login/logout todo el día,
+y el PBKDF2 por defecto de Django 5.2 (1.000.000 iteraciones) cuesta del orden
+de un segundo de CPU por login. Política:
+
+- Algoritmo: PBKDF2-SHA256, el mismo identificador "pbkdf2_sha256" que Django,
+  así que los hashes existentes se siguen verificando sin migración.
+- Iteraciones: settings.PBKDF2_ITERACIONES (por defecto 600.000, el mínimo que
+  recomienda OWASP para PBKDF2-SHA256). Nunca menos de ITERACIONES_MINIMAS.
+- Al loguearse, un hash con otra cantidad de iteraciones se re-encripta con la
+  política vigente (must_update de Django).
+
+`python manage.py bench_login` mide el costo real con cada hasher configurado.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+ITERACIONES_MINIMAS = 310_000
+
+
+class PBKDF2KioscoPasswordHasher(PBKDF2PasswordHasher):
+    iterations = max(getattr(settings, "PBKDF2_ITERACIONES", 600_000), ITERACIONES_MINIMAS)
@@ -0,0 +1,193 @@
+"""
+Línea de tiempo de un paciente: citas (con su atención) e historiales
+sueltos en un solo flujo, del más reciente al más antiguo.
+
+- Fuentes: citas vivas (con la atención por LEFT JOIN, vía
+  HistorialMedico.cita), historiales sin cita y, si hay archivo histórico,
+  CitaArchivada / HistorialMedicoArchivado. Cada fuente es una consulta
+  ordenada por (fecha, id) sobre su índice (paciente, fecha) y se mezclan
+  con heapq.merge: nunca se carga el historial completo, solo `limite + 1`
+  filas por fuente.
+- Paginación por cursor (keyset): el cursor es la clave (fecha, tipo, id)
+  del último elemento entregado, y cada fuente sigue desde ahí. Estable
+  aunque entren citas nuevas mientras se pagina.
+- Un paciente se atiende en cualquier sucursal: se leen todas (Cita.todas).
+"""
+import base64
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db.models import Exists, OuterRef, Q
+
+from . import archivo
+from .models import Cita, CitaArchivada, HistorialMedico, HistorialMedicoArchivado, Veterinario
+
+LIMITE = 20
+LIMITE_MAXIMO = 100
+
+# Desempate entre tipos con la misma fecha (orden descendente: la cita primero)
+RANGO = {"historial": 0, "cita": 1}
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+@dataclass
+class Evento:
+    tipo: str  # "cita" | "historial"
+    fecha: datetime
+    id: int
+    objeto: object
+    atencion: object = None  # solo citas: su HistorialMedico(Archivado), si la atendieron
+    veterinario: object = None  # solo citas
+    archivado: bool = False
+
+    @property
+    def clave(self):
+        return (self.fecha, RANGO[self.tipo], self.id)
+
+
+# ------------------------------
+# Cursor
+# ------------------------------
+def codificar_cursor(evento):
+    texto = f"{evento.fecha.isoformat()}|{evento.tipo}|{evento.id}"
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        fecha, tipo, pk = texto.split("|")
+        return datetime.fromisoformat(fecha), RANGO[tipo], int(pk)
+    except (ValueError, KeyError, UnicodeDecodeError) as exc:
+        raise CursorInvalido("Cursor inválido.") from exc
+
+
+def _despues_de(campo_fecha, rango, cursor):
+    """Filas de una fuente de tipo `rango` que van después del cursor (orden descendente)."""
+    if cursor is None:
+        return Q()
+    fecha, rango_cursor, pk = cursor
+    if rango < rango_cursor:
+        return Q(**{f"{campo_fecha}__lte": fecha})
+    if rango > rango_cursor:
+        return Q(**{f"{campo_fecha}__lt": fecha})
+    return Q(**{f"{campo_fecha}__lt": fecha}) | Q(**{campo_fecha: fecha, "pk__lt": pk})
+
+
+# ------------------------------
+# Fuentes
+# ------------------------------
+def _fuente(qs, campo_fecha, tipo, cursor, limite, **extra):
+    qs = qs.filter(_despues_de(campo_fecha, RANGO[tipo], cursor)).order_by(f"-{campo_fecha}", "-pk")[:limite]
+    for objeto in qs:
+        evento = Evento(tipo, getattr(objeto, campo_fecha), objeto.pk, objeto, **extra)
+        if tipo == "cita" and not evento.archivado:
+            evento.atencion = getattr(objeto, "atencion", None)
+            evento.veterinario = objeto.veterinario
+        yield evento
+
+
+def _fuentes(paciente_id, cursor, limite):
+    fuentes = [
+        _fuente(
+            Cita.todas.filter(paciente_id=paciente_id).select_related("veterinario", "sucursal", "atencion"),
+            "fecha_hora", "cita", cursor, limite,
+        ),
+        _fuente(
+            HistorialMedico.objects.filter(paciente_id=paciente_id, cita__isnull=True),
+            "fecha_consulta", "historial", cursor, limite,
+        ),
+    ]
+    if archivo.necesita_archivo():
+        fuentes.append(_fuente(
+            CitaArchivada.objects.filter(paciente_id=paciente_id).select_related("sucursal"),
+            "fecha_hora", "cita", cursor, limite, archivado=True,
+        ))
+        # Las atenciones archivadas se muestran con su cita; acá van solo las sueltas
+        fuentes.append(_fuente(
+            HistorialMedicoArchivado.objects.filter(paciente_id=paciente_id).filter(
+                Q(cita_id__isnull=True)
+                | (~Exists(Cita.todas.filter(pk=OuterRef("cita_id")))
+                   & ~Exists(CitaArchivada.objects.filter(pk=OuterRef("cita_id"))))
+            ),
+            "fecha_consulta", "historial", cursor, limite, archivado=True,
+        ))
+    return fuentes
+
+
+def _completar(eventos):
+    """
+    Lo que las citas archivadas no traen por JOIN, en una consulta por página:
+    las atenciones ya archivadas y los veterinarios (sin FK real en el
+    archivo: un JOIN descartaría las citas de veterinarios borrados).
+    """
+    citas = [e for e in eventos if e.tipo == "cita"]
+    sin_atencion = {e.id: e for e in citas if e.atencion is None}
+    if sin_atencion and archivo.necesita_archivo():
+        for h in HistorialMedicoArchivado.objects.filter(cita_id__in=sin_atencion):
+            sin_atencion[h.cita_id].atencion = h
+
+    archivadas = [e for e in citas if e.archivado]
+    if archivadas:
+        vets = Veterinario.todos.in_bulk({e.objeto.veterinario_id for e in archivadas})
+        for e in archivadas:
+            e.veterinario = vets.get(e.objeto.veterinario_id)
+
+
+def pagina(paciente_id, cursor=None, limite=LIMITE):
+    """
+    (eventos, cursor_siguiente) de la línea de tiempo del paciente.
+    `cursor` es el que devolvió la página anterior (None = desde el principio);
+    cursor_siguiente es None en la última página.
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    clave_cursor = decodificar_cursor(cursor) if cursor else None
+
+    mezcla = heapq.merge(*_fuentes(paciente_id, clave_cursor, limite + 1), key=lambda e: e.clave, reverse=True)
+    eventos = []
+    for evento in mezcla:
+        eventos.append(evento)
+        if len(eventos) > limite:
+            break
+
+    siguiente = None
+    if len(eventos) > limite:
+        eventos = eventos[:limite]
+        siguiente = codificar_cursor(eventos[-1])
+    _completar(eventos)
+    return eventos, siguiente
+
+
+def serializar(evento):
+    """Evento como dict JSON para la API."""
+    datos = {
+        "tipo": evento.tipo,
+        "id": evento.id,
+        "fecha": evento.fecha.isoformat(),
+        "archivado": evento.archivado,
+    }
+    o = evento.objeto
+    if evento.tipo == "cita":
+        datos.update({
+            "estado": o.estado,
+            "veterinario": f"{evento.veterinario.nombre} {evento.veterinario.apellido}" if evento.veterinario else None,
+            "sucursal": o.sucursal.nombre if o.sucursal else None,
+            "atencion": _serializar_historial(evento.atencion) if evento.atencion else None,
+        })
+    else:
+        datos.update(_serializar_historial(o))
+    return datos
+
+
+def _serializar_historial(h):
+    return {
+        "id": h.pk,
+        "fecha_consulta": h.fecha_consulta.isoformat(),
+        "diagnostico": h.diagnostico,
+        "tratamiento": h.tratamiento,
+        "nota_veterinaria": h.nota_veterinaria or "",
+    }
@@ -0,0 +1,242 @@
+"""
+Lista de espera: reasignación de horarios liberados.
+
+- ocupar_hueco(): se llama (vía signals.py) cuando una cita programada se
+  cancela o se reprograma. Busca con una consulta indexada (estado + rango
+  de días + franja horaria + veterinario preferido, ordenada por antigüedad)
+  al primer paciente que espera ese horario y le reserva el turno
+  (auto_reservar) o se lo ofrece por correo con el enlace del portal.
+- reasignar_todo(): modo batch. Cruza toda la lista de espera contra todos
+  los turnos libres de los próximos N días con tres consultas (entradas,
+  preferencias, turnos libres) y resuelve el emparejamiento en memoria.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import disponibilidad, portal
+from .models import Cita, ListaEspera, Veterinario
+
+logger = logging.getLogger(__name__)
+
+# No se ofrece más de un turno cada tanto al mismo paciente
+AVISO_MINIMO = timedelta(hours=12)
+CANDIDATOS_POR_HUECO = 10
+
+
+def _hora(hhmm):
+    return time.fromisoformat(hhmm)
+
+
+def _fecha_hora(fecha, hhmm):
+    return timezone.make_aware(datetime.combine(fecha, _hora(hhmm)), timezone.get_current_timezone())
+
+
+def _ausente(veterinario_id, fecha_hora):
+    """True si el veterinario tiene una ausencia cargada ese día (ver ausencias.py)."""
+    dia = timezone.localtime(fecha_hora).date()
+    return bool(disponibilidad.ausentes([veterinario_id], dia, dia))
+
+
+def _puede_avisarse(entrada, ahora):
+    return entrada.ultimo_aviso is None or entrada.ultimo_aviso < ahora - AVISO_MINIMO
+
+
+# ------------------------------
+# Un horario liberado
+# ------------------------------
+def candidatos(veterinario_id, fecha_hora):
+    """Entradas en espera que aceptan ese horario, la más antigua primero."""
+    local = timezone.localtime(fecha_hora)
+    return (
+        ListaEspera.objects.filter(
+            estado="esperando",
+            paciente__eliminado_en__isnull=True,  # dado de baja, a la espera de la purga
+            desde__lte=local.date(),
+            hasta__gte=local.date(),
+            hora_desde__lte=local.time(),
+            hora_hasta__gt=local.time(),
+        )
+        .filter(Q(veterinarios__isnull=True) | Q(veterinarios=veterinario_id))
+        # Quien ya tiene una cita a esa hora no es candidato
+        .exclude(Exists(Cita.todas.filter(
+            paciente=OuterRef("paciente"), fecha_hora=fecha_hora, estado="programada",
+        )))
+        .select_related("paciente__propietario")
+        .order_by("creada_en")
+        .distinct()
+    )
+
+
+def ocupar_hueco(veterinario_id, fecha_hora, excluir_paciente_id=None):
+    """
+    Intenta dar el horario a la lista de espera. Devuelve la entrada a la que
+    se le reservó u ofreció el turno, o None. `excluir_paciente_id`: el
+    paciente que acaba de liberar el horario.
+    """
+    ahora = timezone.now()
+    if fecha_hora <= ahora + timedelta(minutes=portal.MARGEN_RESERVA_MIN):
+        return None
+    if Cita.todas.filter(veterinario_id=veterinario_id, fecha_hora=fecha_hora, estado="programada").exists():
+        return None
+    if _ausente(veterinario_id, fecha_hora):
+        return None  # el veterinario no atiende ese día: el horario no se ofrece
+
+    qs = candidatos(veterinario_id, fecha_hora)
+    if excluir_paciente_id:
+        qs = qs.exclude(paciente_id=excluir_paciente_id)
+    for entrada in qs[:CANDIDATOS_POR_HUECO]:
+        if entrada.auto_reservar:
+            if asignar(entrada, veterinario_id, fecha_hora):
+                return entrada
+            return None  # el horario se ocupó mientras tanto
+        if _puede_avisarse(entrada, ahora):
+            ofrecer(entrada, veterinario_id, fecha_hora)
+            return entrada
+    return None
+
+
+def asignar(entrada, veterinario_id, fecha_hora):
+    """Reserva el turno para la entrada. False si el horario ya no está libre."""
+    with transaction.atomic():
+        vet = Veterinario.todos.select_for_update().get(pk=veterinario_id)
+        if Cita.todas.filter(veterinario=vet, fecha_hora=fecha_hora, estado="programada").exists():
+            return False
+        if _ausente(vet.pk, fecha_hora):
+            return False
+        cita = Cita.todas.create(
+            fecha_hora=fecha_hora,
+            veterinario=vet,
+            paciente=entrada.paciente,
+            administrativo_id=portal.administrativo_sistema(),
+        )
+        entrada.estado = "asignada"
+        entrada.cita = cita
+        entrada.ultimo_aviso = timezone.now()
+        entrada.save(update_fields=["estado", "cita", "ultimo_aviso"])
+
+    _avisar(
+        entrada,
+        "Te reservamos un turno",
+        f"Se liberó un turno y lo reservamos para {entrada.paciente.nombre}: "
+        f"{timezone.localtime(fecha_hora):%d/%m/%Y %H:%M} con {vet.nombre} {vet.apellido}.\n"
+        "Si no podés asistir, cancelalo desde el portal:",
+    )
+    return True
+
+
+def ofrecer(entrada, veterinario_id, fecha_hora):
+    vet = Veterinario.todos.get(pk=veterinario_id)
+    entrada.ultimo_aviso = timezone.now()
+    entrada.save(update_fields=["ultimo_aviso"])
+    _avisar(
+        entrada,
+        "Se liberó un turno",
+        f"Hay un turno libre para {entrada.paciente.nombre}: "
+        f"{timezone.localtime(fecha_hora):%d/%m/%Y %H:%M} con {vet.nombre} {vet.apellido}.\n"
+        "Si te sirve, reservalo desde el portal (lo toma quien llegue primero):",
+    )
+
+
+def _avisar(entrada, asunto, texto):
+    portal.avisar(entrada.paciente.propietario, asunto, texto)
+
+
+# ------------------------------
+# Batch
+# ------------------------------
+def reasignar_todo(dias=14, simular=False):
+    """
+    Empareja la lista de espera (por antigüedad) con los turnos libres de los
+    próximos `dias` días. Vence las entradas cuya ventana ya pasó.
+    Devuelve [(entrada, veterinario_id, fecha_hora, accion)] con accion
+    'reservada' u 'ofrecida'. Las entradas avisadas hace poco se saltean.
+    """
+    ahora = timezone.now()
+    hoy = timezone.localdate()
+    fechas = [hoy + timedelta(days=i) for i in range(dias)]
+
+    if not simular:
+        ListaEspera.objects.filter(estado="esperando", hasta__lt=hoy).update(estado="vencida")
+
+    entradas = list(
+        ListaEspera.objects.filter(
+            estado="esperando", desde__lte=fechas[-1], hasta__gte=hoy, paciente__eliminado_en__isnull=True,
+        )
+        .select_related("paciente__propietario")
+        .order_by("creada_en")
+    )
+    if not entradas:
+        return []
+
+    preferidos = defaultdict(set)
+    for entrada_id, vet_id in ListaEspera.veterinarios.through.objects.filter(
+        listaespera_id__in=[e.pk for e in entradas]
+    ).values_list("listaespera_id", "veterinario_id"):
+        preferidos[entrada_id].add(vet_id)
+
+    # Turnos libres de todos los veterinarios, en bloque, por día y en orden
+    vet_ids = list(Veterinario.todos.values_list("pk", flat=True))
+    libres = disponibilidad.slots_libres(vet_ids, hoy, dias)
+    por_dia = {
+        f: sorted(
+            (h, v)
+            for v in vet_ids
+            for h in disponibilidad.slots_futuros(libres[v][f], f, portal.MARGEN_RESERVA_MIN)
+        )
+        for f in fechas
+    }
+
+    # Horarios en los que cada paciente ya tiene cita
+    ocupados_paciente = {
+        (p, timezone.localtime(fh).strftime("%Y-%m-%d %H:%M"))
+        for p, fh in Cita.todas.filter(
+            paciente_id__in={e.paciente_id for e in entradas},
+            estado="programada",
+            fecha_hora__gte=_fecha_hora(hoy, "00:00"),
+        ).values_list("paciente_id", "fecha_hora")
+    }
+
+    tomados = set()
+    resultado = []
+    for entrada in entradas:
+        if not entrada.auto_reservar and not _puede_avisarse(entrada, ahora):
+            continue
+        vets_ok = preferidos.get(entrada.pk)
+        elegido = None
+        for f in fechas:
+            if not entrada.desde <= f <= entrada.hasta:
+                continue
+            for h, v in por_dia[f]:
+                if (f, h, v) in tomados or (vets_ok and v not in vets_ok):
+                    continue
+                if not entrada.hora_desde <= _hora(h) < entrada.hora_hasta:
+                    continue
+                if (entrada.paciente_id, f"{f:%Y-%m-%d} {h}") in ocupados_paciente:
+                    continue
+                elegido = (f, h, v)
+                break
+            if elegido:
+                break
+        if elegido is None:
+            continue
+
+        tomados.add(elegido)
+        f, h, v = elegido
+        fecha_hora = _fecha_hora(f, h)
+        if entrada.auto_reservar:
+            accion = "reservada"
+            if not simular and not asignar(entrada, v, fecha_hora):
+                continue
+        else:
+            accion = "ofrecida"
+            if not simular:
+                ofrecer(entrada, v, fecha_hora)
+        resultado.append((entrada, v, fecha_hora, accion))
+
+    logger.info("Lista de espera: %d turnos emparejados para %d entradas.", len(resultado), len(entradas))
+    return resultado
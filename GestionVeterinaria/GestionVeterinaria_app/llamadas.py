@@ -0,0 +1,104 @@
+"""
+Identificación de llamadas entrantes por teléfono.
+
+Propietario guarda el teléfono en dos columnas indexadas (ver
+Propietario.save): solo dígitos y los mismos al revés. Un número que llega
+con otro formato o con prefijos ("+54 9 11 4555-1234" contra
+"(011) 4555-1234") se encuentra igual comparando los últimos
+DIGITOS_SUFIJO dígitos, que en la columna invertida son un prefijo: un
+rango sobre el índice, sin LIKE ni recorrer la tabla.
+
+Dos consultas en total: propietarios (coincidencia exacta primero) y sus
+pacientes con la próxima cita de cada uno en subconsultas correlacionadas
+sobre el índice (paciente, fecha_hora).
+"""
+from django.db.models import Case, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .models import Cita, Paciente, Propietario, solo_digitos
+
+DIGITOS_SUFIJO = 8
+DIGITOS_MINIMOS = 6
+MAX_PROPIETARIOS = 10
+
+
+def parece_telefono(texto):
+    """True si el texto es un número (con separadores) y no un nombre o email."""
+    texto = (texto or "").strip()
+    return bool(texto) and all(c.isdigit() or c in " +-().,/" for c in texto) and \
+        len(solo_digitos(texto)) >= DIGITOS_MINIMOS
+
+
+def filtro_telefono(numero):
+    """Q de Propietario: mismo número exacto, o mismos últimos DIGITOS_SUFIJO dígitos."""
+    digitos = solo_digitos(numero)
+    sufijo = digitos[-DIGITOS_SUFIJO:][::-1]
+    # ":" es el carácter siguiente a "9": [sufijo, sufijo + ":") = todo lo que empieza por sufijo
+    return Q(telefono_digitos=digitos) | Q(telefono_invertido__gte=sufijo, telefono_invertido__lt=sufijo + ":")
+
+
+def propietarios_por_telefono(numero, limite=MAX_PROPIETARIOS):
+    digitos = solo_digitos(numero)
+    if len(digitos) < DIGITOS_MINIMOS:
+        return []
+    return list(
+        Propietario.objects.filter(filtro_telefono(digitos))
+        .annotate(exacto=Case(When(telefono_digitos=digitos, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        .order_by("-exacto", "apellido", "nombre")[:limite]
+    )
+
+
+def identificar(numero):
+    """
+    [(propietario, [pacientes])] para el número. Cada paciente trae
+    proxima_cita_id / proxima_fecha / proxima_veterinario / proxima_sucursal
+    (None si no tiene citas programadas).
+    """
+    propietarios = propietarios_por_telefono(numero)
+    if not propietarios:
+        return []
+
+    proxima = Cita.todas.filter(
+        paciente=OuterRef("pk"), estado="programada", fecha_hora__gte=timezone.now(),
+    ).order_by("fecha_hora")
+    pacientes = Paciente.objects.filter(propietario__in=[p.pk for p in propietarios]).annotate(
+        proxima_cita_id=Subquery(proxima.values("pk")[:1]),
+        proxima_fecha=Subquery(proxima.values("fecha_hora")[:1]),
+        proxima_veterinario=Subquery(
+            proxima.annotate(
+                nombre_vet=Concat("veterinario__nombre", Value(" "), "veterinario__apellido")
+            ).values("nombre_vet")[:1]
+        ),
+        proxima_sucursal=Subquery(proxima.values("sucursal__nombre")[:1]),
+    ).order_by("nombre")
+
+    por_propietario = {p.pk: [] for p in propietarios}
+    for paciente in pacientes:
+        por_propietario[paciente.propietario_id].append(paciente)
+    return [(p, por_propietario[p.pk]) for p in propietarios]
+
+
+def serializar(propietario, pacientes):
+    return {
+        "id": propietario.pk,
+        "nombre": propietario.nombre,
+        "apellido": propietario.apellido,
+        "telefono": propietario.telefono,
+        "email": propietario.email,
+        "exacto": bool(propietario.exacto),
+        "pacientes": [
+            {
+                "id": p.pk,
+                "nombre": p.nombre,
+                "especie": p.especie,
+                "proxima_cita": {
+                    "id": p.proxima_cita_id,
+                    "fecha_hora": p.proxima_fecha.isoformat(),
+                    "veterinario": p.proxima_veterinario,
+                    "sucursal": p.proxima_sucursal,
+                } if p.proxima_cita_id else None,
+            }
+            for p in pacientes
+        ],
+    }
@@ -0,0 +1,57 @@
+# GestionVeterinaria_app/management/commands/actualizar_replica.py
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from GestionVeterinaria_app import replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base principal a la réplica de lectura con la API de backup online de SQLite, "
+        "de a tramos para no frenar las escrituras. Una vez (cron) o cada --cada segundos. "
+        "Con PostgreSQL la réplica es un standby con streaming replication y no hace falta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cada", type=int, default=0,
+                            help="Repetir cada N segundos (default 0: una sola copia).")
+        parser.add_argument("--paginas", type=int, default=1024,
+                            help="Páginas copiadas por tramo (default 1024).")
+        parser.add_argument("--pausa", type=float, default=0.01,
+                            help="Segundos de pausa entre tramos (default 0.01).")
+
+    def handle(self, *args, **options):
+        if not replica.configurada():
+            raise CommandError("No hay réplica configurada (DJANGO_DB_REPLICA).")
+        origen = settings.DATABASES["default"]
+        destino = settings.DATABASES[replica.ALIAS]
+        if "sqlite3" not in origen["ENGINE"] or "sqlite3" not in destino["ENGINE"]:
+            raise CommandError(
+                "La copia por backup es solo para SQLite; con PostgreSQL la réplica se mantiene "
+                "con streaming replication desde el servidor."
+            )
+        if options["paginas"] < 1 or options["cada"] < 0:
+            raise CommandError("--paginas debe ser positivo y --cada no puede ser negativo.")
+
+        while True:
+            inicio = time.time()
+            self._copiar(str(origen["NAME"]), str(destino["NAME"]), options["paginas"], options["pausa"])
+            # La copia incluye todo lo confirmado antes de empezar
+            replica.marcar_copia(inicio)
+            self.stdout.write(self.style.SUCCESS(f"Réplica actualizada en {time.time() - inicio:.2f} s."))
+            if not options["cada"]:
+                return
+            time.sleep(max(0.0, options["cada"] - (time.time() - inicio)))
+
+    def _copiar(self, origen, destino, paginas, pausa):
+        # Se copia a un temporal y se reemplaza de una vez: los lectores nunca ven una copia a medias.
+        # Las conexiones de los requests (CONN_MAX_AGE=0) abren el archivo nuevo en el próximo request.
+        temporal = f"{destino}.tmp"
+        with closing(sqlite3.connect(origen)) as fuente, closing(sqlite3.connect(temporal)) as copia:
+            fuente.backup(copia, pages=paginas, sleep=pausa)
+        os.replace(temporal, destino)
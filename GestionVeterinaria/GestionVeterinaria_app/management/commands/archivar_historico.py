@@ -0,0 +1,27 @@
+# GestionVeterinaria_app/management/commands/archivar_historico.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from GestionVeterinaria_app import archivo
+
+
+class Command(BaseCommand):
+    help = "Mueve citas e historiales más viejos que el horizonte a las tablas de archivo, por lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=730,
+                            help="Horizonte: se archiva lo anterior a hoy menos N días (default 730).")
+        parser.add_argument("--lote", type=int, default=archivo.LOTE,
+                            help="Filas por transacción (default %(default)s).")
+
+    def handle(self, *args, **options):
+        if options["dias"] < 1 or options["lote"] < 1:
+            raise CommandError("--dias y --lote deben ser positivos.")
+
+        corte = timezone.now() - timedelta(days=options["dias"])
+        n_hist, n_citas = archivo.archivar(corte, lote=options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivados {n_hist} historiales y {n_citas} citas anteriores a {corte:%d/%m/%Y}."
+        ))
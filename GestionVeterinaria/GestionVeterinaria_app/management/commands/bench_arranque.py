@@ -0,0 +1,97 @@
+# GestionVeterinaria_app/management/commands/bench_arranque.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Corre en un proceso nuevo: mide django.setup() y el primer request en frío
+_PRIMER_REQUEST = """
+import json, os, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+t1 = time.perf_counter()
+from django.test import Client
+r = Client(HTTP_HOST=sys.argv[2]).get(sys.argv[1])
+t2 = time.perf_counter()
+r2 = Client(HTTP_HOST=sys.argv[2]).get(sys.argv[1])
+t3 = time.perf_counter()
+print(json.dumps({"setup": t1 - t0, "primero": t2 - t1, "segundo": t3 - t2, "status": r.status_code}))
+"""
+
+
+def _ms(segundos):
+    return f"{segundos * 1000:.0f} ms"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo de arranque con el perfil de settings actual: `manage.py check`, "
+        "django.setup() y la latencia del primer request en un proceso nuevo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=3)
+        parser.add_argument("--url", default="/home/", help="URL del primer request (default /home/).")
+        parser.add_argument("--top", type=int, default=0, help="Muestra los N imports más caros (-X importtime).")
+
+    def handle(self, *args, **options):
+        n = options["repeticiones"]
+        if n < 1:
+            raise CommandError("--repeticiones debe ser positivo.")
+        manage = os.path.join(settings.BASE_DIR, "manage.py")
+        entorno = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "GestionVeterinaria.settings")}
+        self.stdout.write(f"Perfil: {os.environ.get('DJANGO_ENTORNO', 'dev')} · DEBUG={settings.DEBUG}")
+
+        muestras = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            proc = subprocess.run([sys.executable, manage, "check"], env=entorno, capture_output=True, text=True)
+            muestras.append(time.perf_counter() - t0)
+            if proc.returncode:
+                raise CommandError(f"manage.py check falló:\n{proc.stderr}")
+        self.stdout.write(f"  manage.py check:   mediana {_ms(statistics.median(muestras))} · máx {_ms(max(muestras))}")
+
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+        resultados = []
+        for _ in range(n):
+            proc = subprocess.run(
+                [sys.executable, "-c", _PRIMER_REQUEST, options["url"], host],
+                env=entorno, capture_output=True, text=True, cwd=settings.BASE_DIR,
+            )
+            if proc.returncode:
+                raise CommandError(f"El primer request falló:\n{proc.stderr}")
+            resultados.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+        for clave, titulo in (("setup", "django.setup()"), ("primero", "primer request"), ("segundo", "segundo request")):
+            valores = [r[clave] for r in resultados]
+            self.stdout.write(f"  {titulo + ':':<18} mediana {_ms(statistics.median(valores))} · máx {_ms(max(valores))}")
+        self.stdout.write(f"  (GET {options['url']} -> {resultados[0]['status']})")
+
+        if options["top"]:
+            self._imports_caros(entorno, options["top"])
+
+    def _imports_caros(self, entorno, top):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import django; django.setup()"],
+            env=entorno, capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        filas = []
+        for linea in proc.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            partes = linea.split("|")
+            if len(partes) != 3 or not linea.startswith("import time:"):
+                continue
+            try:
+                acumulado = int(partes[1])
+            except ValueError:
+                continue
+            filas.append((acumulado, partes[2].rstrip()))
+        self.stdout.write("\nImports más caros (acumulado):")
+        for acumulado, modulo in sorted(filas, reverse=True)[:top]:
+            self.stdout.write(f"  {acumulado / 1000:8.1f} ms {modulo}")
@@ -0,0 +1,82 @@
+# GestionVeterinaria_app/management/commands/bench_login.py
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import get_hashers
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+
+def _ms(muestras):
+    return f"mediana {statistics.median(muestras) * 1000:.1f} ms · máx {max(muestras) * 1000:.1f} ms"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo del login (hash de contraseña por hasher configurado) y el costo "
+        "por request de resolver request.user con la sesión y el usuario cacheados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--usuario", help="username existente para medir el camino por request.")
+
+    def handle(self, *args, **options):
+        n = options["repeticiones"]
+        if n < 1:
+            raise CommandError("--repeticiones debe ser positivo.")
+
+        self.stdout.write("Hash de contraseña (login):")
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode("contraseña-de-prueba", hasher.salt())
+            except (ValueError, ImportError):
+                self.stdout.write(f"  {hasher.algorithm:<22} no disponible (falta la librería)")
+                continue
+            muestras = []
+            for _ in range(n):
+                t0 = time.perf_counter()
+                hasher.verify("contraseña-de-prueba", encoded)
+                muestras.append(time.perf_counter() - t0)
+            extra = f" ({hasher.iterations} iteraciones)" if hasattr(hasher, "iterations") else ""
+            self.stdout.write(f"  {hasher.algorithm:<22} {_ms(muestras)}{extra}")
+
+        if options["usuario"]:
+            self._bench_request(options["usuario"], n)
+
+    def _bench_request(self, username, n):
+        user = get_user_model().objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f"No existe el usuario {username!r}.")
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.create()
+
+        factory = RequestFactory()
+        middleware = AuthenticationMiddleware(lambda r: None)
+        muestras, consultas = [], []
+        try:
+            for _ in range(n + 1):  # la primera vuelta llena la caché
+                request = factory.get("/")
+                t0 = time.perf_counter()
+                with CaptureQueriesContext(connection) as q:
+                    request.session = import_module(settings.SESSION_ENGINE).SessionStore(store.session_key)
+                    middleware.process_request(request)
+                    request.user.is_authenticated  # fuerza la carga perezosa
+                muestras.append(time.perf_counter() - t0)
+                consultas.append(len(q))
+        finally:
+            store.delete()
+
+        self.stdout.write(f"\nrequest.user para {username!r} ({settings.SESSION_ENGINE}):")
+        self.stdout.write(f"  primera vez: {consultas[0]} consultas, {muestras[0] * 1000:.2f} ms")
+        self.stdout.write(f"  cacheado:    {max(consultas[1:])} consultas, {_ms(muestras[1:])}")
@@ -0,0 +1,38 @@
+# GestionVeterinaria_app/management/commands/buscar_duplicados.py
+from django.core.management.base import BaseCommand, CommandError
+
+from GestionVeterinaria_app import duplicados
+from GestionVeterinaria_app.models import Paciente, Propietario
+
+
+class Command(BaseCommand):
+    help = "Lista propietarios/pacientes posiblemente duplicados o fusiona un par"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tipo", choices=["propietarios", "pacientes"], default="propietarios")
+        parser.add_argument("--umbral", type=float, default=duplicados.UMBRAL,
+                            help="Puntaje mínimo (0 a 1) para listar un par (default %(default)s).")
+        parser.add_argument("--fusionar", nargs=2, type=int, metavar=("CONSERVAR_ID", "DUPLICADO_ID"),
+                            help="Fusiona el duplicado en el registro que se conserva.")
+
+    def handle(self, *args, **options):
+        tipo = options["tipo"]
+        if options["fusionar"]:
+            conservar, duplicado = options["fusionar"]
+            try:
+                if tipo == "propietarios":
+                    duplicados.fusionar_propietarios(conservar, duplicado)
+                else:
+                    duplicados.fusionar_pacientes(conservar, duplicado)
+            except (ValueError, Propietario.DoesNotExist, Paciente.DoesNotExist) as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"#{duplicado} fusionado en #{conservar}."))
+            return
+
+        if tipo == "propietarios":
+            candidatos = duplicados.propietarios_duplicados(options["umbral"])
+        else:
+            candidatos = duplicados.pacientes_duplicados(options["umbral"])
+        for puntaje, a, b in candidatos:
+            self.stdout.write(f"{puntaje:.2f}  #{a.pk} {a}  <->  #{b.pk} {b}")
+        self.stdout.write(self.style.SUCCESS(f"{len(candidatos)} par(es) candidatos."))
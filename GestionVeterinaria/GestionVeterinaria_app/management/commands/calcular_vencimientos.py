@@ -0,0 +1,37 @@
+# GestionVeterinaria_app/management/commands/calcular_vencimientos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from GestionVeterinaria_app import vencimientos
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la lista de vencimientos (vacunas, refuerzos y controles) de todos los pacientes "
+        "y, con --avisar, manda los recordatorios pendientes. Pensado para correr cada noche desde cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--avisar", action="store_true",
+                            help="Después de recalcular, manda un correo por propietario con lo pendiente.")
+        parser.add_argument("--simular", action="store_true",
+                            help="Con --avisar: lista los recordatorios sin mandarlos.")
+        parser.add_argument("--lote", type=int, default=vencimientos.LOTE,
+                            help=f"Filas por transacción (default {vencimientos.LOTE}).")
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser positivo.")
+
+        cambios, bajas, total = vencimientos.refrescar(options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Vencimientos: {total} vigentes ({cambios} nuevos o cambiados, {bajas} borrados)."
+        ))
+        if not options["avisar"]:
+            return
+
+        avisados = vencimientos.avisar(simular=options["simular"])
+        for propietario, pendientes in avisados:
+            detalle = ", ".join(f"{v.paciente.nombre}: {v.regla.nombre} {v.vence:%d/%m}" for v in pendientes)
+            self.stdout.write(f"  {propietario.email:<30} {detalle}")
+        prefijo = "[simulación] " if options["simular"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefijo}{len(avisados)} recordatorio(s)."))
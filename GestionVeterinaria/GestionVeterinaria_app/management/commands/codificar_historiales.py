@@ -0,0 +1,31 @@
+# GestionVeterinaria_app/management/commands/codificar_historiales.py
+from django.core.management.base import BaseCommand, CommandError
+
+from GestionVeterinaria_app import catalogo
+
+
+class Command(BaseCommand):
+    help = (
+        "Vincula los historiales existentes con los diagnósticos y tratamientos del catálogo "
+        "que menciona su texto libre (nombre, código o sinónimo), por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=catalogo.LOTE,
+                            help="Historiales por transacción (default %(default)s).")
+        parser.add_argument("--todos", action="store_true",
+                            help="Revisa también los que ya tienen códigos (solo agrega vínculos nuevos).")
+        parser.add_argument("--simular", action="store_true",
+                            help="Solo cuenta lo que se codificaría, sin guardar.")
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser positivo.")
+
+        revisados, codificados, vinculos = catalogo.codificar_en_lotes(
+            options["lote"], todos=options["todos"], simular=options["simular"],
+        )
+        prefijo = "[simulación] " if options["simular"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}{revisados} historial(es) revisados, {codificados} codificados ({vinculos} vínculo(s))."
+        ))
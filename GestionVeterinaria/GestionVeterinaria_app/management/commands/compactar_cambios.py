@@ -0,0 +1,27 @@
+# GestionVeterinaria_app/management/commands/compactar_cambios.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from GestionVeterinaria_app import cambios
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta el registro de cambios del feed de sincronización: deja una fila por objeto "
+        "y vence las bajas más viejas que la retención. Pensado para correr cada noche desde cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=cambios.RETENCION_BAJAS.days,
+                            help=f"Días que se conservan las bajas (default {cambios.RETENCION_BAJAS.days}).")
+        parser.add_argument("--lote", type=int, default=cambios.LOTE,
+                            help=f"Filas por transacción (default {cambios.LOTE}).")
+
+    def handle(self, *args, **options):
+        if options["dias"] < 1 or options["lote"] < 1:
+            raise CommandError("--dias y --lote deben ser positivos.")
+        repetidas, bajas = cambios.compactar(timedelta(days=options["dias"]), options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Filas repetidas borradas: {repetidas}. Bajas vencidas: {bajas}."
+        ))
@@ -0,0 +1,40 @@
+# GestionVeterinaria_app/management/commands/limpiar_adjuntos.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from GestionVeterinaria_app import adjuntos
+from GestionVeterinaria_app.models import ArchivoAdjunto
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento de los adjuntos del historial: borra las subidas abandonadas, los adjuntos de "
+        "atenciones que ya no existen y los archivos que ya no usa ningún adjunto. Con --miniaturas "
+        "genera las miniaturas que quedaron pendientes (por ejemplo, después de un reinicio). "
+        "Pensado para correr cada noche desde cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horas", type=int, default=int(adjuntos.VIGENCIA_SUBIDA.total_seconds() // 3600),
+                            help="Horas sin movimiento para dar una subida por abandonada (default 48).")
+        parser.add_argument("--lote", type=int, default=adjuntos.LOTE,
+                            help=f"Archivos sin adjuntos que se revisan por tanda (default {adjuntos.LOTE}).")
+        parser.add_argument("--miniaturas", action="store_true",
+                            help="Genera las miniaturas pendientes y espera a que terminen.")
+
+    def handle(self, *args, **options):
+        if options["horas"] < 1 or options["lote"] < 1:
+            raise CommandError("--horas y --lote deben ser positivos.")
+        subidas = adjuntos.limpiar_subidas(timedelta(hours=options["horas"]))
+        sueltos = adjuntos.borrar_sueltos(options["lote"])
+        archivos = adjuntos.borrar_huerfanos(options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Subidas abandonadas: {subidas}. Adjuntos de atenciones borradas: {sueltos}. "
+            f"Archivos sin adjuntos borrados: {archivos}."
+        ))
+
+        if options["miniaturas"]:
+            pendientes = list(ArchivoAdjunto.objects.filter(miniatura="pendiente"))
+            adjuntos.encolar_miniaturas(pendientes, esperar=True)
+            self.stdout.write(self.style.SUCCESS(f"Miniaturas generadas: {len(pendientes)}."))
@@ -0,0 +1,40 @@
+# GestionVeterinaria_app/management/commands/limpiar_sesiones.py
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las sesiones vencidas de a lotes (a diferencia de clearsessions, que hace "
+        "un único DELETE). Pensado para correr periódicamente desde cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Sesiones por transacción (default 1000).")
+        parser.add_argument("--pausa", type=float, default=0.05,
+                            help="Segundos de pausa entre lotes para no acaparar la base (default 0.05).")
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        if lote < 1:
+            raise CommandError("--lote debe ser positivo.")
+
+        ahora = timezone.now()
+        total = 0
+        while True:
+            claves = list(
+                Session.objects.filter(expire_date__lt=ahora)
+                .values_list("session_key", flat=True)[:lote]
+            )
+            if not claves:
+                break
+            with transaction.atomic():
+                Session.objects.filter(session_key__in=claves).delete()
+            total += len(claves)
+            time.sleep(options["pausa"])
+
+        self.stdout.write(self.style.SUCCESS(f"Sesiones vencidas borradas: {total}."))
@@ -0,0 +1,30 @@
+# GestionVeterinaria_app/management/commands/procesar_lista_espera.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from GestionVeterinaria_app import lista_espera
+
+
+class Command(BaseCommand):
+    help = (
+        "Cruza toda la lista de espera con los turnos libres de los próximos días: "
+        "reserva (auto_reservar) u ofrece por correo. Vence las entradas pasadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=14,
+                            help="Días hacia adelante a considerar (default %(default)s).")
+        parser.add_argument("--simular", action="store_true",
+                            help="Solo muestra el emparejamiento, sin reservar ni avisar.")
+
+    def handle(self, *args, **options):
+        if options["dias"] < 1:
+            raise CommandError("--dias debe ser positivo.")
+
+        resultado = lista_espera.reasignar_todo(options["dias"], simular=options["simular"])
+        for entrada, vet_id, fecha_hora, accion in resultado:
+            self.stdout.write(
+                f"  {accion:<9} {timezone.localtime(fecha_hora):%d/%m %H:%M} vet={vet_id} · {entrada.paciente}"
+            )
+        prefijo = "[simulación] " if options["simular"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefijo}{len(resultado)} turno(s) emparejados."))
@@ -0,0 +1,23 @@
+# GestionVeterinaria_app/management/commands/purgar_bajas.py
+from django.core.management.base import BaseCommand, CommandError
+
+from GestionVeterinaria_app import archivo
+
+
+class Command(BaseCommand):
+    help = (
+        "Purga por lotes los propietarios y pacientes dados de baja que siguen en la base "
+        "(por ejemplo, si un reinicio cortó la purga en segundo plano). Pensado para correr cada noche desde cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=archivo.LOTE,
+                            help="Filas por transacción (default %(default)s).")
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser positivo.")
+        propietarios, pacientes = archivo.purgar_pendientes(options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Purgados {propietarios} propietarios y {pacientes} pacientes dados de baja."
+        ))
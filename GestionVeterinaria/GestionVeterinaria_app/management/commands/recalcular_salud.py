@@ -0,0 +1,22 @@
+# GestionVeterinaria_app/management/commands/recalcular_salud.py
+from django.core.management.base import BaseCommand
+
+from GestionVeterinaria_app import salud
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las franjas de edad del tablero de salud (correrlo cada noche). "
+        "Con --completo reconstruye todos los contadores desde pacientes e historiales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--completo", action="store_true",
+                            help="Reconstruye especie, raza, sexo, edad y diagnósticos (carga inicial o reparación).")
+
+    def handle(self, *args, **options):
+        if options["completo"]:
+            n = salud.recalcular_todo()
+        else:
+            n = salud.recalcular_edades()
+        self.stdout.write(self.style.SUCCESS(f"{n} contador(es) de salud recalculados."))
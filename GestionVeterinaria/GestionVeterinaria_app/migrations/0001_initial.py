@@ -1,101 +1,101 @@
-# Generated by Django 4.2 on 2024-12-02 22:24
-
-from django.db import migrations, models
-import django.db.models.deletion
-
-
-class Migration(migrations.Migration):
-
-    initial = True
-
-    dependencies = [
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='Administrativo',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('nombre', models.CharField(max_length=100)),
-                ('apellido', models.CharField(max_length=100)),
-                ('contacto', models.CharField(max_length=150)),
-            ],
-        ),
-        migrations.CreateModel(
-            name='Propietario',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('nombre', models.CharField(max_length=100)),
-                ('apellido', models.CharField(max_length=100)),
-                ('direccion', models.TextField()),
-                ('telefono', models.CharField(max_length=20)),
-                ('email', models.EmailField(max_length=254, unique=True)),
-            ],
-        ),
-        migrations.CreateModel(
-            name='Rol',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('descripcion', models.CharField(max_length=100, unique=True)),
-            ],
-        ),
-        migrations.CreateModel(
-            name='Veterinario',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('nombre', models.CharField(max_length=100)),
-                ('apellido', models.CharField(max_length=100)),
-                ('especialidad', models.CharField(max_length=200)),
-                ('rol', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='veterinarios', to='GestionVeterinaria_app.rol')),
-            ],
-        ),
-        migrations.CreateModel(
-            name='Usuario',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('nombre_usuario', models.CharField(max_length=50, unique=True)),
-                ('contrasenia', models.CharField(max_length=128)),
-                ('rol', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usuarios', to='GestionVeterinaria_app.rol')),
-            ],
-        ),
-        migrations.CreateModel(
-            name='Paciente',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('nombre', models.CharField(max_length=100)),
-                ('apellido', models.CharField(max_length=100)),
-                ('especie', models.CharField(max_length=50)),
-                ('raza', models.CharField(blank=True, max_length=50, null=True)),
-                ('sexo', models.CharField(choices=[('M', 'Macho'), ('H', 'Hembra')], max_length=1)),
-                ('fecha_nacimiento', models.DateField()),
-                ('informacion_medica', models.TextField(blank=True, null=True)),
-                ('propietario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pacientes', to='GestionVeterinaria_app.propietario')),
-            ],
-        ),
-        migrations.CreateModel(
-            name='HistorialMedico',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('fecha_consulta', models.DateTimeField()),
-                ('diagnostico', models.TextField()),
-                ('tratamiento', models.TextField()),
-                ('nota_veterinaria', models.TextField(blank=True, null=True)),
-                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_medico', to='GestionVeterinaria_app.paciente')),
-            ],
-        ),
-        migrations.CreateModel(
-            name='Cita',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('fecha_hora', models.DateTimeField()),
-                ('administrativo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas', to='GestionVeterinaria_app.administrativo')),
-                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas', to='GestionVeterinaria_app.paciente')),
-                ('veterinario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas', to='GestionVeterinaria_app.veterinario')),
-            ],
-        ),
-        migrations.AddField(
-            model_name='administrativo',
-            name='rol',
-            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_administrativo', to='GestionVeterinaria_app.rol'),
-        ),
-    ]
+# Generated by Django 4.2 on 2024-12-02 22:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Administrativo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('apellido', models.CharField(max_length=100)),
+                ('contacto', models.CharField(max_length=150)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Propietario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('apellido', models.CharField(max_length=100)),
+                ('direccion', models.TextField()),
+                ('telefono', models.CharField(max_length=20)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Rol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descripcion', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Veterinario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('apellido', models.CharField(max_length=100)),
+                ('especialidad', models.CharField(max_length=200)),
+                ('rol', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='veterinarios', to='GestionVeterinaria_app.rol')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Usuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_usuario', models.CharField(max_length=50, unique=True)),
+                ('contrasenia', models.CharField(max_length=128)),
+                ('rol', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usuarios', to='GestionVeterinaria_app.rol')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Paciente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('apellido', models.CharField(max_length=100)),
+                ('especie', models.CharField(max_length=50)),
+                ('raza', models.CharField(blank=True, max_length=50, null=True)),
+                ('sexo', models.CharField(choices=[('M', 'Macho'), ('H', 'Hembra')], max_length=1)),
+                ('fecha_nacimiento', models.DateField()),
+                ('informacion_medica', models.TextField(blank=True, null=True)),
+                ('propietario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pacientes', to='GestionVeterinaria_app.propietario')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HistorialMedico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_consulta', models.DateTimeField()),
+                ('diagnostico', models.TextField()),
+                ('tratamiento', models.TextField()),
+                ('nota_veterinaria', models.TextField(blank=True, null=True)),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_medico', to='GestionVeterinaria_app.paciente')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Cita',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_hora', models.DateTimeField()),
+                ('administrativo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas', to='GestionVeterinaria_app.administrativo')),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas', to='GestionVeterinaria_app.paciente')),
+                ('veterinario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='citas', to='GestionVeterinaria_app.veterinario')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='administrativo',
+            name='rol',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_administrativo', to='GestionVeterinaria_app.rol'),
+        ),
+    ]
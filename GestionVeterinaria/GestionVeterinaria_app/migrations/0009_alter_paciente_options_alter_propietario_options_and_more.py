@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:42
+
+import django.db.models.deletion
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0008_delete_usuario'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='paciente',
+            options={'default_manager_name': 'todos', 'default_permissions': ('add', 'change', 'delete', 'view'), 'permissions': [('view_health_stats', 'Puede ver estadísticas de salud'), ('export_reports', 'Puede exportar reportes')], 'verbose_name': 'Paciente', 'verbose_name_plural': 'Pacientes'},
+        ),
+        migrations.AlterModelOptions(
+            name='propietario',
+            options={'default_manager_name': 'todos', 'default_permissions': ('add', 'change', 'delete', 'view'), 'verbose_name': 'Propietario', 'verbose_name_plural': 'Propietarios'},
+        ),
+        migrations.AlterModelManagers(
+            name='paciente',
+            managers=[
+                ('todos', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='propietario',
+            managers=[
+                ('todos', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='propietario',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='CitaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_hora', models.DateTimeField()),
+                ('estado', models.CharField(choices=[('programada', 'Programada'), ('atendida', 'Atendida'), ('cancelada', 'Cancelada')], max_length=12)),
+                ('archivada_en', models.DateTimeField(auto_now_add=True)),
+                ('administrativo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='citas_archivadas', to='GestionVeterinaria_app.administrativo')),
+                ('paciente', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='citas_archivadas', to='GestionVeterinaria_app.paciente')),
+                ('veterinario', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='citas_archivadas', to='GestionVeterinaria_app.veterinario')),
+            ],
+            options={
+                'verbose_name': 'Cita archivada',
+                'verbose_name_plural': 'Citas archivadas',
+                'default_permissions': ('view',),
+                'indexes': [models.Index(fields=['fecha_hora'], name='GestionVete_fecha_h_ad3ef8_idx'), models.Index(fields=['paciente', 'fecha_hora'], name='GestionVete_pacient_670311_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialMedicoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_consulta', models.DateTimeField()),
+                ('diagnostico', models.TextField()),
+                ('tratamiento', models.TextField()),
+                ('nota_veterinaria', models.TextField(blank=True, null=True)),
+                ('cita_id', models.BigIntegerField(blank=True, null=True)),
+                ('archivado_en', models.DateTimeField(auto_now_add=True)),
+                ('paciente', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='historial_archivado', to='GestionVeterinaria_app.paciente')),
+            ],
+            options={
+                'verbose_name': 'Historial médico archivado',
+                'verbose_name_plural': 'Historiales médicos archivados',
+                'default_permissions': ('view',),
+                'indexes': [models.Index(fields=['fecha_consulta'], name='GestionVete_fecha_c_19665b_idx'), models.Index(fields=['paciente', 'fecha_consulta'], name='GestionVete_pacient_55243e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0009_alter_paciente_options_alter_propietario_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cita',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:54
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0010_cita_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde', models.DateField()),
+                ('hasta', models.DateField()),
+                ('hora_desde', models.TimeField(default=datetime.time(9, 0))),
+                ('hora_hasta', models.TimeField(default=datetime.time(18, 0))),
+                ('auto_reservar', models.BooleanField(default=False, help_text='Si está activo se reserva el turno directamente; si no, se le ofrece por correo.')),
+                ('estado', models.CharField(choices=[('esperando', 'Esperando'), ('asignada', 'Asignada'), ('vencida', 'Vencida')], default='esperando', max_length=10)),
+                ('ultimo_aviso', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('creada_en', models.DateTimeField(auto_now_add=True)),
+                ('cita', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='GestionVeterinaria_app.cita')),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='GestionVeterinaria_app.paciente')),
+                ('veterinarios', models.ManyToManyField(blank=True, help_text='Veterinarios preferidos. Vacío: cualquiera.', related_name='lista_espera', to='GestionVeterinaria_app.veterinario')),
+            ],
+            options={
+                'verbose_name': 'Lista de espera',
+                'verbose_name_plural': 'Lista de espera',
+                'default_permissions': ('add', 'change', 'delete', 'view'),
+                'indexes': [models.Index(fields=['estado', 'desde', 'hasta', 'creada_en'], name='GestionVete_estado_88c777_idx'), models.Index(fields=['paciente', 'estado'], name='GestionVete_pacient_bfc21b_idx')],
+            },
+        ),
+    ]
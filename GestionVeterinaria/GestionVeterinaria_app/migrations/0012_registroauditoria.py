@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:00
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0011_listaespera'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroAuditoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=50)),
+                ('objeto_id', models.BigIntegerField()),
+                ('accion', models.CharField(choices=[('alta', 'Alta'), ('cambio', 'Cambio'), ('baja', 'Baja'), ('fusion', 'Fusión')], max_length=6)),
+                ('cambios', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario_nombre', models.CharField(blank=True, max_length=150)),
+                ('ruta', models.CharField(blank=True, max_length=200)),
+                ('usuario', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Registro de auditoría',
+                'verbose_name_plural': 'Registros de auditoría',
+                'default_permissions': ('view',),
+                'indexes': [models.Index(fields=['modelo', 'objeto_id', 'fecha'], name='GestionVete_modelo_352f32_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0012_registroauditoria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cita',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='historialmedico',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='propietario',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
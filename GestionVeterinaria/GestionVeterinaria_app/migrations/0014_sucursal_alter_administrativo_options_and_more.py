@@ -0,0 +1,112 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:06
+
+import datetime
+import django.db.models.deletion
+import django.db.models.manager
+from django.conf import settings
+from django.db import migrations, models
+
+
+def asignar_sucursal_inicial(apps, schema_editor):
+    # Lo existente pasa a una sucursal "Casa central" (si hay datos)
+    Sucursal = apps.get_model('GestionVeterinaria_app', 'Sucursal')
+    modelos = [apps.get_model('GestionVeterinaria_app', m) for m in ('Veterinario', 'Administrativo', 'Cita', 'CitaArchivada')]
+    if not any(m._default_manager.exists() for m in modelos):
+        return
+    central, _ = Sucursal.objects.get_or_create(nombre='Casa central')
+    for m in modelos:
+        m._default_manager.filter(sucursal__isnull=True).update(sucursal=central)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0013_cita_version_historialmedico_version_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sucursal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('direccion', models.TextField(blank=True)),
+                ('jornada_inicio', models.TimeField(default=datetime.time(9, 0))),
+                ('jornada_fin', models.TimeField(default=datetime.time(18, 0))),
+                ('intervalo_min', models.PositiveSmallIntegerField(default=30, help_text='Duración de cada turno, en minutos.')),
+            ],
+            options={
+                'verbose_name': 'Sucursal',
+                'verbose_name_plural': 'Sucursales',
+                'default_permissions': ('add', 'change', 'delete', 'view'),
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='administrativo',
+            options={'default_manager_name': 'todos', 'default_permissions': ('add', 'change', 'delete', 'view'), 'verbose_name': 'Administrativo', 'verbose_name_plural': 'Administrativos'},
+        ),
+        migrations.AlterModelOptions(
+            name='cita',
+            options={'default_manager_name': 'todas'},
+        ),
+        migrations.AlterModelOptions(
+            name='veterinario',
+            options={'default_manager_name': 'todos', 'default_permissions': ('add', 'change', 'delete', 'view'), 'verbose_name': 'Veterinario', 'verbose_name_plural': 'Veterinarios'},
+        ),
+        migrations.AlterModelManagers(
+            name='administrativo',
+            managers=[
+                ('todos', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='cita',
+            managers=[
+                ('todas', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='veterinario',
+            managers=[
+                ('todos', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='administrativo',
+            name='sucursal',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='administrativos', to='GestionVeterinaria_app.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='cita',
+            name='sucursal',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='citas', to='GestionVeterinaria_app.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='citaarchivada',
+            name='sucursal',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='GestionVeterinaria_app.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='veterinario',
+            name='sucursal',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='veterinarios', to='GestionVeterinaria_app.sucursal'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['sucursal', 'fecha_hora'], name='GestionVete_sucursa_34b44a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['sucursal', 'estado', 'fecha_hora'], name='GestionVete_sucursa_7a8f78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='citaarchivada',
+            index=models.Index(fields=['sucursal', 'fecha_hora'], name='GestionVete_sucursa_eb467b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='veterinario',
+            index=models.Index(fields=['sucursal', 'apellido', 'nombre'], name='GestionVete_sucursa_781455_idx'),
+        ),
+        migrations.RunPython(asignar_sucursal_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0014_sucursal_alter_administrativo_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['paciente', 'fecha_hora'], name='GestionVete_pacient_96458e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialmedico',
+            index=models.Index(fields=['paciente', 'fecha_consulta'], name='GestionVete_pacient_2b50ef_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0015_cita_gestionvete_pacient_96458e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregadoSalud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('especie', 'Especie'), ('raza', 'Raza'), ('sexo', 'Sexo'), ('edad', 'Franja de edad'), ('diagnostico', 'Diagnóstico')], max_length=11)),
+                ('especie', models.CharField(blank=True, max_length=50)),
+                ('clave', models.CharField(max_length=100)),
+                ('periodo', models.CharField(blank=True, max_length=7)),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Agregado de salud',
+                'verbose_name_plural': 'Agregados de salud',
+                'default_permissions': (),
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'especie', 'clave', 'periodo'), name='agregado_salud_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0016_agregadosalud'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historialmedicoarchivado',
+            name='codigos',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='CodigoClinico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('diagnostico', 'Diagnóstico'), ('tratamiento', 'Tratamiento')], max_length=11)),
+                ('codigo', models.CharField(max_length=20, unique=True)),
+                ('nombre', models.CharField(max_length=150)),
+                ('sinonimos', models.TextField(blank=True, help_text='Uno por línea; también se usan para autocompletar y codificar.')),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Código clínico',
+                'verbose_name_plural': 'Catálogo clínico',
+                'default_permissions': ('add', 'change', 'delete', 'view'),
+                'indexes': [models.Index(fields=['tipo', 'nombre'], name='GestionVete_tipo_e77997_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='historialmedico',
+            name='diagnosticos',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'tipo': 'diagnostico'}, related_name='historiales_diagnostico', to='GestionVeterinaria_app.codigoclinico'),
+        ),
+        migrations.AddField(
+            model_name='historialmedico',
+            name='tratamientos',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'tipo': 'tratamiento'}, related_name='historiales_tratamiento', to='GestionVeterinaria_app.codigoclinico'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+LOTE = 500
+
+
+def normalizar_telefonos(apps, schema_editor):
+    # Por lotes de pk creciente: cada bulk_update es una transacción corta
+    Propietario = apps.get_model('GestionVeterinaria_app', 'Propietario')
+    ultimo = 0
+    while True:
+        lote = list(Propietario._default_manager.filter(pk__gt=ultimo).order_by('pk').only('pk', 'telefono')[:LOTE])
+        if not lote:
+            return
+        for p in lote:
+            p.telefono_digitos = ''.join(c for c in p.telefono or '' if c.isdigit())
+            p.telefono_invertido = p.telefono_digitos[::-1]
+        Propietario._default_manager.bulk_update(lote, ['telefono_digitos', 'telefono_invertido'])
+        ultimo = lote[-1].pk
+
+
+class Migration(migrations.Migration):
+    # El relleno va por lotes fuera de una única transacción
+    atomic = False
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0017_historialmedicoarchivado_codigos_codigoclinico_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propietario',
+            name='telefono_digitos',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='propietario',
+            name='telefono_invertido',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='propietario',
+            index=models.Index(fields=['telefono_digitos'], name='GestionVete_telefon_7e69f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propietario',
+            index=models.Index(fields=['telefono_invertido'], name='GestionVete_telefon_31219c_idx'),
+        ),
+        migrations.RunPython(normalizar_telefonos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+LOTE = 1000
+
+
+def registrar_existentes(apps, schema_editor):
+    # Una fila "u" por objeto ya existente: así desde=0 trae todo. Por lotes de pk creciente.
+    Cambio = apps.get_model('GestionVeterinaria_app', 'Cambio')
+    ahora = django.utils.timezone.now()
+    for nombre in ('propietario', 'paciente', 'cita', 'historialmedico'):
+        modelo = apps.get_model('GestionVeterinaria_app', nombre)
+        vigentes = modelo._default_manager.all()
+        if nombre in ('propietario', 'paciente'):
+            vigentes = vigentes.filter(eliminado_en__isnull=True)
+        ultimo = 0
+        while True:
+            pks = list(vigentes.filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:LOTE])
+            if not pks:
+                break
+            Cambio.objects.bulk_create([Cambio(modelo=nombre, objeto_id=pk, accion='u', fecha=ahora) for pk in pks])
+            ultimo = pks[-1]
+
+class Migration(migrations.Migration):
+    # El relleno va por lotes fuera de una única transacción
+    atomic = False
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0018_propietario_telefono_digitos_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=50)),
+                ('objeto_id', models.BigIntegerField()),
+                ('accion', models.CharField(choices=[('u', 'Alta o cambio'), ('b', 'Baja'), ('corte', 'Corte de compactación')], max_length=5)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Cambio',
+                'verbose_name_plural': 'Cambios',
+                'default_permissions': (),
+                'indexes': [models.Index(fields=['modelo', 'objeto_id'], name='GestionVete_modelo_83ad4e_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0019_cambio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaVencimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('tipo', models.CharField(choices=[('vacuna', 'Vacuna'), ('desparasitacion', 'Desparasitación'), ('control', 'Control')], max_length=15)),
+                ('especie', models.CharField(blank=True, help_text='Vacío: todas las especies.', max_length=50)),
+                ('edad_dias', models.PositiveIntegerField(blank=True, help_text='Primera vez: días de vida. Vacío: no vence si nunca se hizo.', null=True)),
+                ('intervalo_dias', models.PositiveIntegerField(blank=True, help_text='Días desde la última vez. Vacío: se hace una sola vez.', null=True)),
+                ('aviso_dias', models.PositiveSmallIntegerField(default=14, help_text='Días de anticipación del recordatorio.')),
+                ('activa', models.BooleanField(default=True)),
+                ('codigo', models.ForeignKey(blank=True, help_text='Tratamiento que cuenta como aplicación. Vacío: cualquier consulta.', limit_choices_to={'tipo': 'tratamiento'}, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reglas_vencimiento', to='GestionVeterinaria_app.codigoclinico')),
+            ],
+            options={
+                'verbose_name': 'Regla de vencimiento',
+                'verbose_name_plural': 'Reglas de vencimiento',
+                'default_permissions': ('add', 'change', 'delete', 'view'),
+            },
+        ),
+        migrations.CreateModel(
+            name='Vencimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vence', models.DateField()),
+                ('ultima', models.DateField(blank=True, null=True)),
+                ('avisado_en', models.DateTimeField(blank=True, null=True)),
+                ('calculado_en', models.DateTimeField()),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vencimientos', to='GestionVeterinaria_app.paciente')),
+                ('regla', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vencimientos', to='GestionVeterinaria_app.reglavencimiento')),
+            ],
+            options={
+                'verbose_name': 'Vencimiento',
+                'verbose_name_plural': 'Vencimientos',
+                'default_permissions': ('view',),
+                'indexes': [models.Index(fields=['vence', 'avisado_en'], name='GestionVete_vence_4de180_idx')],
+                'constraints': [models.UniqueConstraint(fields=('paciente', 'regla'), name='vencimiento_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0020_reglavencimiento_vencimiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AusenciaVeterinario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('desde', models.DateField()),
+                ('hasta', models.DateField()),
+                ('motivo', models.CharField(blank=True, max_length=200)),
+                ('creada_en', models.DateTimeField(auto_now_add=True)),
+                ('reprogramada_en', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('veterinario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ausencias', to='GestionVeterinaria_app.veterinario')),
+            ],
+            options={
+                'verbose_name': 'Ausencia de veterinario',
+                'verbose_name_plural': 'Ausencias de veterinarios',
+                'default_permissions': ('add', 'change', 'delete', 'view'),
+                'indexes': [models.Index(fields=['veterinario', 'hasta', 'desde'], name='GestionVete_veterin_fc2aea_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('hasta__gte', models.F('desde'))), name='ausencia_rango_valido')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:43
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GestionVeterinaria_app', '0021_ausenciaveterinario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoAdjunto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('tamanio', models.BigIntegerField()),
+                ('tipo', models.CharField(max_length=100)),
+                ('miniatura', models.CharField(choices=[('pendiente', 'Pendiente'), ('lista', 'Lista'), ('sin_vista', 'Sin vista previa'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo adjunto',
+                'verbose_name_plural': 'Archivos adjuntos',
+                'default_permissions': ('view',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Adjunto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=255)),
+                ('subido_en', models.DateTimeField(auto_now_add=True)),
+                ('historial', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='adjuntos', to='GestionVeterinaria_app.historialmedico')),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adjuntos', to='GestionVeterinaria_app.paciente')),
+                ('subido_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('archivo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='adjuntos', to='GestionVeterinaria_app.archivoadjunto')),
+            ],
+            options={
+                'verbose_name': 'Adjunto',
+                'verbose_name_plural': 'Adjuntos',
+                'default_permissions': ('delete', 'view'),
+                'indexes': [models.Index(fields=['historial', 'subido_en'], name='GestionVete_histori_18e831_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubidaAdjunto',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255)),
+                ('tamanio', models.BigIntegerField()),
+                ('recibido', models.BigIntegerField(default=0)),
+                ('creada_en', models.DateTimeField(auto_now_add=True)),
+                ('actualizada_en', models.DateTimeField(auto_now=True)),
+                ('historial', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='GestionVeterinaria_app.historialmedico')),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='GestionVeterinaria_app.paciente')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'default_permissions': (),
+                'indexes': [models.Index(fields=['actualizada_en'], name='GestionVete_actuali_8f09b7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+"""
+Miniaturas de adjuntos.
+
+Corre en los procesos del pool de adjuntos.py: no importa Django ni toca la
+base, solo lee el original y escribe la miniatura (JPEG) al lado. Pillow
+(imágenes) y PyMuPDF (primera página de los PDF) son opcionales: sin ellos el
+adjunto queda sin vista previa.
+"""
+import os
+
+try:
+    from PIL import Image
+except ImportError:  # opcional: sin Pillow no hay miniaturas de imágenes
+    Image = None
+
+try:
+    import fitz
+except ImportError:  # opcional: sin PyMuPDF no hay vista previa de PDF
+    fitz = None
+
+LADO = 320
+CALIDAD = 80
+
+
+def _imagen(origen, temporal, lado):
+    with Image.open(origen) as img:
+        img.draft("RGB", (lado, lado))  # JPEG: decodifica ya reducido, sin la imagen completa en memoria
+        img = img.convert("RGB")
+        img.thumbnail((lado, lado))
+        img.save(temporal, "JPEG", quality=CALIDAD)
+
+
+def _pdf(origen, temporal, lado):
+    with fitz.open(origen) as doc:
+        if not doc.page_count:
+            return False
+        pagina = doc[0]
+        escala = lado / max(pagina.rect.width, pagina.rect.height)
+        pixmap = pagina.get_pixmap(matrix=fitz.Matrix(escala, escala), alpha=False)
+        with open(temporal, "wb") as f:
+            f.write(pixmap.tobytes("jpeg", jpg_quality=CALIDAD))
+    return True
+
+
+def generar(origen, destino, tipo, lado=LADO):
+    """Escribe la miniatura de `origen` en `destino`. Devuelve el estado: 'lista' o 'sin_vista'."""
+    if tipo.startswith("image/") and Image is not None:
+        generador = _imagen
+    elif tipo == "application/pdf" and fitz is not None:
+        generador = _pdf
+    else:
+        return "sin_vista"
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    try:
+        if generador(origen, temporal, lado) is False:
+            return "sin_vista"
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return "lista"
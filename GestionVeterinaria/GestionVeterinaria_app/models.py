@@ -1,145 +1,745 @@
-from django.db import models
-from django.conf import settings
-from django.utils import timezone
-
-class Paciente(models.Model):
-    SEXO_CHOICES = [
-        ('M', 'Macho'),
-        ('H', 'Hembra'),
-    ]
-
-    nombre = models.CharField(max_length=100)
-    apellido = models.CharField(max_length=100)
-    especie = models.CharField(max_length=50)
-    raza = models.CharField(max_length=50, blank=True, null=True)
-    sexo = models.CharField(max_length=1, choices=SEXO_CHOICES)
-    fecha_nacimiento = models.DateField()
-    informacion_medica = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    propietario = models.ForeignKey(
-        'Propietario',
-        on_delete=models.CASCADE,
-        related_name='pacientes'
-    )
-
-    class Meta:
-        default_permissions = ("add", "change", "delete", "view")
-        permissions = [
-            ("view_health_stats", "Puede ver estadísticas de salud"),
-            ("export_reports", "Puede exportar reportes"),
-        ]
-        verbose_name = "Paciente"
-        verbose_name_plural = "Pacientes"
-
-    def __str__(self):
-        return f"{self.nombre} ({self.especie})"
-
-
-class Propietario(models.Model):
-    nombre = models.CharField(max_length=100)
-    apellido = models.CharField(max_length=100)
-    direccion = models.TextField()
-    telefono = models.CharField(max_length=20)
-    email = models.EmailField(unique=True)
-
-    class Meta:
-        default_permissions = ("add", "change", "delete", "view")
-        verbose_name = "Propietario"
-        verbose_name_plural = "Propietarios"
-
-    def __str__(self):
-        return f"{self.nombre} {self.apellido}"
-
-
-class HistorialMedico(models.Model):
-    fecha_consulta = models.DateTimeField()
-    diagnostico = models.TextField()
-    tratamiento = models.TextField()
-    nota_veterinaria = models.TextField(blank=True, null=True)
-    paciente = models.ForeignKey(
-        'Paciente',
-        on_delete=models.CASCADE,
-        related_name='historial_medico'
-    )
-    cita = models.OneToOneField('Cita', on_delete=models.CASCADE, related_name='atencion', null=True, blank=True)
-    
-    class Meta:
-        default_permissions = ("add", "change", "delete", "view")
-        verbose_name = "Historial médico"
-        verbose_name_plural = "Historiales médicos"
-
-    def __str__(self):
-        return f"Consulta de {self.paciente.nombre} - {self.fecha_consulta.strftime('%Y-%m-%d')}"
-
-
-class Veterinario(models.Model):
-    nombre = models.CharField(max_length=100)
-    apellido = models.CharField(max_length=100)
-    especialidad = models.CharField(max_length=200)
-    rol = models.ForeignKey('Rol', on_delete=models.CASCADE, related_name='veterinarios')
-
-    # nuevo: vínculo 1 a 1 con el usuario del sistema
-    user = models.OneToOneField(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
-        related_name='perfil_veterinario',
-        null=True,
-        blank=True,
-        help_text="Usuario del sistema asociado a este veterinario (opcional)."
-    )
-
-    class Meta:
-        default_permissions = ("add", "change", "delete", "view")
-        verbose_name = "Veterinario"
-        verbose_name_plural = "Veterinarios"
-
-    def __str__(self):
-        return f"{self.nombre} {self.apellido} - {self.especialidad}"
-
-
-class Administrativo(models.Model):
-    nombre = models.CharField(max_length=100)
-    apellido = models.CharField(max_length=100)
-    rol = models.ForeignKey('Rol', on_delete=models.CASCADE, related_name='personal_administrativo')
-    contacto = models.CharField(max_length=150)  # Puede incluir teléfono, correo o ambos
-
-    class Meta:
-        default_permissions = ("add", "change", "delete", "view")
-        verbose_name = "Administrativo"
-        verbose_name_plural = "Administrativos"
-
-    def __str__(self):
-        return f"{self.nombre} {self.apellido}"
-
-
-class Cita(models.Model):
-    ESTADO_CHOICES = [
-        ('programada', 'Programada'),
-        ('atendida', 'Atendida'),
-        ('cancelada', 'Cancelada'),
-    ]
-
-    fecha_hora = models.DateTimeField()
-    veterinario = models.ForeignKey('Veterinario', on_delete=models.CASCADE, related_name='citas')
-    paciente = models.ForeignKey('Paciente', on_delete=models.CASCADE, related_name='citas')
-    administrativo = models.ForeignKey('Administrativo', on_delete=models.CASCADE, related_name='citas')
-    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default='programada')
-
-    def __str__(self):
-        return f"Cita el {self.fecha_hora} - Veterinario: {self.veterinario.nombre} {self.veterinario.apellido}"
-
-
-
-
-
-
-class Rol(models.Model):
-    descripcion = models.CharField(max_length=100, unique=True)
-
-    class Meta:
-        default_permissions = ("add", "change", "delete", "view")
-        verbose_name = "Rol"
-        verbose_name_plural = "Roles"
-
-    def __str__(self):
+import contextvars
+import uuid
+
+from django.db import models, router, transaction
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from datetime import time
+
+
+class VigentesManager(models.Manager):
+    """Excluye los registros dados de baja (se purgan por lotes en segundo plano)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(eliminado_en__isnull=True)
+
+
+# ------------------------------
+# Sucursales
+# ------------------------------
+# Sucursal activa del request (ver sucursales.py): un id, None (todas) o una
+# función que lo resuelve la primera vez que se consulta.
+_sucursal_activa = contextvars.ContextVar("sucursal_activa", default=None)
+
+
+def sucursal_activa_id():
+    valor = _sucursal_activa.get()
+    return valor() if callable(valor) else valor
+
+
+class PorSucursalManager(models.Manager):
+    """Limita a la sucursal activa (si hay una). Sin sucursal activa: todo."""
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        sucursal_id = sucursal_activa_id()
+        return qs if sucursal_id is None else qs.filter(sucursal_id=sucursal_id)
+
+
+class Sucursal(models.Model):
+    nombre = models.CharField(max_length=100, unique=True)
+    direccion = models.TextField(blank=True)
+    jornada_inicio = models.TimeField(default=time(9, 0))
+    jornada_fin = models.TimeField(default=time(18, 0))
+    intervalo_min = models.PositiveSmallIntegerField(default=30, help_text="Duración de cada turno, en minutos.")
+
+    class Meta:
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Sucursal"
+        verbose_name_plural = "Sucursales"
+
+    def __str__(self):
+        return self.nombre
+
+
+class ConflictoVersion(Exception):
+    """El registro cambió (o se borró) desde que se leyó: el UPDATE condicional no encontró la fila."""
+
+    def __init__(self, instance):
+        self.instance = instance
+        super().__init__(f"{type(instance).__name__} #{instance.pk} fue modificado por otro usuario.")
+
+
+class Versionado(models.Model):
+    """
+    Bloqueo optimista: cada UPDATE lleva `WHERE version = <leída>` y suma uno.
+    Si no afecta filas es que otro lo guardó (o borró) antes: ConflictoVersion.
+    No hace lecturas extra; las escrituras en bloque con update() tienen que
+    subir la versión a mano (F("version") + 1).
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Savepoint propio: un ConflictoVersion dentro de una transacción más
+        # grande (admin, atender_cita) no la deja marcada para rollback
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Alta con pk explícita, o sin la versión cargada (.only()/.defer()): comportamiento normal
+        if self._state.adding or "version" in self.get_deferred_fields():
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        campo = self._meta.get_field("version")
+        leida = self.version
+        values = [v for v in values if v[0] is not campo] + [(campo, None, leida + 1)]
+        if base_qs.filter(pk=pk_val, version=leida)._update(values) == 0:
+            raise ConflictoVersion(self)
+        self.version = leida + 1
+        return True
+
+
+class Paciente(Versionado):
+    SEXO_CHOICES = [
+        ('M', 'Macho'),
+        ('H', 'Hembra'),
+    ]
+
+    nombre = models.CharField(max_length=100)
+    apellido = models.CharField(max_length=100)
+    especie = models.CharField(max_length=50)
+    raza = models.CharField(max_length=50, blank=True, null=True)
+    sexo = models.CharField(max_length=1, choices=SEXO_CHOICES)
+    fecha_nacimiento = models.DateField()
+    informacion_medica = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    eliminado_en = models.DateTimeField(blank=True, null=True, editable=False)
+    propietario = models.ForeignKey(
+        'Propietario',
+        on_delete=models.CASCADE,
+        related_name='pacientes'
+    )
+
+    objects = VigentesManager()
+    todos = models.Manager()
+
+    class Meta:
+        default_manager_name = "todos"
+        default_permissions = ("add", "change", "delete", "view")
+        permissions = [
+            ("view_health_stats", "Puede ver estadísticas de salud"),
+            ("export_reports", "Puede exportar reportes"),
+        ]
+        verbose_name = "Paciente"
+        verbose_name_plural = "Pacientes"
+
+    def __str__(self):
+        return f"{self.nombre} ({self.especie})"
+
+
+def solo_digitos(telefono):
+    """'(011) 4555-1234' -> '01145551234'."""
+    return "".join(c for c in telefono or "" if c.isdigit())
+
+
+class Propietario(Versionado):
+    nombre = models.CharField(max_length=100)
+    apellido = models.CharField(max_length=100)
+    direccion = models.TextField()
+    telefono = models.CharField(max_length=20)
+    email = models.EmailField(unique=True)
+    eliminado_en = models.DateTimeField(blank=True, null=True, editable=False)
+    # Teléfono normalizado para la búsqueda por llamada entrante (ver llamadas.py):
+    # solo dígitos, y los mismos al revés para buscar por sufijo con el índice
+    telefono_digitos = models.CharField(max_length=20, blank=True, editable=False)
+    telefono_invertido = models.CharField(max_length=20, blank=True, editable=False)
+
+    objects = VigentesManager()
+    todos = models.Manager()
+
+    class Meta:
+        default_manager_name = "todos"
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Propietario"
+        verbose_name_plural = "Propietarios"
+        indexes = [
+            models.Index(fields=["telefono_digitos"]),
+            models.Index(fields=["telefono_invertido"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.telefono_digitos = solo_digitos(self.telefono)
+        self.telefono_invertido = self.telefono_digitos[::-1]
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "telefono" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "telefono_digitos", "telefono_invertido"}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.nombre} {self.apellido}"
+
+
+class HistorialMedico(Versionado):
+    fecha_consulta = models.DateTimeField()
+    diagnostico = models.TextField()
+    tratamiento = models.TextField()
+    nota_veterinaria = models.TextField(blank=True, null=True)
+    paciente = models.ForeignKey(
+        'Paciente',
+        on_delete=models.CASCADE,
+        related_name='historial_medico'
+    )
+    cita = models.OneToOneField('Cita', on_delete=models.CASCADE, related_name='atencion', null=True, blank=True)
+    # Codificación estructurada (ver catalogo.py), junto al texto libre
+    diagnosticos = models.ManyToManyField(
+        'CodigoClinico', blank=True, related_name='historiales_diagnostico',
+        limit_choices_to={'tipo': 'diagnostico'},
+    )
+    tratamientos = models.ManyToManyField(
+        'CodigoClinico', blank=True, related_name='historiales_tratamiento',
+        limit_choices_to={'tipo': 'tratamiento'},
+    )
+
+    class Meta:
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Historial médico"
+        verbose_name_plural = "Historiales médicos"
+        indexes = [
+            models.Index(fields=["paciente", "fecha_consulta"]),
+        ]
+
+    def __str__(self):
+        # Solo columnas propias: el admin lo usa de etiqueta (raw_id_fields) sin JOIN
+        return f"Consulta #{self.pk} - paciente #{self.paciente_id} - {self.fecha_consulta:%Y-%m-%d}"
+
+
+# ------------------------------
+# Catálogo clínico
+# ------------------------------
+# Diagnósticos y tratamientos codificados. Los historiales los referencian
+# por M2M (las tablas intermedias quedan indexadas por ambos lados), así
+# "casos de parvovirus en el trimestre" es un JOIN por código y no un LIKE
+# sobre el texto libre. El autocompletado usa un trie en memoria (catalogo.py).
+
+class CodigoClinico(models.Model):
+    TIPO_CHOICES = [
+        ('diagnostico', 'Diagnóstico'),
+        ('tratamiento', 'Tratamiento'),
+    ]
+
+    tipo = models.CharField(max_length=11, choices=TIPO_CHOICES)
+    codigo = models.CharField(max_length=20, unique=True)
+    nombre = models.CharField(max_length=150)
+    sinonimos = models.TextField(blank=True, help_text="Uno por línea; también se usan para autocompletar y codificar.")
+    activo = models.BooleanField(default=True)
+
+    class Meta:
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Código clínico"
+        verbose_name_plural = "Catálogo clínico"
+        indexes = [
+            models.Index(fields=["tipo", "nombre"]),
+        ]
+
+    def lista_sinonimos(self):
+        return [s.strip() for s in self.sinonimos.splitlines() if s.strip()]
+
+    def __str__(self):
+        return f"{self.codigo} · {self.nombre}"
+
+
+class Veterinario(models.Model):
+    nombre = models.CharField(max_length=100)
+    apellido = models.CharField(max_length=100)
+    especialidad = models.CharField(max_length=200)
+    rol = models.ForeignKey('Rol', on_delete=models.CASCADE, related_name='veterinarios')
+    sucursal = models.ForeignKey('Sucursal', on_delete=models.PROTECT, related_name='veterinarios', null=True, blank=True)
+
+    # nuevo: vínculo 1 a 1 con el usuario del sistema
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='perfil_veterinario',
+        null=True,
+        blank=True,
+        help_text="Usuario del sistema asociado a este veterinario (opcional)."
+    )
+
+    objects = PorSucursalManager()
+    todos = models.Manager()
+
+    class Meta:
+        default_manager_name = "todos"
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Veterinario"
+        verbose_name_plural = "Veterinarios"
+        indexes = [
+            models.Index(fields=["sucursal", "apellido", "nombre"]),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} {self.apellido} - {self.especialidad}"
+
+
+class Administrativo(models.Model):
+    nombre = models.CharField(max_length=100)
+    apellido = models.CharField(max_length=100)
+    rol = models.ForeignKey('Rol', on_delete=models.CASCADE, related_name='personal_administrativo')
+    contacto = models.CharField(max_length=150)  # Puede incluir teléfono, correo o ambos
+    sucursal = models.ForeignKey('Sucursal', on_delete=models.PROTECT, related_name='administrativos', null=True, blank=True)
+
+    objects = PorSucursalManager()
+    todos = models.Manager()
+
+    class Meta:
+        default_manager_name = "todos"
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Administrativo"
+        verbose_name_plural = "Administrativos"
+
+    def __str__(self):
+        return f"{self.nombre} {self.apellido}"
+
+
+class Cita(Versionado):
+    ESTADO_CHOICES = [
+        ('programada', 'Programada'),
+        ('atendida', 'Atendida'),
+        ('cancelada', 'Cancelada'),
+    ]
+
+    fecha_hora = models.DateTimeField()
+    veterinario = models.ForeignKey('Veterinario', on_delete=models.CASCADE, related_name='citas')
+    paciente = models.ForeignKey('Paciente', on_delete=models.CASCADE, related_name='citas')
+    administrativo = models.ForeignKey('Administrativo', on_delete=models.CASCADE, related_name='citas')
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default='programada')
+    # Versión de la fila: forma parte de la clave de los fragmentos cacheados de la agenda
+    updated_at = models.DateTimeField(auto_now=True)
+    # Copia de la sucursal del veterinario: las consultas por sucursal no hacen JOIN
+    sucursal = models.ForeignKey('Sucursal', on_delete=models.PROTECT, related_name='citas', null=True, blank=True, editable=False)
+
+    objects = PorSucursalManager()
+    todas = models.Manager()
+
+    class Meta:
+        default_manager_name = "todas"
+        indexes = [
+            models.Index(fields=["sucursal", "fecha_hora"]),
+            models.Index(fields=["sucursal", "estado", "fecha_hora"]),
+            models.Index(fields=["paciente", "fecha_hora"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Cita nueva o que cambia de veterinario: toma la sucursal del veterinario
+        if self.veterinario_id and (
+            self.sucursal_id is None
+            or self.veterinario_id != getattr(self, "_veterinario_original_id", self.veterinario_id)
+        ):
+            self.sucursal_id = self.veterinario.sucursal_id
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "sucursal"}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        # Solo columnas propias: el admin lo usa de etiqueta (raw_id_fields) sin JOIN
+        fecha = f"{timezone.localtime(self.fecha_hora):%d/%m/%Y %H:%M}" if self.fecha_hora else "sin fecha"
+        return f"Cita #{self.pk} el {fecha} - veterinario #{self.veterinario_id}"
+
+
+# ------------------------------
+# Lista de espera
+# ------------------------------
+# Pacientes que esperan un turno dentro de una ventana de días/horas, con
+# veterinarios preferidos (ninguno = cualquiera). Cuando se libera un
+# horario (cita cancelada o reprogramada) lista_espera.py busca el mejor
+# candidato: primero en la fila (creada_en) cuyas preferencias lo cubran.
+
+class ListaEspera(models.Model):
+    ESTADO_CHOICES = [
+        ('esperando', 'Esperando'),
+        ('asignada', 'Asignada'),
+        ('vencida', 'Vencida'),
+    ]
+
+    paciente = models.ForeignKey('Paciente', on_delete=models.CASCADE, related_name='lista_espera')
+    veterinarios = models.ManyToManyField(
+        'Veterinario', blank=True, related_name='lista_espera',
+        help_text="Veterinarios preferidos. Vacío: cualquiera.",
+    )
+    desde = models.DateField()
+    hasta = models.DateField()
+    hora_desde = models.TimeField(default=time(9, 0))
+    hora_hasta = models.TimeField(default=time(18, 0))
+    auto_reservar = models.BooleanField(
+        default=False,
+        help_text="Si está activo se reserva el turno directamente; si no, se le ofrece por correo.",
+    )
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='esperando')
+    cita = models.ForeignKey('Cita', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    ultimo_aviso = models.DateTimeField(null=True, blank=True, editable=False)
+    creada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Lista de espera"
+        verbose_name_plural = "Lista de espera"
+        indexes = [
+            # El matcher filtra por estado y rango de días, y desempata por antigüedad
+            models.Index(fields=["estado", "desde", "hasta", "creada_en"]),
+            models.Index(fields=["paciente", "estado"]),
+        ]
+
+    def __str__(self):
+        return f"Paciente #{self.paciente_id} ({self.desde:%d/%m}–{self.hasta:%d/%m})"
+
+
+# ------------------------------
+# Ausencias de veterinarios
+# ------------------------------
+# Días (desde–hasta, inclusive) en que un veterinario no atiende: no ofrece
+# turnos y sus citas programadas se reprograman en bloque (ver ausencias.py).
+
+class AusenciaVeterinario(models.Model):
+    veterinario = models.ForeignKey('Veterinario', on_delete=models.CASCADE, related_name='ausencias')
+    desde = models.DateField()
+    hasta = models.DateField()
+    motivo = models.CharField(max_length=200, blank=True)
+    creada_en = models.DateTimeField(auto_now_add=True)
+    # Última vez que se aplicó la reprogramación de sus citas
+    reprogramada_en = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Ausencia de veterinario"
+        verbose_name_plural = "Ausencias de veterinarios"
+        constraints = [
+            models.CheckConstraint(condition=models.Q(hasta__gte=models.F("desde")), name="ausencia_rango_valido"),
+        ]
+        indexes = [
+            models.Index(fields=["veterinario", "hasta", "desde"]),
+        ]
+
+    def __str__(self):
+        return f"Veterinario #{self.veterinario_id} ({self.desde:%d/%m}–{self.hasta:%d/%m})"
+
+
+# ------------------------------
+# Vencimientos (vacunas, refuerzos y controles)
+# ------------------------------
+# Cada regla dice cuándo le toca algo a un paciente de la especie: a los
+# `edad_dias` de vida si nunca se hizo, y cada `intervalo_dias` desde la
+# última vez. "La última vez" es la última consulta con el tratamiento
+# `codigo`, o la última consulta de cualquier tipo si la regla no tiene
+# código (controles). vencimientos.py calcula todas las reglas para todos
+# los pacientes en bloque y deja el resultado en Vencimiento, una fila por
+# (paciente, regla), que se refresca cada noche y alimenta los recordatorios.
+
+class ReglaVencimiento(models.Model):
+    TIPO_CHOICES = [
+        ('vacuna', 'Vacuna'),
+        ('desparasitacion', 'Desparasitación'),
+        ('control', 'Control'),
+    ]
+
+    nombre = models.CharField(max_length=100)
+    tipo = models.CharField(max_length=15, choices=TIPO_CHOICES)
+    especie = models.CharField(max_length=50, blank=True, help_text="Vacío: todas las especies.")
+    codigo = models.ForeignKey(
+        'CodigoClinico', on_delete=models.PROTECT, null=True, blank=True, related_name='reglas_vencimiento',
+        limit_choices_to={'tipo': 'tratamiento'},
+        help_text="Tratamiento que cuenta como aplicación. Vacío: cualquier consulta.",
+    )
+    edad_dias = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Primera vez: días de vida. Vacío: no vence si nunca se hizo.",
+    )
+    intervalo_dias = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Días desde la última vez. Vacío: se hace una sola vez.",
+    )
+    aviso_dias = models.PositiveSmallIntegerField(default=14, help_text="Días de anticipación del recordatorio.")
+    activa = models.BooleanField(default=True)
+
+    class Meta:
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Regla de vencimiento"
+        verbose_name_plural = "Reglas de vencimiento"
+
+    def __str__(self):
+        return f"{self.nombre} ({self.especie or 'todas'})"
+
+
+class Vencimiento(models.Model):
+    paciente = models.ForeignKey('Paciente', on_delete=models.CASCADE, related_name='vencimientos')
+    regla = models.ForeignKey('ReglaVencimiento', on_delete=models.CASCADE, related_name='vencimientos')
+    vence = models.DateField()
+    ultima = models.DateField(null=True, blank=True)
+    avisado_en = models.DateTimeField(null=True, blank=True)
+    calculado_en = models.DateTimeField()
+
+    class Meta:
+        default_permissions = ("view",)
+        verbose_name = "Vencimiento"
+        verbose_name_plural = "Vencimientos"
+        constraints = [
+            models.UniqueConstraint(fields=["paciente", "regla"], name="vencimiento_unico"),
+        ]
+        indexes = [
+            # Listado por fecha y recordatorios pendientes
+            models.Index(fields=["vence", "avisado_en"]),
+        ]
+
+    def __str__(self):
+        return f"Regla #{self.regla_id} de paciente #{self.paciente_id}: {self.vence:%d/%m/%Y}"
+
+
+# ------------------------------
+# Auditoría
+# ------------------------------
+# Registro de solo-agregado de los cambios campo a campo en citas, historial
+# médico, pacientes y propietarios (ver auditoria.py). `cambios` guarda
+# {campo: [antes, después]}. Se consulta por (modelo, objeto_id, fecha).
+
+class RegistroAuditoria(models.Model):
+    ACCION_CHOICES = [
+        ('alta', 'Alta'),
+        ('cambio', 'Cambio'),
+        ('baja', 'Baja'),
+        ('fusion', 'Fusión'),
+    ]
+
+    modelo = models.CharField(max_length=50)
+    objeto_id = models.BigIntegerField()
+    accion = models.CharField(max_length=6, choices=ACCION_CHOICES)
+    cambios = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    fecha = models.DateTimeField(default=timezone.now)
+    # Sin constraint: el registro sobrevive aunque se borre el usuario
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='+',
+    )
+    usuario_nombre = models.CharField(max_length=150, blank=True)
+    ruta = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        default_permissions = ("view",)
+        verbose_name = "Registro de auditoría"
+        verbose_name_plural = "Registros de auditoría"
+        indexes = [
+            models.Index(fields=["modelo", "objeto_id", "fecha"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_accion_display()} {self.modelo} #{self.objeto_id} ({self.fecha:%d/%m/%Y %H:%M})"
+
+
+# ------------------------------
+# Registro de cambios (sincronización)
+# ------------------------------
+# Una fila por alta/cambio/baja de cita, historial, paciente o propietario
+# (ver cambios.py). `id` es la secuencia: los clientes piden "lo posterior a
+# N". No guarda datos, solo qué objeto cambió; el feed lee el estado actual.
+# compactar_cambios deja una fila por objeto y vence las bajas viejas.
+
+class Cambio(models.Model):
+    ACCION_CHOICES = [
+        ('u', 'Alta o cambio'),
+        ('b', 'Baja'),
+        ('corte', 'Corte de compactación'),
+    ]
+
+    modelo = models.CharField(max_length=50)
+    objeto_id = models.BigIntegerField()
+    accion = models.CharField(max_length=5, choices=ACCION_CHOICES)
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        default_permissions = ()
+        verbose_name = "Cambio"
+        verbose_name_plural = "Cambios"
+        indexes = [
+            models.Index(fields=["modelo", "objeto_id"]),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_accion_display()} {self.modelo} #{self.objeto_id}"
+
+
+# ------------------------------
+# Estadísticas de salud
+# ------------------------------
+# Contadores que se mantienen al guardar pacientes e historiales (ver
+# salud.py): el tablero lee solo estas filas, una por combinación. Para
+# pacientes: especie, raza, sexo y franja de edad (por especie); para
+# historiales: diagnóstico por mes (`periodo` = "AAAA-MM").
+
+class AgregadoSalud(models.Model):
+    DIMENSION_CHOICES = [
+        ('especie', 'Especie'),
+        ('raza', 'Raza'),
+        ('sexo', 'Sexo'),
+        ('edad', 'Franja de edad'),
+        ('diagnostico', 'Diagnóstico'),
+    ]
+
+    dimension = models.CharField(max_length=11, choices=DIMENSION_CHOICES)
+    especie = models.CharField(max_length=50, blank=True)
+    clave = models.CharField(max_length=100)
+    periodo = models.CharField(max_length=7, blank=True)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        default_permissions = ()
+        verbose_name = "Agregado de salud"
+        verbose_name_plural = "Agregados de salud"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "especie", "clave", "periodo"], name="agregado_salud_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} {self.especie} {self.clave} {self.periodo}: {self.total}"
+
+
+# ------------------------------
+# Archivo histórico
+# ------------------------------
+# Copias de Cita / HistorialMedico antiguos que el comando archivar_historico
+# saca de las tablas calientes. Conservan el id original y las FK sin
+# constraint (DO_NOTHING): el archivo nunca bloquea ni participa en cascadas.
+
+class CitaArchivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    fecha_hora = models.DateTimeField()
+    veterinario = models.ForeignKey('Veterinario', on_delete=models.DO_NOTHING, db_constraint=False, related_name='citas_archivadas')
+    paciente = models.ForeignKey('Paciente', on_delete=models.DO_NOTHING, db_constraint=False, related_name='citas_archivadas')
+    administrativo = models.ForeignKey('Administrativo', on_delete=models.DO_NOTHING, db_constraint=False, related_name='citas_archivadas')
+    estado = models.CharField(max_length=12, choices=Cita.ESTADO_CHOICES)
+    sucursal = models.ForeignKey('Sucursal', on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    archivada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        default_permissions = ("view",)
+        verbose_name = "Cita archivada"
+        verbose_name_plural = "Citas archivadas"
+        indexes = [
+            models.Index(fields=["fecha_hora"]),
+            models.Index(fields=["paciente", "fecha_hora"]),
+            models.Index(fields=["sucursal", "fecha_hora"]),
+        ]
+
+    def __str__(self):
+        return f"Cita archivada el {self.fecha_hora}"
+
+
+class HistorialMedicoArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    fecha_consulta = models.DateTimeField()
+    diagnostico = models.TextField()
+    tratamiento = models.TextField()
+    nota_veterinaria = models.TextField(blank=True, null=True)
+    paciente = models.ForeignKey('Paciente', on_delete=models.DO_NOTHING, db_constraint=False, related_name='historial_archivado')
+    cita_id = models.BigIntegerField(blank=True, null=True)
+    # Códigos del catálogo (CodigoClinico.codigo) que tenía al archivarse
+    codigos = models.JSONField(default=list, blank=True)
+    archivado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        default_permissions = ("view",)
+        verbose_name = "Historial médico archivado"
+        verbose_name_plural = "Historiales médicos archivados"
+        indexes = [
+            models.Index(fields=["fecha_consulta"]),
+            models.Index(fields=["paciente", "fecha_consulta"]),
+        ]
+
+    def __str__(self):
+        return f"Consulta archivada - {self.fecha_consulta.strftime('%Y-%m-%d')}"
+
+
+# ------------------------------
+# Adjuntos del historial médico
+# ------------------------------
+# Radiografías, análisis en PDF, fotos. El contenido se guarda una sola vez
+# (ArchivoAdjunto, por SHA-256) en settings.ADJUNTOS_RAIZ; cada Adjunto es
+# ese contenido subido con un nombre a una atención. Como el archivo
+# histórico conserva el id de la atención, la FK no tiene constraint: los
+# adjuntos siguen valiendo después de archivar. Ver adjuntos.py.
+
+class ArchivoAdjunto(models.Model):
+    MINIATURA_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('lista', 'Lista'),
+        ('sin_vista', 'Sin vista previa'),
+        ('error', 'Error'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    tamanio = models.BigIntegerField()
+    # Detectado por el contenido, no el que manda el navegador
+    tipo = models.CharField(max_length=100)
+    miniatura = models.CharField(max_length=10, choices=MINIATURA_CHOICES, default='pendiente')
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        default_permissions = ("view",)
+        verbose_name = "Archivo adjunto"
+        verbose_name_plural = "Archivos adjuntos"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.tipo}, {self.tamanio} bytes)"
+
+
+class Adjunto(models.Model):
+    historial = models.ForeignKey(
+        'HistorialMedico', on_delete=models.DO_NOTHING, db_constraint=False, related_name='adjuntos',
+    )
+    paciente = models.ForeignKey('Paciente', on_delete=models.CASCADE, related_name='adjuntos')
+    archivo = models.ForeignKey('ArchivoAdjunto', on_delete=models.PROTECT, related_name='adjuntos')
+    nombre = models.CharField(max_length=255)
+    subido_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    subido_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        default_permissions = ("delete", "view")
+        verbose_name = "Adjunto"
+        verbose_name_plural = "Adjuntos"
+        indexes = [
+            models.Index(fields=["historial", "subido_en"]),
+        ]
+
+    def __str__(self):
+        return self.nombre
+
+
+class SubidaAdjunto(models.Model):
+    """Subida por partes en curso; los bytes recibidos están en el archivo parcial (ver adjuntos.py)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    historial = models.ForeignKey(
+        'HistorialMedico', on_delete=models.DO_NOTHING, db_constraint=False, related_name='+',
+    )
+    paciente = models.ForeignKey('Paciente', on_delete=models.CASCADE, related_name='+')
+    nombre = models.CharField(max_length=255)
+    tamanio = models.BigIntegerField()
+    recibido = models.BigIntegerField(default=0)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    creada_en = models.DateTimeField(auto_now_add=True)
+    actualizada_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        default_permissions = ()
+        indexes = [
+            models.Index(fields=["actualizada_en"]),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} ({self.recibido}/{self.tamanio})"
+
+
+
+
+
+
+class Rol(models.Model):
+    descripcion = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        default_permissions = ("add", "change", "delete", "view")
+        verbose_name = "Rol"
+        verbose_name_plural = "Roles"
+
+    def __str__(self):
         return self.descripcion
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Portal de autogestión para propietarios.
+
+El propietario se identifica con email + teléfono y recibe por correo un
+enlace con un token firmado (con vencimiento) que contiene solo su id: no
+hay cuentas ni sesión. Con ese token ve los turnos libres, reserva y cancela
+citas de sus mascotas. Las citas del portal quedan a nombre de un
+administrativo de sistema ("Portal web"). El portal es de toda la red: usa
+los managers sin filtro por sucursal (Cita.todas, Veterinario.todos).
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.mail import send_mail
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from . import disponibilidad
+from .models import Administrativo, Cita, Paciente, Propietario, Rol, Veterinario, solo_digitos
+
+SAL_TOKEN = "GestionVeterinaria_app.portal"
+TOKEN_MAX_EDAD = 60 * 60 * 24 * 30
+DIAS_RESERVABLES = 14
+MARGEN_RESERVA_MIN = 60
+MAX_CITAS_FUTURAS = 3
+DIGITOS_TELEFONO = 8
+
+_signer = signing.TimestampSigner(salt=SAL_TOKEN)
+
+
+class PortalError(Exception):
+    """Error de negocio que se le muestra tal cual al propietario."""
+
+
+# ------------------------------
+# Token
+# ------------------------------
+def token_para(propietario):
+    return _signer.sign(str(propietario.pk))
+
+
+def leer_token(token):
+    """Id del propietario, o None si el token no es válido o venció."""
+    try:
+        return int(_signer.unsign(token, max_age=TOKEN_MAX_EDAD))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def identificar(email, telefono):
+    """Propietario vigente cuyo email y teléfono coinciden (últimos dígitos), o None."""
+    propietario = Propietario.objects.filter(email__iexact=(email or "").strip()).first()
+    if propietario is None:
+        return None
+    dado = solo_digitos(telefono)[-DIGITOS_TELEFONO:]
+    guardado = propietario.telefono_digitos[-DIGITOS_TELEFONO:]
+    return propietario if dado and dado == guardado else None
+
+
+def enlace(propietario):
+    """URL absoluta del portal para el propietario (para correos fuera de un request)."""
+    return settings.SITIO_URL.rstrip("/") + reverse("portal:inicio", args=[token_para(propietario)])
+
+
+def avisar(propietario, asunto, texto):
+    """Correo al propietario con el enlace al portal al final (lista de espera, vencimientos)."""
+    return send_mail(
+        f"{asunto} · Veterinaria SHIBA",
+        f"Hola {propietario.nombre}:\n\n{texto}\n\n{enlace(propietario)}\n",
+        settings.DEFAULT_FROM_EMAIL,
+        [propietario.email],
+        fail_silently=True,
+    )
+
+
+# ------------------------------
+# Administrativo de sistema
+# ------------------------------
+def administrativo_sistema():
+    """Administrativo al que se asignan las citas reservadas desde el portal."""
+    pk = cache.get("portal:administrativo")
+    if pk is None:
+        rol, _ = Rol.objects.get_or_create(descripcion="Portal web")
+        admin, _ = Administrativo.todos.get_or_create(
+            nombre="Portal", apellido="Web", rol=rol,
+            defaults={"contacto": "Autogestión de propietarios"},
+        )
+        pk = admin.pk
+        cache.set("portal:administrativo", pk, None)
+    return pk
+
+
+# ------------------------------
+# Reservas
+# ------------------------------
+def dias_reservables():
+    hoy = timezone.localdate()
+    return [hoy + timedelta(days=i) for i in range(DIAS_RESERVABLES)]
+
+
+def turnos_libres(fecha):
+    """[(veterinario, [slots])] del día, solo horarios que todavía se pueden reservar."""
+    vets = list(Veterinario.todos.select_related("sucursal").order_by("sucursal__nombre", "apellido", "nombre"))
+    libres = disponibilidad.slots_libres([v.pk for v in vets], fecha)
+    return [
+        (v, disponibilidad.slots_futuros(libres[v.pk][fecha], fecha, MARGEN_RESERVA_MIN))
+        for v in vets
+    ]
+
+
+def citas_futuras(propietario):
+    return (
+        Cita.todas.filter(
+            paciente__propietario=propietario,
+            estado="programada",
+            fecha_hora__gte=timezone.now(),
+        )
+        .select_related("paciente", "veterinario")
+        .order_by("fecha_hora")
+    )
+
+
+def reservar(propietario, paciente_id, veterinario_id, fecha, hora):
+    """Crea la cita o levanta PortalError con el motivo."""
+    paciente = Paciente.objects.filter(propietario=propietario, pk=paciente_id).first()
+    if paciente is None:
+        raise PortalError("Elegí una de tus mascotas.")
+    if fecha not in dias_reservables():
+        raise PortalError("Solo se puede reservar para los próximos días.")
+    if citas_futuras(propietario).count() >= MAX_CITAS_FUTURAS:
+        raise PortalError(f"Ya tenés {MAX_CITAS_FUTURAS} citas programadas. Cancelá alguna para reservar otra.")
+
+    with transaction.atomic():
+        # Serializa las reservas del mismo veterinario (no-op en SQLite, que ya serializa escrituras)
+        vet = Veterinario.todos.select_for_update().filter(pk=veterinario_id).first()
+        if vet is None:
+            raise PortalError("Elegí un veterinario.")
+        libres = disponibilidad.slots_libres([vet.pk], fecha)[vet.pk][fecha]
+        if hora not in disponibilidad.slots_futuros(libres, fecha, MARGEN_RESERVA_MIN):
+            raise PortalError("Ese horario ya no está disponible.")
+
+        fecha_hora = timezone.make_aware(
+            datetime.combine(fecha, datetime.strptime(hora, "%H:%M").time()),
+            timezone.get_current_timezone(),
+        )
+        if Cita.todas.filter(veterinario=vet, fecha_hora=fecha_hora, estado="programada").exists():
+            raise PortalError("Ese horario ya no está disponible.")
+        return Cita.todas.create(
+            fecha_hora=fecha_hora,
+            veterinario=vet,
+            paciente=paciente,
+            administrativo_id=administrativo_sistema(),
+        )
+
+
+def cancelar(propietario, cita_id):
+    cita = citas_futuras(propietario).filter(pk=cita_id).first()
+    if cita is None:
+        raise PortalError("No encontramos esa cita.")
+    cita.estado = "cancelada"
+    cita.save()
+    return cita
@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import portal_views
+
+# Portal de propietarios: se incluye bajo /portal/ (ver GestionVeterinaria/urls.py)
+app_name = "portal"
+
+urlpatterns = [
+    path('', portal_views.acceso, name='acceso'),
+    path('<str:token>/', portal_views.inicio, name='inicio'),
+    path('<str:token>/turnos/', portal_views.disponibilidad, name='disponibilidad'),
+    path('<str:token>/reservar/', portal_views.reservar, name='reservar'),
+    path('<str:token>/cita/<int:cita_id>/cancelar/', portal_views.cancelar, name='cancelar'),
+]
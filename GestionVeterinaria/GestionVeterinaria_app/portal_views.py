@@ -0,0 +1,139 @@
+"""
+Vistas del portal de propietarios (/portal/).
+
+Separadas de las vistas del personal: no usan sesión ni usuario (el token
+va en la URL), tienen su propia plantilla base liviana y límites de tasa por
+IP y por propietario, así que se pueden escalar o limitar aparte del resto
+(todo cuelga del prefijo /portal/).
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_POST
+
+from . import portal
+from .models import Paciente, Propietario
+from .ratelimit import consumir, limitar, por_valor
+
+
+def _por_propietario(request, token=None, **kwargs):
+    return por_valor(token)
+
+
+def _propietario_o_404(token):
+    pk = portal.leer_token(token)
+    propietario = Propietario.objects.filter(pk=pk).first() if pk else None
+    if propietario is None:
+        raise Http404("Enlace inválido o vencido.")
+    return propietario
+
+
+@limitar("portal:acceso", capacidad=5, por_minuto=2, metodos={"POST"})
+def acceso(request):
+    """
+    Pide email + teléfono y, si coinciden con un propietario, le manda el enlace
+    por correo. La respuesta es siempre la misma (no revela si el email existe).
+    """
+    enviado, enlace = False, None
+    if request.method == "POST":
+        email = request.POST.get("email", "").strip()
+        propietario = portal.identificar(email, request.POST.get("telefono", ""))
+        # Máximo 3 correos por hora a la misma dirección
+        if propietario and consumir(f"portal:mail:{por_valor(email.lower())}", 3, 3 / 60)[0]:
+            enlace = request.build_absolute_uri(reverse("portal:inicio", args=[portal.token_para(propietario)]))
+            send_mail(
+                "Tus citas en Veterinaria SHIBA",
+                f"Hola {propietario.nombre}:\n\nDesde este enlace podés reservar y cancelar "
+                f"citas para tus mascotas:\n\n{enlace}\n\nEl enlace vence en 30 días.",
+                settings.DEFAULT_FROM_EMAIL,
+                [propietario.email],
+                fail_silently=True,
+            )
+        enviado = True
+
+    return render(request, "GestionVeterinaria_app/portal/acceso.html", {
+        "enviado": enviado,
+        # En desarrollo se muestra el enlace para no depender del correo
+        "enlace": enlace if settings.DEBUG else None,
+    })
+
+
+def inicio(request, token):
+    propietario = _propietario_o_404(token)
+    return render(request, "GestionVeterinaria_app/portal/inicio.html", {
+        "token": token,
+        "propietario": propietario,
+        "citas": portal.citas_futuras(propietario),
+        "dias": portal.dias_reservables(),
+        "aviso": request.GET.get("aviso"),
+    })
+
+
+def _fecha_pedida(valor):
+    try:
+        fecha = datetime.strptime(valor or "", "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    return fecha if fecha in portal.dias_reservables() else None
+
+
+@limitar("portal:disponibilidad", capacidad=30, por_minuto=60)
+def disponibilidad(request, token):
+    return _pagina_disponibilidad(request, token, _propietario_o_404(token))
+
+
+def _pagina_disponibilidad(request, token, propietario, error=None, status=200):
+    # Sin límite propio: reservar() la muestra con el error y ya consumió el suyo
+    dias = portal.dias_reservables()
+    fecha = _fecha_pedida(request.GET.get("fecha") or request.POST.get("fecha")) or dias[0]
+
+    respuesta = render(request, "GestionVeterinaria_app/portal/disponibilidad.html", {
+        "token": token,
+        "propietario": propietario,
+        "pacientes": Paciente.objects.filter(propietario=propietario).order_by("nombre"),
+        "dias": dias,
+        "fecha": fecha,
+        "turnos": portal.turnos_libres(fecha),
+        "error": error,
+    }, status=status)
+    if error is None:
+        # Los turnos libres se cachean del lado del servidor; el navegador puede reusar la página un rato
+        respuesta["Cache-Control"] = "private, max-age=30"
+    return respuesta
+
+
+@require_POST
+@limitar("portal:reservar:ip", capacidad=20, por_minuto=10)
+@limitar("portal:reservar", capacidad=5, por_minuto=2, clave=_por_propietario)
+def reservar(request, token):
+    propietario = _propietario_o_404(token)
+    fecha = _fecha_pedida(request.POST.get("fecha"))
+    try:
+        if fecha is None:
+            raise portal.PortalError("Elegí un día.")
+        portal.reservar(
+            propietario,
+            request.POST.get("paciente"),
+            request.POST.get("veterinario"),
+            fecha,
+            request.POST.get("hora", ""),
+        )
+    except (portal.PortalError, ValueError) as exc:
+        mensaje = str(exc) if isinstance(exc, portal.PortalError) else "Datos inválidos."
+        return _pagina_disponibilidad(request, token, propietario, error=mensaje, status=409)
+    return redirect(f"{reverse('portal:inicio', args=[token])}?aviso=reservada")
+
+
+@require_POST
+@limitar("portal:cancelar", capacidad=5, por_minuto=2, clave=_por_propietario)
+def cancelar(request, token, cita_id):
+    propietario = _propietario_o_404(token)
+    try:
+        portal.cancelar(propietario, cita_id)
+    except portal.PortalError:
+        raise Http404("No encontramos esa cita.")
+    return redirect(f"{reverse('portal:inicio', args=[token])}?aviso=cancelada")
@@ -0,0 +1,204 @@
+"""
+Pronóstico de carga de la clínica.
+
+- Serie histórica: citas no canceladas de las últimas SEMANAS_HISTORIA
+  semanas, contadas por (día, hora, veterinario, especie) en una sola
+  consulta agregada.
+- Modelo: para cada serie (total, cada veterinario, cada especie) una línea
+  base día-de-semana × hora, suavizada exponencialmente semana a semana
+  (nivel = Σ α(1-α)^k · y_{t-k}). Con NumPy se calcula para todas las series
+  y celdas a la vez con un producto tensorial; sin NumPy, con el mismo
+  promedio ponderado en Python puro.
+- Los parámetros ajustados (los niveles) quedan en caché por día y por
+  sucursal; el pronóstico se compara con la capacidad que da generar_slots()
+  con la jornada de la sucursal de cada veterinario.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from . import archivo, sucursales
+from .forms import generar_slots
+from .models import Veterinario
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sin NumPy se usa la versión en Python puro
+    np = None
+
+SEMANAS_HISTORIA = 12
+ALFA = 0.3
+UMBRAL_SATURACION = 0.9
+CACHE_TIMEOUT = 60 * 60 * 24
+HORAS = 24
+
+
+# ------------------------------
+# Serie histórica
+# ------------------------------
+def _serie(inicio, fin):
+    """Filas {dia, hora, veterinario_id, paciente__especie, total} de la ventana."""
+    fuentes = [
+        qs.exclude(estado="cancelada").annotate(dia=TruncDate("fecha_hora"), hora=ExtractHour("fecha_hora"))
+        for qs in archivo.fuentes_de_citas(inicio, fin)
+    ]
+    return archivo.contar_por(fuentes, ["dia", "hora", "veterinario_id", "paciente__especie"])
+
+
+def _medianoche(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min), timezone.get_current_timezone())
+
+
+def _claves(fila):
+    yield "total"
+    yield f"vet:{fila['veterinario_id']}"
+    yield f"especie:{(fila['paciente__especie'] or '').strip().lower()}"
+
+
+# ------------------------------
+# Ajuste
+# ------------------------------
+def _pesos(semanas, alfa):
+    """Pesos del suavizado exponencial simple, de la semana más vieja a la más nueva."""
+    pesos = [alfa * (1 - alfa) ** (semanas - 1 - t) for t in range(semanas)]
+    pesos[0] = (1 - alfa) ** (semanas - 1)  # el nivel arranca en la primera semana
+    return pesos
+
+
+def _niveles_numpy(filas, claves, inicio, semanas, alfa):
+    indice = {k: i for i, k in enumerate(claves)}
+    y = np.zeros((len(claves), semanas, 7, HORAS))
+    k_idx, s_idx, d_idx, h_idx, totales = [], [], [], [], []
+    for fila in filas:
+        semana = (fila["dia"] - inicio).days // 7
+        for clave in _claves(fila):
+            k_idx.append(indice[clave])
+            s_idx.append(semana)
+            d_idx.append(fila["dia"].weekday())
+            h_idx.append(fila["hora"])
+            totales.append(fila["total"])
+    np.add.at(y, (k_idx, s_idx, d_idx, h_idx), totales)
+    # (K, S, 7, 24) · (S,) -> (K, 7, 24)
+    niveles = np.tensordot(y, np.asarray(_pesos(semanas, alfa)), axes=([1], [0]))
+    return {clave: niveles[i].tolist() for clave, i in indice.items()}
+
+
+def _niveles_python(filas, claves, inicio, semanas, alfa):
+    pesos = _pesos(semanas, alfa)
+    niveles = {k: [[0.0] * HORAS for _ in range(7)] for k in claves}
+    for fila in filas:
+        peso = pesos[(fila["dia"] - inicio).days // 7] * fila["total"]
+        for clave in _claves(fila):
+            niveles[clave][fila["dia"].weekday()][fila["hora"]] += peso
+    return niveles
+
+
+def ajustar(semanas=SEMANAS_HISTORIA, alfa=ALFA):
+    """
+    {serie: niveles[dia_semana][hora]} ajustado con la historia hasta ayer.
+    Cacheado por día: el ajuste se rehace una vez por día como mucho.
+    """
+    hoy = timezone.localdate()
+    clave_cache = f"pronostico:modelo:{sucursales.clave()}:{hoy.isoformat()}:{semanas}:{alfa}"
+    modelo = cache.get(clave_cache)
+    if modelo is not None:
+        return modelo
+
+    inicio = hoy - timedelta(weeks=semanas)
+    filas = [f for f in _serie(_medianoche(inicio), _medianoche(hoy)) if f["dia"] and inicio <= f["dia"] < hoy]
+    if filas:
+        # Sin historia completa, el suavizado arranca en la primera semana con datos
+        primera = min((f["dia"] - inicio).days // 7 for f in filas)
+        inicio += timedelta(weeks=primera)
+        semanas -= primera
+    claves = sorted({k for f in filas for k in _claves(f)} | {"total"})
+    calcular = _niveles_numpy if np is not None else _niveles_python
+    modelo = {
+        "niveles": calcular(filas, claves, inicio, semanas, alfa),
+        "semanas": semanas if filas else 0,
+    }
+    cache.set(clave_cache, modelo, CACHE_TIMEOUT)
+    return modelo
+
+
+# ------------------------------
+# Pronóstico vs capacidad
+# ------------------------------
+def _capacidad_por_hora(fecha, sucursal=None):
+    """Turnos por hora de un veterinario según la jornada de generar_slots()."""
+    por_hora = defaultdict(int)
+    for slot in generar_slots(fecha, set(), sucursal):
+        por_hora[int(slot[:2])] += 1
+    return por_hora
+
+
+def pronosticar(dias=30):
+    """Carga esperada de los próximos `dias` días frente a la capacidad de turnos."""
+    modelo = ajustar()
+    niveles = modelo["niveles"]
+    vets = list(Veterinario.objects.order_by("apellido", "nombre").values("id", "nombre", "apellido", "sucursal_id"))
+    hoy = timezone.localdate()
+    total = niveles["total"]
+    # Veterinarios por sucursal: cada una tiene su jornada
+    vets_por_sucursal = defaultdict(int)
+    for v in vets:
+        vets_por_sucursal[v["sucursal_id"]] += 1
+
+    resumen_dias, picos = [], []
+    capacidad_semana_vet = defaultdict(int)
+    for i in range(dias):
+        fecha = hoy + timedelta(days=i)
+        por_hora = defaultdict(int)
+        for sucursal_id, n_vets in vets_por_sucursal.items():
+            turnos_vet = _capacidad_por_hora(fecha, sucursales.obtener(sucursal_id))
+            for hora, turnos in turnos_vet.items():
+                por_hora[hora] += turnos * n_vets
+            if i < 7:
+                capacidad_semana_vet[sucursal_id] += sum(turnos_vet.values())
+        esperadas_dia = capacidad_dia = 0.0
+        for hora, capacidad in sorted(por_hora.items()):
+            esperadas = total[fecha.weekday()][hora]
+            esperadas_dia += esperadas
+            capacidad_dia += capacidad
+            if capacidad and esperadas / capacidad >= UMBRAL_SATURACION:
+                picos.append({"fecha": fecha, "hora": hora, "esperadas": esperadas, "capacidad": capacidad,
+                              "ocupacion": esperadas / capacidad})
+        ocupacion = esperadas_dia / capacidad_dia if capacidad_dia else 0
+        resumen_dias.append({
+            "fecha": fecha,
+            "esperadas": esperadas_dia,
+            "capacidad": capacidad_dia,
+            "ocupacion": ocupacion,
+            "saturado": ocupacion >= UMBRAL_SATURACION,
+        })
+
+    def semana(serie):
+        return sum(sum(fila) for fila in niveles.get(serie, []))
+
+    por_veterinario = []
+    for v in vets:
+        esperadas = semana(f"vet:{v['id']}")
+        capacidad = capacidad_semana_vet[v["sucursal_id"]]
+        por_veterinario.append({
+            "veterinario": f"{v['nombre']} {v['apellido']}",
+            "esperadas_semana": esperadas,
+            "capacidad_semana": capacidad,
+            "ocupacion": esperadas / capacidad if capacidad else 0,
+        })
+
+    por_especie = sorted(
+        ({"especie": k.split(":", 1)[1] or "—", "esperadas_semana": semana(k)}
+         for k in niveles if k.startswith("especie:")),
+        key=lambda x: -x["esperadas_semana"],
+    )
+
+    return {
+        "semanas_historia": modelo["semanas"],
+        "dias": resumen_dias,
+        "picos": sorted(picos, key=lambda p: -p["ocupacion"])[:10],
+        "por_veterinario": por_veterinario,
+        "por_especie": por_especie[:10],
+    }
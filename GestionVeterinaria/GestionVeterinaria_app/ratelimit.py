@@ -0,0 +1,69 @@
+"""
+Limitador token bucket guardado en la caché.
+
+Cada clave (p.ej. "portal:reservar:ip:1.2.3.4") tiene un balde de
+`capacidad` fichas que se recarga a `por_minuto` fichas por minuto. Cada
+request consume una; sin fichas se responde 429 con Retry-After. El estado
+es una tupla (fichas, timestamp) en la caché, así que con una caché
+compartida (Redis/archivos en prod) el límite vale para todos los workers.
+No es estrictamente atómico: bajo carga puede pasar alguna ficha de más,
+que para frenar ráfagas alcanza.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+def consumir(clave, capacidad, por_minuto, costo=1):
+    """Devuelve (permitido, segundos_de_espera)."""
+    tasa = por_minuto / 60.0
+    ahora = time.time()
+    clave = f"ratelimit:{clave}"
+
+    fichas, ultima = cache.get(clave) or (float(capacidad), ahora)
+    fichas = min(float(capacidad), fichas + (ahora - ultima) * tasa)
+
+    permitido = fichas >= costo
+    if permitido:
+        fichas -= costo
+    # El balde vacío se recarga solo: no hace falta guardarlo más que eso
+    cache.set(clave, (fichas, ahora), math.ceil(capacidad / tasa) + 1)
+
+    espera = 0 if permitido else math.ceil((costo - fichas) / tasa)
+    return permitido, espera
+
+
+def por_ip(request, **kwargs):
+    # Detrás de un proxy, REMOTE_ADDR lo tiene que fijar el servidor (p.ej. desde X-Forwarded-For)
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def por_valor(valor):
+    """Clave corta y sin datos personales a partir de un email, token, etc."""
+    return hashlib.sha256(str(valor).encode()).hexdigest()[:24]
+
+
+def limitar(nombre, capacidad, por_minuto, clave=por_ip, metodos=None):
+    """
+    Decorador de vista. `clave(request, **kwargs)` identifica el balde (por
+    defecto la IP); `metodos` restringe el límite a ciertos métodos HTTP.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if metodos is None or request.method in metodos:
+                permitido, espera = consumir(f"{nombre}:{clave(request, **kwargs)}", capacidad, por_minuto)
+                if not permitido:
+                    respuesta = HttpResponse(
+                        "Demasiados pedidos. Probá de nuevo en unos segundos.",
+                        status=429, content_type="text/plain; charset=utf-8",
+                    )
+                    respuesta["Retry-After"] = str(espera)
+                    return respuesta
+            return vista(request, *args, **kwargs)
+        return envoltura
+    return decorador
@@ -0,0 +1,193 @@
+"""
+Veterinario sugerido al reservar.
+
+- Carga: citas programadas por (veterinario, día) en contadores de la caché.
+  Lo que falta se arma con una sola consulta agrupada para todos los
+  veterinarios y días pedidos; después cada alta, cancelación o
+  reprogramación suma o resta en el contador (signals.py) sin volver a
+  contar.
+- Ranking (recomendar): entre los veterinarios de la sucursal activa con
+  algún turno libre en la franja pedida, pondera
+    * la carga del día (ocupación de su jornada, cuanto menos mejor),
+    * que su especialidad corresponda a la especie del paciente,
+    * que sea el último veterinario que lo atendió (continuidad).
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import disponibilidad, sucursales
+from .catalogo import normalizar
+from .forms import generar_slots
+from .models import Cita, Veterinario
+
+CACHE_TIMEOUT = 60 * 60 * 24
+PESO_CARGA = 0.45
+PESO_ESPECIALIDAD = 0.30
+PESO_CONTINUIDAD = 0.25
+# Raíces que, en la especialidad, indican que atiende a la especie
+ESPECIALIDADES = {
+    "perro": ("canin", "perr"),
+    "gato": ("felin", "gat"),
+    "conejo": ("exotic", "conej", "lagomorf"),
+    "huron": ("exotic", "huron"),
+    "ave": ("avia", "aves", "exotic"),
+    "loro": ("avia", "aves", "exotic"),
+    "tortuga": ("reptil", "exotic"),
+}
+
+
+def _clave(vet_id, fecha):
+    return f"carga:{vet_id}:{fecha.isoformat()}"
+
+
+def _dia(fecha_hora):
+    return timezone.localtime(fecha_hora).date() if fecha_hora else None
+
+
+# ------------------------------
+# Contadores de carga
+# ------------------------------
+def cargas(vet_ids, fechas):
+    """{(vet_id, fecha): citas programadas}; lo que no está en caché sale de una consulta agrupada."""
+    claves = {_clave(v, f): (v, f) for v in vet_ids for f in fechas}
+    resultado = {claves[k]: n for k, n in cache.get_many(claves).items()}
+    faltantes = [par for par in claves.values() if par not in resultado]
+    if not faltantes:
+        return resultado
+
+    desde = min(f for _, f in faltantes)
+    hasta = max(f for _, f in faltantes) + timedelta(days=1)
+    tz = timezone.get_current_timezone()
+    filas = (
+        Cita.todas.filter(
+            veterinario_id__in={v for v, _ in faltantes},
+            estado="programada",
+            fecha_hora__gte=timezone.make_aware(datetime.combine(desde, time.min), tz),
+            fecha_hora__lt=timezone.make_aware(datetime.combine(hasta, time.min), tz),
+        )
+        .annotate(dia=TruncDate("fecha_hora", tzinfo=tz))
+        .values_list("veterinario_id", "dia")
+        .annotate(n=Count("id"))
+    )
+    contadas = {(v, d): n for v, d, n in filas}
+    nuevos = {}
+    for par in faltantes:
+        resultado[par] = nuevos[_clave(*par)] = contadas.get(par, 0)
+    cache.set_many(nuevos, CACHE_TIMEOUT)
+    return resultado
+
+
+def _sumar(vet_id, fecha, delta):
+    if not vet_id or not fecha:
+        return
+    try:
+        cache.incr(_clave(vet_id, fecha), delta)
+    except ValueError:
+        pass  # no estaba cacheado: se cuenta completo la próxima vez
+
+
+def al_guardar(cita, created):
+    """Cita guardada: pasa de un (veterinario, día) a otro, o deja de estar programada."""
+    antes = None
+    if not created and getattr(cita, "_estado_original", None) == "programada":
+        antes = (cita._veterinario_original_id, _dia(cita._fecha_hora_original))
+    despues = (cita.veterinario_id, _dia(cita.fecha_hora)) if cita.estado == "programada" else None
+    if antes == despues:
+        return
+
+    def aplicar():
+        if antes:
+            _sumar(*antes, -1)
+        if despues:
+            _sumar(*despues, 1)
+
+    transaction.on_commit(aplicar)
+
+
+def al_borrar(cita):
+    if cita.estado == "programada":
+        par = (cita.veterinario_id, _dia(cita.fecha_hora))
+        transaction.on_commit(lambda: _sumar(*par, -1))
+
+
+def mover(movimientos):
+    """Citas programadas movidas en bloque sin signals (bulk_update): [((vet, día), (vet, día))]."""
+    def aplicar():
+        for antes, despues in movimientos:
+            if antes != despues:
+                _sumar(*antes, -1)
+                _sumar(*despues, 1)
+
+    transaction.on_commit(aplicar)
+
+
+# ------------------------------
+# Ranking
+# ------------------------------
+def atiende_especie(especialidad, especie):
+    especialidad, especie = normalizar(especialidad), normalizar(especie)
+    if not especie:
+        return False
+    raices = ESPECIALIDADES.get(especie, ()) + (especie[:4],)
+    return any(r in especialidad for r in raices)
+
+
+def ultimo_veterinario(paciente):
+    """Veterinario de la última cita pasada del paciente (None si nunca vino)."""
+    if paciente is None:
+        return None
+    return (
+        Cita.todas.filter(paciente=paciente, fecha_hora__lt=timezone.now())
+        .exclude(estado="cancelada")
+        .order_by("-fecha_hora")
+        .values_list("veterinario_id", flat=True)
+        .first()
+    )
+
+
+def recomendar(fecha, paciente=None, desde=None, hasta=None):
+    """
+    Veterinarios con turno libre el día `fecha` (entre las horas `desde` y
+    `hasta` "HH:MM", si se dan), el más conveniente primero:
+    [{"veterinario", "puntaje", "carga", "capacidad", "slots", "especialidad", "continuidad"}].
+    """
+    vets = list(Veterinario.objects.order_by("apellido", "nombre"))
+    if not vets:
+        return []
+    ids = [v.pk for v in vets]
+    libres = disponibilidad.slots_libres(ids, fecha)
+    carga = cargas(ids, [fecha])
+    previo = ultimo_veterinario(paciente)
+    especie = paciente.especie if paciente else ""
+
+    sugerencias = []
+    for vet in vets:
+        slots = disponibilidad.slots_futuros(libres[vet.pk][fecha], fecha)
+        slots = [s for s in slots if (not desde or s >= desde) and (not hasta or s < hasta)]
+        if not slots:
+            continue
+        capacidad = len(generar_slots(fecha, set(), sucursales.obtener(vet.sucursal_id))) or 1
+        n = carga[(vet.pk, fecha)]
+        especialidad = atiende_especie(vet.especialidad, especie)
+        continuidad = previo == vet.pk
+        puntaje = (
+            PESO_CARGA * (1 - min(n / capacidad, 1))
+            + PESO_ESPECIALIDAD * especialidad
+            + PESO_CONTINUIDAD * continuidad
+        )
+        sugerencias.append({
+            "veterinario": vet,
+            "puntaje": round(puntaje, 3),
+            "carga": n,
+            "capacidad": capacidad,
+            "slots": slots,
+            "especialidad": especialidad,
+            "continuidad": continuidad,
+        })
+    sugerencias.sort(key=lambda s: (-s["puntaje"], s["carga"], s["veterinario"].apellido))
+    return sugerencias
@@ -0,0 +1,136 @@
+"""
+Lecturas pesadas desde una réplica de la base.
+
+- settings.DATABASES["replica"] solo existe si se configura
+  (DJANGO_DB_REPLICA). Sin réplica todo sigue yendo a "default".
+- Las vistas de solo lectura se marcan con @desde_replica: durante el
+  request, ReplicaRouter manda a la réplica las lecturas de los modelos de la
+  app (sesiones, usuarios y permisos siguen en la principal). Las escrituras
+  van siempre a la principal.
+- La réplica en SQLite es una copia que refresca el comando
+  actualizar_replica con la API de backup online; guarda en la caché la
+  hora de la última copia. Con PostgreSQL la réplica es un standby con
+  streaming replication y el comando no hace falta.
+- Leer lo propio: ReplicaMiddleware mira las sentencias que el request
+  ejecuta en la principal y, si escribió en tablas de la app, deja una
+  cookie con la hora. La vista marcada usa la réplica solo si la última
+  copia es posterior a esa escritura y no está más atrasada que
+  REPLICA_RETRASO_MAX; si no, lee de la principal.
+- Las cachés que solo se recalculan al invalidarse (fecha de corte del
+  archivo, sucursales, campanita, catálogo) se llenan con en_principal():
+  una copia atrasada las dejaría viejas hasta la próxima invalidación.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ALIAS = "replica"
+APP = "GestionVeterinaria_app"
+CLAVE_COPIA = "replica:copia"
+COOKIE = "gv_escritura"
+ESCRITURAS = ("INSERT", "UPDATE", "DELETE")
+
+_lectura = contextvars.ContextVar("replica_lectura", default=None)
+
+
+def configurada():
+    return ALIAS in settings.DATABASES
+
+
+def retraso_max():
+    return getattr(settings, "REPLICA_RETRASO_MAX", 120)
+
+
+def marcar_copia(cuando=None):
+    """Registra la hora de la copia recién terminada (actualizar_replica)."""
+    cache.set(CLAVE_COPIA, cuando or time.time(), None)
+
+
+def disponible_para(request):
+    """True si la réplica está al día para este usuario."""
+    if not configurada():
+        return False
+    copia = cache.get(CLAVE_COPIA)
+    if copia is None or time.time() - copia > retraso_max():
+        return False
+    try:
+        escritura = float(request.COOKIES.get(COOKIE, 0))
+    except ValueError:
+        escritura = time.time()
+    return copia > escritura
+
+
+def desde_replica(vista):
+    """Las lecturas de la vista (GET/HEAD) van a la réplica cuando está al día."""
+    @wraps(vista)
+    def envuelta(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or not disponible_para(request):
+            return vista(request, *args, **kwargs)
+        token = _lectura.set(ALIAS)
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            _lectura.reset(token)
+    return envuelta
+
+
+@contextmanager
+def en_principal():
+    """Las lecturas del bloque van a la principal aunque la vista use la réplica."""
+    token = _lectura.set(None)
+    try:
+        yield
+    finally:
+        _lectura.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == APP:
+            return _lectura.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Aunque la instancia se haya leído de la réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Misma base, dos conexiones: las relaciones entre ambas son válidas
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica es una copia: nunca se migra por su cuenta
+        return db != ALIAS
+
+
+def _detector(escrituras):
+    """execute_wrapper que anota si se ejecutó alguna escritura sobre tablas de la app."""
+    def detectar(execute, sql, params, many, context):
+        if not escrituras and sql.lstrip()[:6].upper() in ESCRITURAS and f"{APP}_" in sql:
+            escrituras.append(True)
+        return execute(sql, params, many, context)
+    return detectar
+
+
+class ReplicaMiddleware:
+    """Si el request escribió en la app, la cookie aleja al usuario de la réplica hasta la próxima copia."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not configurada():
+            return self.get_response(request)
+        escrituras = []
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(_detector(escrituras)):
+            response = self.get_response(request)
+        if escrituras:
+            response.set_cookie(
+                COOKIE, f"{time.time():.3f}", max_age=retraso_max(), httponly=True, samesite="Lax",
+            )
+        return response
@@ -0,0 +1,266 @@
+"""
+Estadísticas de salud de la población (permiso view_health_stats).
+
+- AgregadoSalud guarda un contador por (dimensión, especie, clave, periodo).
+  Los receivers de Paciente / HistorialMedico (signals.py) comparan las
+  claves de la instancia antes y después de guardar y suben o bajan solo
+  los contadores que cambiaron. El tablero lee esas filas: su costo depende
+  de la cantidad de combinaciones, no de pacientes ni de historiales.
+- Cuentan los pacientes vigentes y los diagnósticos (vivos y archivados) de
+  pacientes vigentes. La baja lógica descuenta todo de una vez
+  (dar_de_baja); la purga y el archivado posteriores no tocan nada.
+- La franja de edad cambia sola con el paso del tiempo: el comando
+  recalcular_salud la rehace cada noche en una pasada (vectorizada con
+  NumPy si está instalado). Con --completo reconstruye todas las
+  dimensiones (carga inicial o reparación).
+- Las instancias con campos diferidos (.only()/.defer()) no se siguen; la
+  reconstrucción completa las corrige.
+"""
+import contextvars
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AgregadoSalud, HistorialMedico, HistorialMedicoArchivado, Paciente
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sin NumPy las franjas se calculan fila a fila
+    np = None
+
+# Límites (en años cumplidos) de las franjas de edad; la clave es el índice
+LIMITES_EDAD = [1, 3, 8, 12]
+FRANJAS_EDAD = ["Menos de 1 año", "1 a 2 años", "3 a 7 años", "8 a 11 años", "12 años o más"]
+SIN_RAZA = "(sin raza)"
+SIN_DIAGNOSTICO = "(sin diagnóstico)"
+
+CAMPOS_PACIENTE = ("especie", "raza", "sexo", "fecha_nacimiento", "eliminado_en")
+CAMPOS_HISTORIAL = ("diagnostico", "fecha_consulta")
+
+_pausada = contextvars.ContextVar("salud_pausada", default=False)
+
+
+def normalizar(texto, largo=100):
+    """Minúsculas y espacios colapsados: "Perro " y "perro" son la misma especie."""
+    return " ".join((texto or "").split()).lower()[:largo]
+
+
+def franja(nacimiento, hoy):
+    edad = hoy.year - nacimiento.year - ((hoy.month, hoy.day) < (nacimiento.month, nacimiento.day))
+    return str(bisect_right(LIMITES_EDAD, edad))
+
+
+def periodo(fecha_hora):
+    return timezone.localtime(fecha_hora).strftime("%Y-%m")
+
+
+# ------------------------------
+# Claves de una instancia
+# ------------------------------
+def _claves_paciente(datos, hoy):
+    if datos["eliminado_en"] is not None:
+        return []
+    especie = normalizar(datos["especie"], 50)
+    return [
+        ("especie", especie, especie, ""),
+        ("raza", especie, normalizar(datos["raza"]) or SIN_RAZA, ""),
+        ("sexo", especie, datos["sexo"], ""),
+        ("edad", especie, franja(datos["fecha_nacimiento"], hoy), ""),
+    ]
+
+
+def _claves_historial(datos):
+    return [("diagnostico", "", normalizar(datos["diagnostico"]) or SIN_DIAGNOSTICO, periodo(datos["fecha_consulta"]))]
+
+
+def claves(instance):
+    """Contadores en los que cuenta la instancia (None si tiene campos diferidos)."""
+    campos = CAMPOS_PACIENTE if isinstance(instance, Paciente) else CAMPOS_HISTORIAL
+    datos = instance.__dict__
+    if any(c not in datos for c in campos):
+        return None
+    if isinstance(instance, Paciente):
+        return _claves_paciente(datos, timezone.localdate())
+    return _claves_historial(datos)
+
+
+# ------------------------------
+# Mantenimiento incremental
+# ------------------------------
+def fotografiar(instance):
+    instance._salud_original = claves(instance) if instance.pk else []
+
+
+def al_guardar(instance, created):
+    antes = [] if created else getattr(instance, "_salud_original", None)
+    ahora = claves(instance)
+    instance._salud_original = ahora
+    if antes is None or ahora is None:
+        return
+    deltas = Counter(ahora)
+    deltas.subtract(antes)
+    aplicar(deltas)
+
+
+def al_borrar(instance):
+    antes = getattr(instance, "_salud_original", None)
+    if antes:
+        aplicar(Counter({clave: -1 for clave in antes}))
+
+
+def aplicar(deltas):
+    """Suma los deltas {(dimension, especie, clave, periodo): n} a los contadores."""
+    if _pausada.get():
+        return
+    for (dimension, especie, clave, per), delta in deltas.items():
+        if not delta:
+            continue
+        filtro = {"dimension": dimension, "especie": especie, "clave": clave, "periodo": per}
+        if AgregadoSalud.objects.filter(**filtro).update(total=F("total") + delta):
+            continue
+        with transaction.atomic():
+            _, creado = AgregadoSalud.objects.get_or_create(**filtro, defaults={"total": delta})
+        if not creado:  # otro request lo creó en el medio
+            AgregadoSalud.objects.filter(**filtro).update(total=F("total") + delta)
+
+
+def dar_de_baja(paciente_ids):
+    """Descuenta pacientes (vigentes) y sus diagnósticos antes de la baja lógica."""
+    hoy = timezone.localdate()
+    deltas = Counter()
+    vigentes = list(Paciente.objects.filter(pk__in=paciente_ids).values_list("pk", *CAMPOS_PACIENTE))
+    for pk, *valores in vigentes:
+        deltas.subtract(_claves_paciente(dict(zip(CAMPOS_PACIENTE, valores)), hoy))
+    ids = [fila[0] for fila in vigentes]
+    for modelo in (HistorialMedico, HistorialMedicoArchivado):
+        for valores in modelo.objects.filter(paciente_id__in=ids).values_list(*CAMPOS_HISTORIAL).iterator():
+            deltas.subtract(_claves_historial(dict(zip(CAMPOS_HISTORIAL, valores))))
+    aplicar(deltas)
+
+
+@contextmanager
+def pausada():
+    """Para movimientos que no cambian la población (archivado, purga de bajas ya descontadas)."""
+    token = _pausada.set(True)
+    try:
+        yield
+    finally:
+        _pausada.reset(token)
+
+
+# ------------------------------
+# Reconstrucción
+# ------------------------------
+def _contar_franjas(filas, hoy):
+    """Counter {(especie, franja): n} para filas (especie, fecha_nacimiento)."""
+    if np is None:
+        return Counter((normalizar(e, 50), franja(n, hoy)) for e, n in filas)
+
+    especies, nacimientos = [], []
+    for e, n in filas:
+        especies.append(normalizar(e, 50))
+        nacimientos.append((n.year, n.month * 100 + n.day))
+    if not especies:
+        return Counter()
+    nombres, codigos = np.unique(np.array(especies, dtype=object).astype(str), return_inverse=True)
+    anio, mes_dia = np.array(nacimientos, dtype=np.int64).T
+    edad = hoy.year - anio - (mes_dia > hoy.month * 100 + hoy.day)
+    franjas = np.searchsorted(LIMITES_EDAD, edad, side="right")
+    cantidad = np.bincount(codigos * len(FRANJAS_EDAD) + franjas, minlength=len(nombres) * len(FRANJAS_EDAD))
+    return Counter({
+        (str(nombres[i // len(FRANJAS_EDAD)]), str(i % len(FRANJAS_EDAD))): int(n)
+        for i, n in enumerate(cantidad) if n
+    })
+
+
+def _reemplazar(dimensiones, conteo):
+    with transaction.atomic():
+        AgregadoSalud.objects.filter(dimension__in=dimensiones).delete()
+        AgregadoSalud.objects.bulk_create(
+            [AgregadoSalud(dimension=d, especie=e, clave=c, periodo=p, total=n) for (d, e, c, p), n in conteo.items()],
+            batch_size=1000,
+        )
+    return len(conteo)
+
+
+def recalcular_edades(hoy=None):
+    """Rehace la dimensión 'edad' con la fecha de hoy. Devuelve la cantidad de contadores."""
+    hoy = hoy or timezone.localdate()
+    filas = Paciente.objects.values_list("especie", "fecha_nacimiento").iterator()
+    conteo = _contar_franjas(filas, hoy)
+    return _reemplazar(["edad"], Counter({("edad", e, f, ""): n for (e, f), n in conteo.items()}))
+
+
+def recalcular_todo(hoy=None):
+    """Reconstruye todas las dimensiones desde las tablas. Devuelve la cantidad de contadores."""
+    hoy = hoy or timezone.localdate()
+    conteo = Counter()
+    for valores in Paciente.objects.values_list(*CAMPOS_PACIENTE).iterator():
+        datos = dict(zip(CAMPOS_PACIENTE, valores))
+        conteo.update(c for c in _claves_paciente(datos, hoy) if c[0] != "edad")
+    for modelo in (HistorialMedico, HistorialMedicoArchivado):
+        filas = modelo.objects.filter(
+            paciente__in=Paciente.objects.values("pk")
+        ).values_list(*CAMPOS_HISTORIAL).iterator()
+        for valores in filas:
+            conteo.update(_claves_historial(dict(zip(CAMPOS_HISTORIAL, valores))))
+    _reemplazar(["especie", "raza", "sexo", "diagnostico"], conteo)
+    return len(conteo) + recalcular_edades(hoy)
+
+
+# ------------------------------
+# Tablero
+# ------------------------------
+def _con_porcentaje(pares, total=None):
+    total = (total if total is not None else sum(n for _, n in pares)) or 1
+    return [{"clave": c, "total": n, "porcentaje": round(100 * n / total, 1)} for c, n in pares]
+
+
+def tablero(especie=None, meses=12, top=10):
+    """
+    Datos del tablero desde los contadores. `especie` (normalizada) limita
+    raza, sexo y edad; los diagnósticos son de toda la población.
+    """
+    especie = normalizar(especie, 50) if especie else None
+    por_dimension = defaultdict(Counter)
+    for dimension, esp, clave, total in AgregadoSalud.objects.filter(
+        dimension__in=["especie", "raza", "sexo", "edad"], total__gt=0,
+    ).values_list("dimension", "especie", "clave", "total"):
+        if dimension == "especie" or especie is None or esp == especie:
+            por_dimension[dimension][clave] += total
+
+    sexos = dict(Paciente.SEXO_CHOICES)
+    edades = por_dimension["edad"]
+
+    # Diagnósticos: los `top` más frecuentes de la ventana y su serie mensual
+    hoy = timezone.localdate()
+    periodos = []
+    mes = hoy.replace(day=1)
+    for _ in range(meses):
+        periodos.append(mes.strftime("%Y-%m"))
+        mes = (mes - timedelta(days=1)).replace(day=1)
+    periodos.reverse()
+    serie = defaultdict(Counter)
+    for clave, per, total in AgregadoSalud.objects.filter(
+        dimension="diagnostico", periodo__gte=periodos[0], total__gt=0,
+    ).values_list("clave", "periodo", "total"):
+        serie[clave][per] += total
+    frecuentes = sorted(serie, key=lambda c: (-sum(serie[c].values()), c))[:top]
+
+    return {
+        "especie": especie,
+        "especies": _con_porcentaje(por_dimension["especie"].most_common()),
+        "razas": _con_porcentaje(por_dimension["raza"].most_common(top), sum(por_dimension["raza"].values())),
+        "sexos": _con_porcentaje([(sexos.get(c, c), n) for c, n in sorted(por_dimension["sexo"].items())]),
+        "edades": _con_porcentaje([(etiqueta, edades.get(str(i), 0)) for i, etiqueta in enumerate(FRANJAS_EDAD)]),
+        "periodos": periodos,
+        "diagnosticos": [
+            {"clave": c, "total": sum(serie[c].values()), "meses": [serie[c].get(p, 0) for p in periodos]}
+            for c in frecuentes
+        ],
+    }
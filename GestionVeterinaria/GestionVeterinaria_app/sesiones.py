@@ -0,0 +1,66 @@
+"""
+Camino rápido de autenticación.
+
+Con SESSION_ENGINE = cached_db la sesión sale de la caché; este backend hace
+lo mismo con el usuario: lo guarda en caché junto con sus roles (nombres de
+grupo), así que un request autenticado no consulta auth_user ni auth_group.
+Django sigue verificando el hash de sesión contra el usuario cacheado, y los
+receivers de signals.py invalidan la entrada cuando cambia el usuario, sus
+grupos o su perfil de veterinario.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .carga_perezosa import sin_auditar
+
+USUARIO_TIMEOUT = 60 * 30
+
+ROL_ADMINISTRATIVO = "administrativo"
+ROL_VETERINARIO = "veterinario"
+
+
+def _clave_usuario(user_id):
+    return f"auth:usuario:{user_id}"
+
+
+def roles_de(user):
+    """Nombres de grupo del usuario, memorizados en la instancia (y en la caché vía el backend)."""
+    if not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, "_roles", None)
+    if roles is None:
+        roles = frozenset(user.groups.values_list("name", flat=True))
+        user._roles = roles
+    return roles
+
+
+def es_administrativo(user):
+    return ROL_ADMINISTRATIVO in roles_de(user)
+
+
+def es_veterinario(user):
+    return ROL_VETERINARIO in roles_de(user)
+
+
+def invalidar_usuario(user_id):
+    cache.delete(_clave_usuario(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend que resuelve get_user() desde la caché. La entrada incluye los
+    roles y el perfil de veterinario (request.user.perfil_veterinario).
+    """
+
+    def get_user(self, user_id):
+        clave = _clave_usuario(user_id)
+        user = cache.get(clave)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            with sin_auditar():
+                roles_de(user)
+                getattr(user, "perfil_veterinario", None)  # queda en la caché de la relación
+            cache.set(clave, user, USUARIO_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,298 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import (
+    agenda_ical, auditoria, cambios, catalogo, disponibilidad, lista_espera, recomendacion, salud, sesiones, sucursales,
+)
+from .context_processors import invalidar_alertas
+from .models import Adjunto, AusenciaVeterinario, Cita, CodigoClinico, HistorialMedico, Paciente, Propietario, Sucursal, Veterinario
+
+User = get_user_model()
+
+
+def _dia_local(fecha_hora):
+    return timezone.localtime(fecha_hora).date() if fecha_hora else None
+
+
+@receiver(post_init, sender=Cita)
+def recordar_veterinario_original(sender, instance, **kwargs):
+    # Si la edición cambia de veterinario (o de día) hay que invalidar también lo anterior
+    instance._veterinario_original_id = instance.veterinario_id
+    instance._fecha_hora_original = instance.fecha_hora
+    instance._estado_original = instance.estado
+    instance._sucursal_original_id = instance.__dict__.get("sucursal_id")
+
+
+# Tiene que registrarse antes que invalidar_agenda_ical, que actualiza los valores originales
+@receiver(post_save, sender=Cita)
+def ofrecer_hueco_a_lista_espera(sender, instance, created, **kwargs):
+    """Cancelación o reprogramación de una cita programada: el horario viejo queda libre."""
+    if created or getattr(instance, "_estado_original", None) != "programada":
+        return
+    vet_id, fecha_hora = instance._veterinario_original_id, instance._fecha_hora_original
+    liberado = instance.estado == "cancelada" or (vet_id, fecha_hora) != (instance.veterinario_id, instance.fecha_hora)
+    if not liberado:
+        return
+
+    def reasignar():
+        # La vista puede mirar cita._lista_espera para avisar a quién se le dio el turno
+        instance._lista_espera = lista_espera.ocupar_hueco(vet_id, fecha_hora, instance.paciente_id)
+
+    transaction.on_commit(reasignar)
+
+
+# También antes que invalidar_agenda_ical: compara contra los valores originales
+@receiver(post_save, sender=Cita)
+def contar_carga(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        recomendacion.al_guardar(instance, created)
+
+
+@receiver(post_delete, sender=Cita)
+def descontar_carga(sender, instance, **kwargs):
+    recomendacion.al_borrar(instance)
+
+
+@receiver(post_save, sender=Cita)
+@receiver(post_delete, sender=Cita)
+def invalidar_agenda_ical(sender, instance, **kwargs):
+    agenda_ical.invalidar(instance.veterinario_id)
+    original = getattr(instance, "_veterinario_original_id", None)
+    if original and original != instance.veterinario_id:
+        agenda_ical.invalidar(original)
+
+    disponibilidad.invalidar(instance.veterinario_id, _dia_local(instance.fecha_hora))
+    fecha_original = getattr(instance, "_fecha_hora_original", None)
+    if (original, fecha_original) != (instance.veterinario_id, instance.fecha_hora):
+        disponibilidad.invalidar(original, _dia_local(fecha_original))
+
+    # Campanita cacheada por veterinario / sucursal
+    invalidar_alertas(
+        {instance.veterinario_id, original},
+        {instance.sucursal_id, getattr(instance, "_sucursal_original_id", None)},
+    )
+
+    instance._veterinario_original_id = instance.veterinario_id
+    instance._fecha_hora_original = instance.fecha_hora
+    instance._estado_original = instance.estado
+    instance._sucursal_original_id = instance.sucursal_id
+
+
+# ------------------------------
+# Ausencias (ver ausencias.py)
+# ------------------------------
+@receiver(post_init, sender=AusenciaVeterinario)
+def recordar_rango_ausencia(sender, instance, **kwargs):
+    instance._rango_original = (instance.veterinario_id, instance.desde, instance.hasta)
+
+
+@receiver(post_save, sender=AusenciaVeterinario)
+@receiver(post_delete, sender=AusenciaVeterinario)
+def invalidar_turnos_ausencia(sender, instance, **kwargs):
+    """Los días de la ausencia (y los de antes, si se editó) dejan de tener turnos o los recuperan."""
+    actual = (instance.veterinario_id, instance.desde, instance.hasta)
+    for vet_id, desde, hasta in {getattr(instance, "_rango_original", actual), actual}:
+        if vet_id and desde and hasta:
+            disponibilidad.invalidar_dias(vet_id, desde, hasta)
+    instance._rango_original = actual
+
+
+# ------------------------------
+# Auditoría (ver auditoria.py)
+# ------------------------------
+@receiver(post_init, sender=Cita)
+@receiver(post_init, sender=HistorialMedico)
+@receiver(post_init, sender=Paciente)
+@receiver(post_init, sender=Propietario)
+def fotografiar_para_auditoria(sender, instance, **kwargs):
+    auditoria.fotografiar(instance)
+
+
+@receiver(post_save, sender=Cita)
+@receiver(post_save, sender=HistorialMedico)
+@receiver(post_save, sender=Paciente)
+@receiver(post_save, sender=Propietario)
+def auditar_guardado(sender, instance, created, raw=False, **kwargs):
+    if not raw:  # loaddata
+        auditoria.al_guardar(instance, created)
+
+
+@receiver(post_delete, sender=Cita)
+@receiver(post_delete, sender=HistorialMedico)
+@receiver(post_delete, sender=Paciente)
+@receiver(post_delete, sender=Propietario)
+def auditar_borrado(sender, instance, **kwargs):
+    auditoria.al_borrar(instance)
+
+
+# ------------------------------
+# Registro de cambios para sincronización (ver cambios.py)
+# ------------------------------
+@receiver(post_save, sender=Cita)
+@receiver(post_save, sender=HistorialMedico)
+@receiver(post_save, sender=Paciente)
+@receiver(post_save, sender=Propietario)
+@receiver(post_save, sender=Adjunto)
+def anotar_cambio(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cambios.registrar(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Cita)
+@receiver(post_delete, sender=HistorialMedico)
+@receiver(post_delete, sender=Paciente)
+@receiver(post_delete, sender=Propietario)
+@receiver(post_delete, sender=Adjunto)
+def anotar_borrado(sender, instance, **kwargs):
+    cambios.registrar(sender, [instance.pk], "b")
+
+
+# ------------------------------
+# Estadísticas de salud (ver salud.py)
+# ------------------------------
+@receiver(post_init, sender=Paciente)
+@receiver(post_init, sender=HistorialMedico)
+def fotografiar_para_salud(sender, instance, **kwargs):
+    salud.fotografiar(instance)
+
+
+@receiver(post_save, sender=Paciente)
+@receiver(post_save, sender=HistorialMedico)
+def contar_para_salud(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        salud.al_guardar(instance, created)
+
+
+@receiver(post_delete, sender=Paciente)
+@receiver(post_delete, sender=HistorialMedico)
+def descontar_para_salud(sender, instance, **kwargs):
+    salud.al_borrar(instance)
+
+
+# ------------------------------
+# Catálogo clínico (trie en memoria de catalogo.py)
+# ------------------------------
+@receiver(post_save, sender=CodigoClinico)
+@receiver(post_delete, sender=CodigoClinico)
+def invalidar_catalogo(sender, instance, **kwargs):
+    catalogo.invalidar()
+
+
+# ------------------------------
+# Fragmentos cacheados de la agenda
+# ------------------------------
+# Las filas de citas_list / mis_citas se cachean por (id, updated_at) y
+# muestran datos de paciente, propietario, veterinario y atención: si cambian,
+# se sube la versión de las citas afectadas con un único UPDATE.
+def _tocar_citas(**filtro):
+    Cita.todas.filter(**filtro).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Paciente)
+def tocar_citas_de_paciente(sender, instance, created, **kwargs):
+    if not created:
+        _tocar_citas(paciente=instance)
+
+
+@receiver(post_save, sender=Propietario)
+def tocar_citas_de_propietario(sender, instance, created, **kwargs):
+    if not created:
+        _tocar_citas(paciente__propietario=instance)
+
+
+@receiver(post_save, sender=HistorialMedico)
+@receiver(post_delete, sender=HistorialMedico)
+def tocar_cita_atendida(sender, instance, **kwargs):
+    if instance.cita_id:
+        _tocar_citas(pk=instance.cita_id)
+
+
+# ------------------------------
+# Usuario cacheado (sesiones.CachedModelBackend)
+# ------------------------------
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    sesiones.invalidar_usuario(instance.pk)
+
+
+# El token del feed iCal vale mientras el usuario siga activo y vinculado
+@receiver(post_save, sender=User)
+def invalidar_titular_ical(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:  # cada login
+        return
+    for vet_id in Veterinario.todos.filter(user_id=instance.pk).values_list("pk", flat=True):
+        agenda_ical.invalidar(vet_id)
+
+
+# pre_delete: después, el SET_NULL ya desvinculó al veterinario
+@receiver(pre_delete, sender=User)
+def invalidar_titular_ical_al_borrar(sender, instance, **kwargs):
+    vet_ids = list(Veterinario.todos.filter(user_id=instance.pk).values_list("pk", flat=True))
+
+    def invalidar():
+        for vet_id in vet_ids:
+            agenda_ical.invalidar(vet_id)
+
+    transaction.on_commit(invalidar)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_roles_cacheados(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        sesiones.invalidar_usuario(instance.pk)
+    else:
+        # group.user_set.add(...): instance es el grupo
+        for user_id in pk_set or instance.user_set.values_list("pk", flat=True):
+            sesiones.invalidar_usuario(user_id)
+
+
+# ------------------------------
+# Sucursales
+# ------------------------------
+@receiver(post_init, sender=Veterinario)
+def recordar_sucursal_original(sender, instance, **kwargs):
+    instance._sucursal_original_id = instance.__dict__.get("sucursal_id")
+
+
+@receiver(post_save, sender=Veterinario)
+def mudar_veterinario(sender, instance, created, **kwargs):
+    """Cambio de sucursal: sus citas futuras lo siguen y sus turnos usan la jornada nueva."""
+    original = getattr(instance, "_sucursal_original_id", None)
+    instance._sucursal_original_id = instance.sucursal_id
+    if created or original == instance.sucursal_id:
+        return
+    citas = Cita.todas.filter(veterinario=instance, fecha_hora__gte=timezone.now())
+    cambios.registrar(Cita, list(citas.values_list("pk", flat=True)))
+    citas.update(sucursal_id=instance.sucursal_id, updated_at=timezone.now(), version=F("version") + 1)
+    disponibilidad.invalidar_veterinarios([instance.pk])
+    invalidar_alertas([instance.pk], [original, instance.sucursal_id])
+
+
+@receiver(post_save, sender=Sucursal)
+@receiver(post_delete, sender=Sucursal)
+def invalidar_sucursal(sender, instance, **kwargs):
+    sucursales.invalidar()
+    if not kwargs.get("created"):
+        # La jornada pudo cambiar: turnos cacheados de sus veterinarios y la duración de sus citas en el feed iCal
+        vet_ids = list(Veterinario.todos.filter(sucursal=instance).values_list("pk", flat=True))
+        disponibilidad.invalidar_veterinarios(vet_ids)
+        for vet_id in vet_ids:
+            agenda_ical.invalidar(vet_id)
+
+
+@receiver(post_save, sender=Veterinario)
+@receiver(post_delete, sender=Veterinario)
+def invalidar_perfil_veterinario(sender, instance, **kwargs):
+    if kwargs.get("created") is False:
+        _tocar_citas(veterinario=instance)
+    # Cambio de usuario (o de nombre, que va en el feed) o baja: el titular del feed iCal
+    agenda_ical.invalidar(instance.pk)
+    if instance.user_id:
+        sesiones.invalidar_usuario(instance.user_id)
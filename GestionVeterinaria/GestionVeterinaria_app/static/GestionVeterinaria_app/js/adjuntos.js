@@ -0,0 +1,113 @@
+// Subida de adjuntos por partes (ver adjuntos.py).
+// Cada archivo abre una subida (POST a data-subidas-url) y se manda de a
+// data-tamanio-parte bytes con PUT + Content-Range. La URL de la subida queda
+// en localStorage por consulta, nombre, tamaño y fecha del archivo: si se
+// corta (red, cierre de la pestaña), al volver a elegir el mismo archivo se
+// pregunta cuánto llegó y se sigue desde ahí. Un 409 trae "recibido": el
+// servidor tiene otra posición y se sigue desde la que dice él.
+(function(){
+  const form = document.getElementById("subirAdjunto");
+  if(!form){ return; }
+
+  const input = document.getElementById("archivoAdjunto");
+  const progreso = document.getElementById("progresoAdjuntos");
+  const boton = form.querySelector('button[type="submit"]');
+  const subidasUrl = form.dataset.subidasUrl;
+  const maxBytes = parseInt(form.dataset.maxBytes, 10);
+  const tamanioParte = parseInt(form.dataset.tamanioParte, 10);
+  const csrf = form.querySelector('[name="csrfmiddlewaretoken"]').value;
+  const REINTENTOS = 5;
+
+  function clave(archivo){
+    return `adjunto:${form.dataset.historial}:${archivo.name}:${archivo.size}:${archivo.lastModified}`;
+  }
+
+  function fila(archivo){
+    const li = document.createElement("li");
+    li.innerHTML = '<progress max="100" value="0"></progress><span></span>';
+    li.querySelector("span").textContent = archivo.name;
+    progreso.appendChild(li);
+    return {
+      avance(n){ li.querySelector("progress").value = Math.round(100 * n / archivo.size); },
+    };
+  }
+
+  async function abrir(archivo){
+    const guardada = localStorage.getItem(clave(archivo));
+    if(guardada){
+      const resp = await fetch(guardada);
+      if(resp.ok){
+        const data = await resp.json();
+        return {url: guardada, recibido: data.recibido};
+      }
+      localStorage.removeItem(clave(archivo));  // venció o ya se completó
+    }
+    const datos = new FormData();
+    datos.set("nombre", archivo.name);
+    datos.set("tamanio", archivo.size);
+    const resp = await fetch(subidasUrl, {method: "POST", body: datos, headers: {"X-CSRFToken": csrf}});
+    const data = await resp.json();
+    if(!resp.ok){ throw new Error(data.error || "no se pudo iniciar la subida"); }
+    localStorage.setItem(clave(archivo), data.url);
+    return {url: data.url, recibido: data.recibido};
+  }
+
+  async function subir(archivo){
+    const vista = fila(archivo);
+    if(archivo.size > maxBytes){ throw new Error("demasiado grande"); }
+    let {url, recibido} = await abrir(archivo);
+    let fallos = 0;
+    vista.avance(recibido);
+    while(recibido < archivo.size){
+      const fin = Math.min(recibido + tamanioParte, archivo.size);
+      let resp;
+      try{
+        resp = await fetch(url, {
+          method: "PUT",
+          body: archivo.slice(recibido, fin),
+          headers: {
+            "X-CSRFToken": csrf,
+            "Content-Type": "application/octet-stream",
+            "Content-Range": `bytes ${recibido}-${fin - 1}/${archivo.size}`,
+          },
+        });
+      }catch(e){
+        resp = null;  // red caída: se reintenta desde lo que el servidor tenga
+      }
+      if(resp && (resp.ok || resp.status === 409)){
+        const data = await resp.json();
+        recibido = data.recibido;
+        fallos = 0;
+        vista.avance(recibido);
+        if(data.adjunto){ localStorage.removeItem(clave(archivo)); }
+        continue;
+      }
+      if(resp && resp.status < 500){
+        const data = await resp.json().catch(() => ({}));
+        throw new Error(data.error || `error ${resp.status}`);
+      }
+      if(++fallos > REINTENTOS){ throw new Error("sin conexión; volvé a elegir el archivo para seguir"); }
+      await new Promise(r => setTimeout(r, 1000 * fallos));
+      const estado = await fetch(url).then(r => r.json()).catch(() => null);
+      if(estado){ recibido = estado.recibido; }
+    }
+  }
+
+  form.addEventListener("submit", async function(ev){
+    ev.preventDefault();
+    if(!input.files.length){ return; }
+    boton.disabled = true;
+    let errores = 0;
+    for(const archivo of input.files){
+      try{
+        await subir(archivo);
+      }catch(e){
+        errores++;
+        progreso.lastElementChild.classList.add("error");
+        progreso.lastElementChild.querySelector("span").textContent = `${archivo.name}: ${e.message}`;
+      }
+    }
+    boton.disabled = false;
+    if(!errores){ window.location.reload(); }
+  });
+})();
@@ -0,0 +1,85 @@
+// Autocompletado de diagnósticos / tratamientos codificados en "Atender Cita".
+// Cada <select class="catalogo" data-tipo="..."> queda oculto y se maneja con
+// un buscador y "chips"; la URL de la API viene en data-catalogo-url del form.
+(function(){
+  const form = document.querySelector("form[data-catalogo-url]");
+  if(!form){ return; }
+  const url = form.dataset.catalogoUrl;
+
+  form.querySelectorAll("select.catalogo").forEach(function(select){
+    const tipo = select.dataset.tipo;
+    const elegidos = document.createElement("div");
+    elegidos.className = "catalogo-elegidos";
+    const buscar = document.createElement("input");
+    buscar.type = "search";
+    buscar.className = "catalogo-buscar";
+    buscar.placeholder = "Buscar por código, nombre o sinónimo...";
+    buscar.autocomplete = "off";
+    const resultados = document.createElement("ul");
+    resultados.className = "catalogo-resultados";
+
+    select.classList.add("js-oculto");
+    select.after(elegidos, buscar, resultados);
+
+    function pintarElegidos(){
+      elegidos.innerHTML = "";
+      Array.from(select.options).filter(o => o.selected).forEach(function(opt){
+        const chip = document.createElement("span");
+        chip.className = "catalogo-chip";
+        chip.textContent = opt.textContent;
+        const quitar = document.createElement("button");
+        quitar.type = "button";
+        quitar.textContent = "×";
+        quitar.addEventListener("click", function(){ opt.remove(); pintarElegidos(); });
+        chip.appendChild(quitar);
+        elegidos.appendChild(chip);
+      });
+    }
+
+    function elegir(item){
+      let opt = Array.from(select.options).find(o => o.value === String(item.id));
+      if(!opt){
+        opt = new Option(`${item.codigo} · ${item.nombre}`, item.id);
+        select.add(opt);
+      }
+      opt.selected = true;
+      buscar.value = "";
+      resultados.innerHTML = "";
+      pintarElegidos();
+    }
+
+    let espera = null;
+    buscar.addEventListener("input", function(){
+      clearTimeout(espera);
+      const q = buscar.value.trim();
+      if(!q){ resultados.innerHTML = ""; return; }
+      espera = setTimeout(async function(){
+        try{
+          const resp = await fetch(`${url}?tipo=${tipo}&q=${encodeURIComponent(q)}`);
+          const data = await resp.json();
+          resultados.innerHTML = "";
+          (data.resultados || []).forEach(function(item){
+            const li = document.createElement("li");
+            const codigo = document.createElement("small");
+            codigo.textContent = item.codigo;
+            li.append(codigo, item.nombre);
+            li.addEventListener("click", function(){ elegir(item); });
+            resultados.appendChild(li);
+          });
+        }catch(e){
+          resultados.innerHTML = "";
+        }
+      }, 150);
+    });
+    // Enter en el buscador elige el primer resultado en lugar de enviar el form
+    buscar.addEventListener("keydown", function(ev){
+      if(ev.key === "Enter"){
+        ev.preventDefault();
+        const primero = resultados.querySelector("li");
+        if(primero){ primero.click(); }
+      }
+    });
+
+    pintarElegidos();
+  });
+})();
@@ -0,0 +1,102 @@
+// Carga de horarios disponibles en "Programar Cita".
+// La URL de la API viene en data-slots-url del formulario (#citaForm).
+// Con fecha elegida, data-recomendar-url trae los veterinarios sugeridos
+// (menos cargados, especialidad, continuidad); el primero se preselecciona
+// si todavía no se eligió ninguno.
+(function(){
+  const form = document.getElementById("citaForm");
+  if(!form){ return; }
+
+  const vetSelect = form.querySelector('[name="veterinario"]');
+  const fechaInput = form.querySelector('[name="fecha"]');
+  const slotSelect = form.querySelector('[name="hora_slot"]');
+  const pacienteSelect = form.querySelector('[name="paciente"]');
+  const slotsUrl = form.dataset.slotsUrl;
+  const recomendarUrl = form.dataset.recomendarUrl;
+  const caja = document.getElementById("sugerencias");
+  const lista = document.getElementById("listaSugerencias");
+  const desdeInput = document.getElementById("franjaDesde");
+  const hastaInput = document.getElementById("franjaHasta");
+
+  async function cargarSlots(){
+    const vetId = vetSelect.value;
+    const fecha = fechaInput.value;
+    if(!vetId || !fecha){
+      slotSelect.innerHTML = '<option value="">Seleccione un horario</option>';
+      return;
+    }
+    try{
+      const resp = await fetch(`${slotsUrl}?vet_id=${vetId}&fecha=${fecha}`);
+      const data = await resp.json();
+      const opts = ['<option value="">Seleccione un horario</option>']
+        .concat((data.slots || []).map(h => `<option value="${h}">${h}</option>`));
+      slotSelect.innerHTML = opts.join('');
+    }catch(e){
+      slotSelect.innerHTML = '<option value="">Error cargando horarios</option>';
+    }
+  }
+
+  function marcarElegido(){
+    lista.querySelectorAll("button").forEach(b => {
+      b.classList.toggle("elegido", b.dataset.vet === vetSelect.value);
+    });
+  }
+
+  function elegir(vetId){
+    vetSelect.value = vetId;
+    marcarElegido();
+    cargarSlots();
+  }
+
+  async function cargarSugerencias(){
+    if(!recomendarUrl || !caja){ return; }
+    const fecha = fechaInput.value;
+    if(!fecha){ caja.hidden = true; return; }
+    const params = new URLSearchParams({fecha: fecha});
+    if(pacienteSelect && pacienteSelect.value){ params.set("paciente", pacienteSelect.value); }
+    if(desdeInput.value){ params.set("desde", desdeInput.value); }
+    if(hastaInput.value){ params.set("hasta", hastaInput.value); }
+    let data;
+    try{
+      const resp = await fetch(`${recomendarUrl}?${params}`);
+      if(!resp.ok){ caja.hidden = true; return; }
+      data = await resp.json();
+    }catch(e){
+      caja.hidden = true;
+      return;
+    }
+    const recomendados = data.recomendados || [];
+    lista.innerHTML = "";
+    recomendados.slice(0, 4).forEach(r => {
+      const li = document.createElement("li");
+      const boton = document.createElement("button");
+      boton.type = "button";
+      boton.dataset.vet = String(r.id);
+      boton.textContent = r.nombre;
+      const detalle = document.createElement("small");
+      detalle.textContent = r.motivos.join(" · ") + ` · ${r.slots.length} libres`;
+      boton.appendChild(detalle);
+      boton.addEventListener("click", () => elegir(boton.dataset.vet));
+      li.appendChild(boton);
+      lista.appendChild(li);
+    });
+    caja.hidden = recomendados.length === 0 && !desdeInput.value && !hastaInput.value;
+    if(!recomendados.length){
+      lista.innerHTML = '<li class="help">Nadie tiene turnos libres en esa franja.</li>';
+    }else if(!vetSelect.value){
+      elegir(String(recomendados[0].id));
+    }else{
+      marcarElegido();
+    }
+  }
+
+  vetSelect.addEventListener('change', () => { marcarElegido(); cargarSlots(); });
+  fechaInput.addEventListener('change', () => { cargarSugerencias(); cargarSlots(); });
+  if(pacienteSelect){ pacienteSelect.addEventListener('change', cargarSugerencias); }
+  if(desdeInput){ desdeInput.addEventListener('change', cargarSugerencias); }
+  if(hastaInput){ hastaInput.addEventListener('change', cargarSugerencias); }
+
+  // Si vienen iniciales (ej: reintento con errores), recarga
+  if(vetSelect.value && fechaInput.value){ cargarSlots(); }
+  if(fechaInput.value){ cargarSugerencias(); }
+})();
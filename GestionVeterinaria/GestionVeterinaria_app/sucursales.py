@@ -0,0 +1,82 @@
+"""
+Sucursales: alcance por request y datos cacheados.
+
+- SucursalMiddleware fija la sucursal activa del request en un contextvar
+  que lee PorSucursalManager (Cita.objects, Veterinario.objects,
+  Administrativo.objects). Se resuelve recién la primera vez que una
+  consulta la necesita: las páginas públicas no cargan sesión ni usuario.
+  * Veterinario: siempre la suya.
+  * Administrativo: la elegida en el selector del menú (sesión); sin
+    elegir, todas.
+- Fuera de un request (comandos, hilos de fondo) no hay sucursal activa y
+  los managers devuelven todo; en_sucursal() la fija a mano.
+- Las sucursales (pocas, casi estáticas) quedan en caché con su jornada.
+"""
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from . import replica
+from .models import Sucursal, _sucursal_activa, sucursal_activa_id
+from .sesiones import es_administrativo, es_veterinario
+
+CLAVE_SUCURSALES = "sucursales:todas"
+SESION_SUCURSAL = "sucursal_id"
+
+
+def todas():
+    """{id: Sucursal}, cacheado hasta que se edita alguna (ver signals.py)."""
+    sucursales = cache.get(CLAVE_SUCURSALES)
+    if sucursales is None:
+        with replica.en_principal():
+            sucursales = {s.pk: s for s in Sucursal.objects.order_by("nombre")}
+        cache.set(CLAVE_SUCURSALES, sucursales, None)
+    return sucursales
+
+
+def obtener(sucursal_id):
+    return todas().get(sucursal_id) if sucursal_id else None
+
+
+def invalidar():
+    cache.delete(CLAVE_SUCURSALES)
+
+
+def clave():
+    """Parte de las claves de caché que dependen de la sucursal activa."""
+    sucursal_id = sucursal_activa_id()
+    return f"s{sucursal_id}" if sucursal_id else "todas"
+
+
+def de_request(request):
+    """Sucursal a la que queda limitado el request (None = todas)."""
+    if not hasattr(request, "_sucursal_id"):
+        user = request.user
+        sucursal_id = None
+        if user.is_authenticated:
+            vet = getattr(user, "perfil_veterinario", None)
+            if es_administrativo(user):
+                sucursal_id = request.session.get(SESION_SUCURSAL)
+            elif es_veterinario(user) and vet is not None:
+                sucursal_id = vet.sucursal_id
+        request._sucursal_id = sucursal_id
+    return request._sucursal_id
+
+
+@contextmanager
+def en_sucursal(sucursal_id):
+    """Limita los managers a una sucursal dentro del bloque (None = todas)."""
+    token = _sucursal_activa.set(sucursal_id)
+    try:
+        yield
+    finally:
+        _sucursal_activa.reset(token)
+
+
+class SucursalMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with en_sucursal(lambda: de_request(request)):
+            return self.get_response(request)
@@ -1,3 +1,108 @@
-from django.test import TestCase
-
-# Create your tests here.
+from datetime import date, timedelta
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Administrativo, Cita, ConflictoVersion, HistorialMedico, ListaEspera, Paciente, Propietario, Rol, Veterinario
+
+
+class ConflictoVersionTests(TestCase):
+    """Bloqueo optimista: guardar sobre una versión vieja no pisa lo que guardó otro."""
+
+    def setUp(self):
+        call_command("init_roles", verbosity=0)
+        usuario = User.objects.create_user("vet", password="x")
+        usuario.groups.add(Group.objects.get(name="veterinario"))
+        self.client.login(username="vet", password="x")
+
+        veterinario = Veterinario.objects.create(
+            nombre="Ana", apellido="Paz", especialidad="Felinos", rol=Rol.objects.create(descripcion="Vet"), user=usuario,
+        )
+        administrativo = Administrativo.objects.create(
+            nombre="Sol", apellido="Rey", rol=Rol.objects.create(descripcion="Adm"), contacto="x",
+        )
+        propietario = Propietario.objects.create(
+            nombre="Juan", apellido="Perez", direccion="Calle 1", telefono="011 4555 1234", email="j@x.com",
+        )
+        self.paciente = Paciente.objects.create(
+            nombre="Firu", apellido="Perez", especie="Perro", sexo="M",
+            fecha_nacimiento=date(2020, 1, 1), propietario=propietario,
+        )
+        manana = timezone.now().replace(hour=14, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.cita = Cita.objects.create(
+            fecha_hora=manana, veterinario=veterinario, paciente=self.paciente, administrativo=administrativo,
+        )
+
+    def test_modelo_levanta_conflicto(self):
+        vieja = Paciente.objects.get(pk=self.paciente.pk)
+        self.paciente.nombre = "Otro"
+        self.paciente.save()
+        vieja.nombre = "Pisado"
+        with self.assertRaises(ConflictoVersion):
+            vieja.save()
+        self.assertEqual(Paciente.objects.get(pk=self.paciente.pk).nombre, "Otro")
+
+    def test_editar_paciente_con_version_vieja(self):
+        version_leida = self.paciente.version
+        self.paciente.nombre = "Otro"
+        self.paciente.save()
+
+        respuesta = self.client.post(reverse("editar_paciente", args=[self.paciente.pk]), {
+            "nombre": "Pisado", "apellido": "Perez", "especie": "Perro", "sexo": "M",
+            "fecha_nacimiento": "2020-01-01", "propietario": self.paciente.propietario_id, "version": version_leida,
+        })
+
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(Paciente.objects.get(pk=self.paciente.pk).nombre, "Otro")
+
+    def test_atender_cita_con_version_vieja(self):
+        version_leida = self.cita.version
+        Cita.objects.filter(pk=self.cita.pk).update(version=version_leida + 1)
+
+        respuesta = self.client.post(reverse("atender_cita", args=[self.cita.pk]), {
+            "diagnostico": "Otitis", "tratamiento": "Gotas", "version_cita": version_leida,
+        })
+
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertFalse(HistorialMedico.objects.filter(cita=self.cita).exists())
+        self.assertEqual(Cita.objects.get(pk=self.cita.pk).estado, "programada")
+
+    def test_cancelar_cita_con_version_vieja(self):
+        version_leida = self.cita.version
+        Cita.objects.filter(pk=self.cita.pk).update(version=version_leida + 1)
+
+        respuesta = self.client.post(reverse("cancelar_cita", args=[self.cita.pk]), {"version_cita": version_leida})
+
+        self.assertRedirects(respuesta, reverse("cancelar_cita", args=[self.cita.pk]))
+        self.assertEqual(Cita.objects.get(pk=self.cita.pk).estado, "programada")
+
+
+class EtiquetasSinConsultasTests(TestCase):
+    """__str__ de los modelos con FK: solo columnas propias (el admin los usa como etiqueta de raw_id_fields)."""
+
+    def test_str_no_carga_relaciones(self):
+        rol = Rol.objects.create(descripcion="Vet")
+        veterinario = Veterinario.objects.create(nombre="Ana", apellido="Paz", especialidad="Felinos", rol=rol)
+        administrativo = Administrativo.objects.create(nombre="Sol", apellido="Rey", rol=rol, contacto="x")
+        propietario = Propietario.objects.create(
+            nombre="Juan", apellido="Perez", direccion="Calle 1", telefono="011 4555 1234", email="j@x.com",
+        )
+        paciente = Paciente.objects.create(
+            nombre="Firu", apellido="Perez", especie="Perro", sexo="M",
+            fecha_nacimiento=date(2020, 1, 1), propietario=propietario,
+        )
+        cita = Cita.objects.create(
+            fecha_hora=timezone.now(), veterinario=veterinario, paciente=paciente, administrativo=administrativo,
+        )
+        HistorialMedico.objects.create(
+            fecha_consulta=timezone.now(), diagnostico="Otitis", tratamiento="Gotas", paciente=paciente, cita=cita,
+        )
+        ListaEspera.objects.create(paciente=paciente, desde=date.today(), hasta=date.today())
+
+        objetos = [Cita.objects.get(), HistorialMedico.objects.get(), ListaEspera.objects.get()]
+        with self.assertNumQueries(0):
+            for objeto in objetos:
+                str(objeto)
@@ -1,35 +1,58 @@
-from django.urls import path, include
-from GestionVeterinaria_app import views
-from django.conf.urls.static import static
-from django.shortcuts import redirect
-
-urlpatterns = [
-    path('', lambda request: redirect('home')), 
-    path('home/', views.home, name='home'),
-    path('contacto/', views.contacto, name='contacto'),
-    path('nosotros/', views.nosotros, name='nosotros'),
-    path('login/', views.login_view, name='login'),
-    path('nuevopaciente/', views.nuevo_paciente, name='nuevo_paciente'),
-    path('nuevopropietario/', views.nuevo_propietario, name='nuevo_propietario'),
-    path('nuevacita/', views.nueva_cita, name='nueva_cita'),
-    path('historialmedico/', views.historial_medico, name='historialmedico'),
-    path("estadisticas/", views.estadisticas_view, name="estadisticas"),
-    path("cita/<int:cita_id>/atender/", views.atender_cita, name="atender_cita"),
-    path('buscarpaciente/', views.buscar_paciente, name='buscar_paciente'),
-    path('editarpaciente/<int:paciente_id>/', views.editar_paciente, name='editar_paciente'),
-    path('buscarpropietario/', views.buscar_propietario, name='buscar_propietario'),
-    path('editarpropietario/<int:propietario_id>/', views.editar_propietario, name='editar_propietario'),
-    path('logout/', views.logout_view, name='logout'),
-    path('api/slots/', views.api_slots, name='api_slots'),
-    path("cita/<int:cita_id>/editar/", views.editar_cita, name="editar_cita"),
-    path("cita/<int:cita_id>/cancelar/", views.cancelar_cita, name="cancelar_cita"),
-
-    # Redirección según rol
-    path('redir/', views.role_redirect_view, name='role-redirect'),
-
-    # Agenda global (solo administrativo)
-    path('citas/', views.citas_list, name='citas_list'),
-
-    # Agenda del veterinario logueado
-    path('mis-citas/', views.mis_citas, name='mis_citas'),
+from django.urls import path, include
+from GestionVeterinaria_app import views
+from django.conf.urls.static import static
+from django.shortcuts import redirect
+
+urlpatterns = [
+    path('', lambda request: redirect('home')), 
+    path('home/', views.home, name='home'),
+    path('contacto/', views.contacto, name='contacto'),
+    path('nosotros/', views.nosotros, name='nosotros'),
+    path('login/', views.login_view, name='login'),
+    path('nuevopaciente/', views.nuevo_paciente, name='nuevo_paciente'),
+    path('nuevopropietario/', views.nuevo_propietario, name='nuevo_propietario'),
+    path('nuevacita/', views.nueva_cita, name='nueva_cita'),
+    path('historialmedico/', views.historial_medico, name='historialmedico'),
+    path("estadisticas/", views.estadisticas_view, name="estadisticas"),
+    path("estadisticas/salud/", views.estadisticas_salud, name="estadisticas_salud"),
+    path("vencimientos/", views.vencimientos_view, name="vencimientos"),
+    path("cita/<int:cita_id>/atender/", views.atender_cita, name="atender_cita"),
+    path('buscarpaciente/', views.buscar_paciente, name='buscar_paciente'),
+    path('editarpaciente/<int:paciente_id>/', views.editar_paciente, name='editar_paciente'),
+    path('historial/<int:historial_id>/adjuntos/', views.adjuntos_historial, name='adjuntos_historial'),
+    path('api/historial/<int:historial_id>/adjuntos/subidas/', views.api_subidas_adjunto, name='api_subidas_adjunto'),
+    path('api/adjuntos/subidas/<uuid:subida_id>/', views.api_subida_adjunto, name='api_subida_adjunto'),
+    path('adjuntos/<int:adjunto_id>/', views.descargar_adjunto, name='descargar_adjunto'),
+    path('adjuntos/<int:adjunto_id>/miniatura/', views.miniatura_adjunto, name='miniatura_adjunto'),
+    path('paciente/<int:paciente_id>/linea-tiempo/', views.linea_tiempo_paciente, name='linea_tiempo_paciente'),
+    path('paciente/<int:paciente_id>/expediente.<str:formato>', views.expediente_paciente, name='expediente_paciente'),
+    path('api/pacientes/<int:paciente_id>/linea-tiempo/', views.api_linea_tiempo, name='api_linea_tiempo'),
+    path('buscarpropietario/', views.buscar_propietario, name='buscar_propietario'),
+    path('editarpropietario/<int:propietario_id>/', views.editar_propietario, name='editar_propietario'),
+    path('llamada/', views.abrir_llamada, name='abrir_llamada'),
+    path('api/llamada/', views.api_llamada, name='api_llamada'),
+    path('logout/', views.logout_view, name='logout'),
+    path('duplicados/', views.duplicados_view, name='duplicados'),
+    path('ausencias/', views.ausencias_view, name='ausencias'),
+    path('ausencias/<int:ausencia_id>/reprogramar/', views.reprogramar_ausencia, name='reprogramar_ausencia'),
+    path('api/slots/', views.api_slots, name='api_slots'),
+    path('api/slots/recomendados/', views.api_recomendar_veterinario, name='api_recomendar_veterinario'),
+    path('api/catalogo/', views.api_catalogo, name='api_catalogo'),
+    path('api/cambios/', views.api_cambios, name='api_cambios'),
+    path("cita/<int:cita_id>/editar/", views.editar_cita, name="editar_cita"),
+    path("cita/<int:cita_id>/cancelar/", views.cancelar_cita, name="cancelar_cita"),
+    path("auditoria/<str:modelo>/<int:objeto_id>/", views.historial_cambios, name="historial_cambios"),
+    path("sucursal/", views.elegir_sucursal, name="elegir_sucursal"),
+
+    # Redirección según rol
+    path('redir/', views.role_redirect_view, name='role-redirect'),
+
+    # Agenda global (solo administrativo)
+    path('citas/', views.citas_list, name='citas_list'),
+
+    # Agenda del veterinario logueado
+    path('mis-citas/', views.mis_citas, name='mis_citas'),
+
+    # Feed iCalendar de la agenda del veterinario (token firmado, sin sesión)
+    path('agenda/<str:token>.ics', views.agenda_ical_feed, name='agenda_ical'),
 ]
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Vencimientos de vacunas, refuerzos y controles (ver ReglaVencimiento).
+
+- calcular(): todas las reglas activas contra todos los pacientes vigentes
+  con un número fijo de consultas, haya los pacientes que haya: pacientes
+  (especie y nacimiento), última aplicación de cada código por paciente (un
+  GROUP BY sobre la tabla intermedia de tratamientos), última consulta de
+  cualquier tipo por paciente, y lo mismo en el archivo. Las fechas se
+  calculan por regla sobre vectores de ordinales (NumPy si está instalado).
+- refrescar(): lleva el resultado a la tabla Vencimiento con upserts por
+  lotes, solo lo que cambió, y borra lo que ya no corresponde. Si cambia la
+  fecha de un vencimiento, su recordatorio vuelve a quedar pendiente.
+- avisar(): un correo por propietario con lo que vence dentro de la
+  anticipación de cada regla y todavía no se avisó.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from . import portal
+from .models import HistorialMedico, HistorialMedicoArchivado, Paciente, ReglaVencimiento, Vencimiento
+from .salud import normalizar
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sin NumPy las fechas se calculan fila a fila
+    np = None
+
+LOTE = 500
+MAX_LISTADO = 300
+# Clave de "cualquier consulta" en el dict de últimas fechas
+CONSULTA = None
+
+
+def _dia(fecha_hora):
+    return timezone.localtime(fecha_hora).date().toordinal()
+
+
+def _ultimas(reglas):
+    """{(paciente_id, codigo_id | CONSULTA): ordinal de la última vez}, vivos y archivados."""
+    ultimas = {}
+
+    def anotar(paciente_id, clave, fecha_hora):
+        dia = _dia(fecha_hora)
+        if dia > ultimas.get((paciente_id, clave), 0):
+            ultimas[(paciente_id, clave)] = dia
+
+    codigos = {r.codigo_id: r.codigo.codigo for r in reglas if r.codigo_id}
+    if codigos:
+        Tratamientos = HistorialMedico.tratamientos.through
+        filas = (
+            Tratamientos.objects.filter(codigoclinico_id__in=codigos)
+            .values_list("historialmedico__paciente_id", "codigoclinico_id")
+            .annotate(ultima=Max("historialmedico__fecha_consulta"))
+        )
+        for paciente_id, codigo_id, ultima in filas:
+            anotar(paciente_id, codigo_id, ultima)
+
+        # En el archivo los códigos son texto (JSON): LIKE por cada código buscado
+        por_texto = {texto: codigo_id for codigo_id, texto in codigos.items()}
+        mencionan = Q()
+        for texto in por_texto:
+            mencionan |= Q(codigos__icontains=f'"{texto}"')
+        archivados = HistorialMedicoArchivado.objects.filter(mencionan).values_list(
+            "paciente_id", "fecha_consulta", "codigos",
+        )
+        for paciente_id, fecha_hora, textos in archivados:
+            for texto in textos:
+                if texto in por_texto:
+                    anotar(paciente_id, por_texto[texto], fecha_hora)
+
+    if any(r.codigo_id is None for r in reglas):
+        for modelo in (HistorialMedico, HistorialMedicoArchivado):
+            for paciente_id, ultima in modelo.objects.values_list("paciente_id").annotate(ultima=Max("fecha_consulta")):
+                anotar(paciente_id, CONSULTA, ultima)
+    return ultimas
+
+
+def _fechas(nacimientos, ultimas, edad_dias, intervalo_dias):
+    """
+    Ordinal del vencimiento para cada paciente (0 = no vence): última vez +
+    intervalo, o nacimiento + edad si nunca se hizo.
+    """
+    if np is None:
+        return [
+            (u + intervalo_dias if intervalo_dias is not None else 0) if u
+            else (n + edad_dias if edad_dias is not None else 0)
+            for n, u in zip(nacimientos, ultimas)
+        ]
+    nacimientos = np.asarray(nacimientos, dtype=np.int64)
+    ultimas = np.asarray(ultimas, dtype=np.int64)
+    hecho = ultimas > 0
+    refuerzo = ultimas + intervalo_dias if intervalo_dias is not None else np.zeros_like(ultimas)
+    primera = nacimientos + edad_dias if edad_dias is not None else np.zeros_like(nacimientos)
+    return np.where(hecho, refuerzo, primera).tolist()
+
+
+def calcular(reglas=None):
+    """{(paciente_id, regla_id): (vence, ultima)} para las reglas activas."""
+    reglas = list(reglas if reglas is not None else ReglaVencimiento.objects.filter(activa=True).select_related("codigo"))
+    if not reglas:
+        return {}
+
+    por_especie = defaultdict(list)
+    for pk, especie, nacimiento in Paciente.objects.values_list("id", "especie", "fecha_nacimiento"):
+        por_especie[normalizar(especie, 50)].append((pk, nacimiento.toordinal()))
+    ultimas = _ultimas(reglas)
+
+    resultado = {}
+    for regla in reglas:
+        especie = normalizar(regla.especie, 50)
+        pacientes = por_especie.get(especie, []) if especie else [p for ps in por_especie.values() for p in ps]
+        if not pacientes:
+            continue
+        clave = regla.codigo_id if regla.codigo_id else CONSULTA
+        ids = [pk for pk, _ in pacientes]
+        hechas = [ultimas.get((pk, clave), 0) for pk in ids]
+        vencen = _fechas([n for _, n in pacientes], hechas, regla.edad_dias, regla.intervalo_dias)
+        for pk, vence, ultima in zip(ids, vencen, hechas):
+            if vence:
+                resultado[(pk, regla.pk)] = (date.fromordinal(vence), date.fromordinal(ultima) if ultima else None)
+    return resultado
+
+
+def refrescar(lote=LOTE):
+    """Lleva calcular() a la tabla. Devuelve (altas_o_cambios, bajas, total)."""
+    ahora = timezone.now()
+    nuevos = calcular()
+    existentes = {
+        (p, r): (pk, vence, ultima, avisado_en)
+        for pk, p, r, vence, ultima, avisado_en in Vencimiento.objects.values_list(
+            "pk", "paciente_id", "regla_id", "vence", "ultima", "avisado_en",
+        )
+    }
+
+    cambiados = []
+    for (paciente_id, regla_id), (vence, ultima) in nuevos.items():
+        previo = existentes.get((paciente_id, regla_id))
+        if previo and previo[1:3] == (vence, ultima):
+            continue
+        cambiados.append(Vencimiento(
+            paciente_id=paciente_id, regla_id=regla_id, vence=vence, ultima=ultima,
+            # Misma fecha: el aviso ya dado sigue valiendo
+            avisado_en=previo[3] if previo and previo[1] == vence else None,
+            calculado_en=ahora,
+        ))
+    for i in range(0, len(cambiados), lote):
+        with transaction.atomic():
+            Vencimiento.objects.bulk_create(
+                cambiados[i:i + lote], update_conflicts=True, unique_fields=["paciente", "regla"],
+                update_fields=["vence", "ultima", "avisado_en", "calculado_en"],
+            )
+
+    sobrantes = [previo[0] for clave, previo in existentes.items() if clave not in nuevos]
+    for i in range(0, len(sobrantes), lote):
+        with transaction.atomic():
+            Vencimiento.objects.filter(pk__in=sobrantes[i:i + lote]).delete()
+    return len(cambiados), len(sobrantes), len(nuevos)
+
+
+def proximos(dias=30, tipo=None, hoy=None):
+    """Vencidos y por vencer en los próximos `dias` días, el más urgente primero."""
+    hoy = hoy or timezone.localdate()
+    qs = (
+        Vencimiento.objects.filter(
+            vence__lte=hoy + timedelta(days=dias), regla__activa=True, paciente__eliminado_en__isnull=True,
+        )
+        .select_related("paciente__propietario", "regla")
+        .order_by("vence", "paciente__nombre")
+    )
+    return qs.filter(regla__tipo=tipo) if tipo else qs
+
+
+# ------------------------------
+# Recordatorios
+# ------------------------------
+def pendientes_de_aviso(hoy=None):
+    """Vencimientos sin avisar que entran en la anticipación de su regla."""
+    hoy = hoy or timezone.localdate()
+    anticipacion = ReglaVencimiento.objects.filter(activa=True).aggregate(m=Max("aviso_dias"))["m"]
+    if anticipacion is None:
+        return []
+    return [
+        v for v in proximos(anticipacion, hoy=hoy).filter(avisado_en__isnull=True)
+        if v.vence <= hoy + timedelta(days=v.regla.aviso_dias)
+    ]
+
+
+def avisar(hoy=None, simular=False):
+    """Un correo por propietario. Devuelve [(propietario, [vencimientos])] avisados."""
+    hoy = hoy or timezone.localdate()
+    por_propietario = defaultdict(list)
+    for v in pendientes_de_aviso(hoy):
+        por_propietario[v.paciente.propietario].append(v)
+
+    avisados = []
+    for propietario, vencimientos in por_propietario.items():
+        if simular or _enviar(propietario, vencimientos, hoy):
+            avisados.append((propietario, vencimientos))
+    if not simular:
+        Vencimiento.objects.filter(
+            pk__in=[v.pk for _, vs in avisados for v in vs],
+        ).update(avisado_en=timezone.now())
+    return avisados
+
+
+def _enviar(propietario, vencimientos, hoy):
+    lineas = "\n".join(
+        f"- {v.paciente.nombre}: {v.regla.nombre} "
+        f"({'venció' if v.vence < hoy else 'vence'} el {v.vence:%d/%m/%Y})"
+        for v in sorted(vencimientos, key=lambda v: (v.vence, v.paciente.nombre))
+    )
+    return portal.avisar(
+        propietario,
+        "Recordatorio de vacunas y controles",
+        f"Te recordamos lo que tienen pendiente tus mascotas:\n\n{lineas}\n\nPodés reservar un turno desde el portal:",
+    )
@@ -1,469 +1,1062 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, JsonResponse
-from django.views.decorators.csrf import csrf_protect
-from django.contrib import messages
-from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
-from django.contrib.auth.decorators import login_required
-from django.utils import timezone
-from django.core.exceptions import PermissionDenied
-from django.db.models import Count, Min       
-from django.db.models.functions import ExtractHour  
-from django.db.models import Q
-from .forms import *
-from .models import Paciente, Cita, Propietario, Veterinario
-from django.urls import reverse
-from datetime import datetime, time, timedelta
-from django.utils import timezone
-
-
-def home(request):
-    return render(request, 'GestionVeterinaria_app/home.html')
-
-
-def contacto(request):
-    return render(request, 'GestionVeterinaria_app/contacto.html')
-
-
-def nosotros(request):
-    return render(request, 'GestionVeterinaria_app/nosotros.html')
-
-
-@csrf_protect
-def login_view(request):
-    if request.method == "POST":
-        u = request.POST.get("username", "").strip()
-        p = request.POST.get("password", "")
-        user = authenticate(request, username=u, password=p)
-        if user is not None:
-            auth_login(request, user)
-            return redirect('role-redirect')   # decide destino según rol
-        messages.error(request, "Usuario o contraseña inválidos.")
-    return render(request, "GestionVeterinaria_app/login.html")
-
-
-def nuevo_paciente(request):
-    if request.method == 'POST':
-        form = PacienteForm(request.POST)
-        if form.is_valid():
-            form.save()
-            return redirect('nuevo_paciente')
-        else:
-            # Mostrar errores en el mismo template
-            return render(request, 'GestionVeterinaria_app/nuevopaciente.html', {'form': form})
-    else:
-        form = PacienteForm()
-    return render(request, 'GestionVeterinaria_app/nuevopaciente.html', {'form': form})
-
-
-def nuevo_propietario(request):
-    if request.method == 'POST':
-        form = PropietarioForm(request.POST)
-        if form.is_valid():
-            form.save()
-            return redirect('nuevo_propietario')
-    else:
-        form = PropietarioForm()
-    return render(request, 'GestionVeterinaria_app/nuevopropietario.html', {'form': form})
-
-
-def nueva_cita(request):
-    if request.method == 'POST':
-        form = CitaForm(request.POST)
-        if form.is_valid():
-            form.save()
-            return redirect('nueva_cita')  # redirige por nombre de URL
-    else:
-        form = CitaForm()
-    return render(request, 'GestionVeterinaria_app/nuevacita.html', {'form': form})
-
-
-def historial_medico(request):
-    paciente_id = request.GET.get('paciente')
-    paciente = None
-    historial_medico = []
-
-    if paciente_id:
-        paciente = get_object_or_404(Paciente, id=paciente_id)
-        historial_medico = paciente.historial_medico.all()
-
-    return render(request, 'GestionVeterinaria_app/historialmedico.html', {
-        'pacientes': Paciente.objects.all(),
-        'paciente': paciente,
-        'historial_medico': historial_medico,
-    })
-
-
-@login_required
-def role_redirect_view(request):
-    u = request.user
-    if u.groups.filter(name="administrativo").exists():
-        return redirect('citas_list')   # agenda global (admin)
-    if u.groups.filter(name="veterinario").exists():
-        return redirect('mis_citas')    # agenda del vet
-    return redirect('home')            
-
-
-# ------------------------------
-# Función auxiliar para alertas
-# ------------------------------
-def _split_hoy_maniana(qs):
-    """
-    Marca las citas de hoy y mañana y devuelve info para resaltarlas/contarlas.
-    """
-    now_local = timezone.localtime(timezone.now())
-    hoy = now_local.date()
-    maniana = hoy + timezone.timedelta(days=1)
-
-    hoy_ids, maniana_ids = [], []
-    for c in qs:
-        d = timezone.localtime(c.fecha_hora).date()
-        if d == hoy:
-            hoy_ids.append(c.id)
-        elif d == maniana:
-            maniana_ids.append(c.id)
-
-    return {
-        "hoy_ids": hoy_ids,
-        "maniana_ids": maniana_ids,
-        "count_hoy": len(hoy_ids),
-        "count_maniana": len(maniana_ids),
-        "count_total": len(hoy_ids) + len(maniana_ids),
-    }
-
-
-@login_required
-def citas_list(request):
-    if not request.user.groups.filter(name="administrativo").exists():
-        return redirect('mis_citas') 
-    citas = Cita.objects.all().select_related('paciente', 'veterinario')
-    alerts = _split_hoy_maniana(citas)
-    return render(
-        request,
-        "GestionVeterinaria_app/citas_list.html",
-        {"citas": citas, **alerts}
-    )
-
-
-@login_required
-def mis_citas(request):
-    """
-    Muestra las citas del veterinario asociado al usuario logueado.
-    Requiere que el modelo Veterinario tenga OneToOne con User usando related_name='perfil_veterinario'.
-    """
-    vet = getattr(request.user, 'perfil_veterinario', None)
-    if vet is not None:
-        citas = Cita.objects.select_related('paciente', 'veterinario').filter(veterinario=vet)
-    else:
-        citas = []  # usuario sin perfil de veterinario vinculado
-    alerts = _split_hoy_maniana(citas)
-    return render(
-        request,
-        "GestionVeterinaria_app/mis_citas.html",
-        {"citas": citas, **alerts}
-    )
-
-
-
-@login_required
-def estadisticas_view(request):
-    """
-    Estadísticas de los últimos 60 días:
-    - Pacientes nuevos (si hay Paciente.created_at, lo usa; si no, calcula por primera cita)
-    - Citas por veterinario
-    - Especies más atendidas (pacientes únicos)
-    - Top propietarios por cantidad de pacientes atendidos (únicos)
-    - Horarios pico (citas por hora 0-23)
-    """
-    ahora = timezone.localtime(timezone.now())
-    desde = ahora - timezone.timedelta(days=60)
-
-    # Base: citas en los últimos 60 días
-    citas_60d = (
-        Cita.objects
-        .select_related("veterinario", "paciente", "paciente__propietario")
-        .filter(fecha_hora__gte=desde, fecha_hora__lte=ahora)
-    )
-
-    # Total de citas en la ventana (para mostrar en tarjeta)
-    total_citas_60d = citas_60d.count()
-
-    # ---------- Pacientes nuevos (últimos 60 días) ----------
-    usar_created = hasattr(Paciente, "created_at")
-    if usar_created:
-        pacientes_nuevos_60d = Paciente.objects.filter(created_at__gte=desde).count()
-    else:
-        # Fallback: primera cita dentro de la ventana
-        primeras = (
-            Cita.objects.values("paciente_id")
-            .annotate(primer_turno=Min("fecha_hora"))
-            .filter(primer_turno__gte=desde, primer_turno__lte=ahora)
-            .count()
-        )
-        pacientes_nuevos_60d = primeras
-
-    # ---------- Citas por veterinario (conteo) ----------
-    citas_por_vet = (
-        citas_60d
-        .values("veterinario__nombre", "veterinario__apellido")
-        .annotate(total=Count("id"))
-        .order_by("-total", "veterinario__apellido", "veterinario__nombre")
-    )
-    citas_por_vet_list = [{
-        "veterinario": f"{x['veterinario__nombre']} {x['veterinario__apellido']}",
-        "total": x["total"]
-    } for x in citas_por_vet]
-
-    # ---------- Especies más atendidas (pacientes únicos) ----------
-    especies = (
-        citas_60d
-        .values("paciente__especie")
-        .annotate(pacientes_unicos=Count("paciente_id", distinct=True))
-        .order_by("-pacientes_unicos")[:10]
-    )
-
-    # ---------- Top propietarios (por pacientes únicos atendidos) ----------
-    top_propietarios = (
-        citas_60d
-        .values("paciente__propietario__nombre", "paciente__propietario__apellido")
-        .annotate(pacientes_atendidos=Count("paciente_id", distinct=True))
-        .order_by("-pacientes_atendidos", "paciente__propietario__apellido")[:10]
-    )
-    top_propietarios_list = [{
-        "propietario": f"{x['paciente__propietario__nombre']} {x['paciente__propietario__apellido']}",
-        "pacientes_atendidos": x["pacientes_atendidos"]
-    } for x in top_propietarios]
-
-    # ---------- Horarios pico ----------
-    horarios = (
-        citas_60d
-        .annotate(hora=ExtractHour("fecha_hora"))
-        .values("hora")
-        .annotate(total=Count("id"))
-        .order_by("hora")
-    )
-    mapa_horas = {h["hora"]: h["total"] for h in horarios}
-    horarios_list = [{"hora": h, "total": mapa_horas.get(h, 0)} for h in range(9, 19)]
-
-    context = {
-        "desde": desde,
-        "hasta": ahora,
-        "pacientes_nuevos_60d": pacientes_nuevos_60d,
-        "total_citas_60d": total_citas_60d,             
-        "citas_por_vet": citas_por_vet_list,
-        "especies": especies,
-        "top_propietarios": top_propietarios_list,
-        "horarios": horarios_list,
-    }
-    return render(request, "GestionVeterinaria_app/estadisticas.html", context)
-
-
-def _puede_gestionar_cita(user, cita):
-    # Admins pueden todo; vet solo sus propias
-    if user.groups.filter(name="administrativo").exists():
-        return True
-    vet = getattr(user, 'perfil_veterinario', None)
-    return vet is not None and cita.veterinario_id == vet.id
-
-@login_required
-def editar_cita(request, cita_id):
-    cita = get_object_or_404(Cita, pk=cita_id)
-    if not _puede_gestionar_cita(request.user, cita):
-        return HttpResponseForbidden("No tenés permisos para editar esta cita.")
-
-    if request.method == "POST":
-        form = CitaForm(request.POST, instance=cita)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "La cita se actualizó correctamente.")
-            # redirigir según rol
-            if request.user.groups.filter(name="administrativo").exists():
-                return redirect('citas_list')
-            return redirect('mis_citas')
-    else:
-        form = CitaForm(instance=cita)
-
-    return render(request, "GestionVeterinaria_app/editar_cita.html", {"form": form, "cita": cita})
-
-@login_required
-def cancelar_cita(request, cita_id):
-    cita = get_object_or_404(Cita, pk=cita_id)
-    if not _puede_gestionar_cita(request.user, cita):
-        return HttpResponseForbidden("No tenés permisos para cancelar esta cita.")
-
-    if request.method == "POST":
-        cita.estado = 'cancelada'
-        cita.save()
-        messages.success(request, "La cita fue cancelada. El horario quedó disponible.")
-        if request.user.groups.filter(name="administrativo").exists():
-            return redirect('citas_list')
-        return redirect('mis_citas')
-
-    # Confirmación
-    return render(request, "GestionVeterinaria_app/cancelar_cita_confirm.html", {"cita": cita})
-
-# Si tenés la vista atender_cita, marcá la cita como atendida al guardar la atención:
-@login_required
-def atender_cita(request, cita_id):
-    cita = get_object_or_404(Cita, pk=cita_id)
-    if not _puede_gestionar_cita(request.user, cita):
-        return HttpResponseForbidden("No tenés permisos para atender esta cita.")
-
-    if request.method == "POST":
-        form = HistorialAtencionForm(request.POST)  # el que ya usás
-        if form.is_valid():
-            atencion = form.save(commit=False)
-            atencion.cita = cita
-            atencion.paciente = cita.paciente
-            atencion.save()
-
-            # marcar cita atendida
-            cita.estado = 'atendida'
-            cita.save()
-
-            messages.success(request, "Atención registrada y cita marcada como atendida.")
-            if request.user.groups.filter(name="administrativo").exists():
-                return redirect('citas_list')
-            return redirect('mis_citas')
-    else:
-        form = HistorialAtencionForm()
-
-    return render(request, "GestionVeterinaria_app/atender_cita.html", {"form": form, "cita": cita})
-
-
-
-
-
-@login_required
-def buscar_paciente(request):
-    """
-    Búsqueda simple por nombre, apellido, especie, raza, o datos del propietario.
-    Si hay resultados, se muestran con botón Editar.
-    """
-    q = request.GET.get("q", "").strip()
-    resultados = []
-    if q:
-        resultados = (
-            Paciente.objects.select_related("propietario")
-            .filter(
-                Q(nombre__icontains=q) |
-                Q(apellido__icontains=q) |
-                Q(especie__icontains=q) |
-                Q(raza__icontains=q) |
-                Q(propietario__nombre__icontains=q) |
-                Q(propietario__apellido__icontains=q) |
-                Q(propietario__email__icontains=q) |
-                Q(propietario__telefono__icontains=q)
-            )
-            .order_by("apellido", "nombre")[:100]
-        )
-
-    return render(
-        request,
-        "GestionVeterinaria_app/buscar_paciente.html",
-        {"q": q, "resultados": resultados},
-    )
-
-
-@login_required
-def editar_paciente(request, paciente_id):
-    """
-    Edición de un paciente existente usando PacienteForm.
-    """
-    paciente = get_object_or_404(Paciente.objects.select_related("propietario"), pk=paciente_id)
-
-    if request.method == "POST":
-        form = PacienteForm(request.POST, instance=paciente)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Paciente actualizado correctamente.")
-            # Si querés volver a la búsqueda con el nombre del paciente:
-            return redirect(f"{reverse('buscar_paciente')}?q={paciente.nombre}")
-    else:
-        form = PacienteForm(instance=paciente)
-
-    return render(
-        request,
-        "GestionVeterinaria_app/editar_paciente.html",
-        {"form": form, "paciente": paciente},
-    )
-
-
-
-@login_required
-def buscar_propietario(request):
-    query = request.GET.get("q", "").strip()
-    propietarios = Propietario.objects.all()
-    if query:
-        from django.db.models import Q
-        propietarios = propietarios.filter(
-            Q(nombre__icontains=query) |
-            Q(apellido__icontains=query) |
-            Q(email__icontains=query) |
-            Q(telefono__icontains=query) |
-            Q(direccion__icontains=query)
-        ).order_by("apellido", "nombre")[:200]
-
-    return render(request, "GestionVeterinaria_app/buscar_propietario.html",  # ← ruta corregida
-                  {"q": query, "propietarios": propietarios})
-
-
-@login_required
-def editar_propietario(request, propietario_id):
-    propietario = get_object_or_404(Propietario, id=propietario_id)
-    if request.method == "POST":
-        form = PropietarioForm(request.POST, instance=propietario)
-        if form.is_valid():
-            form.save()
-            messages.success(request, "Propietario actualizado correctamente.")
-            return redirect("buscar_propietario")
-    else:
-        form = PropietarioForm(instance=propietario)
-
-    return render(request, "GestionVeterinaria_app/editar_propietario.html",  # ← ruta corregida
-                  {"form": form, "propietario": propietario})
-
-
-
-@login_required
-def logout_view(request):
-    auth_logout(request)
-    messages.success(request, "Sesión cerrada correctamente.")
-    return redirect('login')
-
-
-
-def api_slots(request):
-    """
-    GET /api/slots/?vet_id=ID&fecha=YYYY-MM-DD
-    Devuelve: { "slots": ["09:00","09:30", ...] }
-    """
-    vet_id = request.GET.get("vet_id")
-    fecha_str = request.GET.get("fecha")
-
-    if not vet_id or not fecha_str:
-        return JsonResponse({"slots": []})
-
-    vet = Veterinario.objects.filter(pk=vet_id).first()
-    if not vet:
-        return JsonResponse({"slots": []})
-
-    try:
-        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-    except ValueError:
-        return JsonResponse({"slots": []})
-
-    # turnos ocupados del vet en esa fecha
-    desde = datetime.combine(fecha, time(0, 0))
-    hasta = datetime.combine(fecha, time(23, 59))
-    if timezone.is_naive(desde):
-        desde = timezone.make_aware(desde, timezone.get_current_timezone())
-        hasta = timezone.make_aware(hasta, timezone.get_current_timezone())
-
-    ocupadas = (
-        Cita.objects.filter(veterinario=vet, fecha_hora__range=(desde, hasta))
-        .values_list("fecha_hora", flat=True)
-    )
-    ocupados_set = set([timezone.localtime(dt).strftime("%H:%M") for dt in ocupadas])
-
-    slots = generar_slots(fecha, ocupados_set)
-    return JsonResponse({"slots": slots})
\ No newline at end of file
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse, Http404, HttpResponseNotModified, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_protect
+from django import forms
+from django.contrib import messages
+from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
+from django.contrib.auth.decorators import login_required
+from django.utils import timezone
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Count, Min       
+from django.db.models.functions import ExtractHour  
+from django.db.models import Q
+from .forms import *
+from .models import Adjunto, AusenciaVeterinario, HistorialMedico, HistorialMedicoArchivado, Paciente, Cita, Propietario, ReglaVencimiento, SubidaAdjunto, Veterinario, ConflictoVersion, solo_digitos, sucursal_activa_id
+from django.urls import reverse
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe, url_has_allowed_host_and_scheme, urlencode
+from django.utils.functional import SimpleLazyObject
+from django.core.cache import cache
+from django.conf import settings
+from . import adjuntos, agenda_ical, archivo, auditoria, ausencias, cambios, catalogo, disponibilidad, duplicados, expediente, linea_tiempo, llamadas, pronostico, recomendacion, replica, salud, sucursales, vencimientos
+from .sesiones import es_administrativo, es_veterinario
+
+
+def home(request):
+    return render(request, 'GestionVeterinaria_app/home.html')
+
+
+def contacto(request):
+    return render(request, 'GestionVeterinaria_app/contacto.html')
+
+
+def nosotros(request):
+    return render(request, 'GestionVeterinaria_app/nosotros.html')
+
+
+@csrf_protect
+def login_view(request):
+    if request.method == "POST":
+        u = request.POST.get("username", "").strip()
+        p = request.POST.get("password", "")
+        user = authenticate(request, username=u, password=p)
+        if user is not None:
+            auth_login(request, user)
+            return redirect('role-redirect')   # decide destino según rol
+        messages.error(request, "Usuario o contraseña inválidos.")
+    return render(request, "GestionVeterinaria_app/login.html")
+
+
+def nuevo_paciente(request):
+    if request.method == 'POST':
+        form = PacienteForm(request.POST)
+        if form.is_valid():
+            form.save()
+            return redirect('nuevo_paciente')
+        else:
+            # Mostrar errores en el mismo template
+            return render(request, 'GestionVeterinaria_app/nuevopaciente.html', {'form': form})
+    else:
+        form = PacienteForm()
+    return render(request, 'GestionVeterinaria_app/nuevopaciente.html', {'form': form})
+
+
+def nuevo_propietario(request):
+    if request.method == 'POST':
+        form = PropietarioForm(request.POST)
+        if form.is_valid():
+            form.save()
+            return redirect('nuevo_propietario')
+    else:
+        form = PropietarioForm()
+    return render(request, 'GestionVeterinaria_app/nuevopropietario.html', {'form': form})
+
+
+def nueva_cita(request):
+    if request.method == 'POST':
+        form = CitaForm(request.POST)
+        if form.is_valid():
+            form.save()
+            return redirect('nueva_cita')  # redirige por nombre de URL
+    else:
+        form = CitaForm()
+    return render(request, 'GestionVeterinaria_app/nuevacita.html', {'form': form})
+
+
+@replica.desde_replica
+def historial_medico(request):
+    paciente_id = request.GET.get('paciente')
+    paciente = None
+    historial_medico = []
+
+    if paciente_id:
+        paciente = get_object_or_404(Paciente.objects, id=paciente_id)
+        historial_medico = archivo.historial_de_paciente(paciente)
+
+    return render(request, 'GestionVeterinaria_app/historialmedico.html', {
+        'pacientes': Paciente.objects.all(),
+        'paciente': paciente,
+        'historial_medico': historial_medico,
+        'pdf_disponible': expediente.pdf_disponible(),
+    })
+
+
+@login_required
+def role_redirect_view(request):
+    u = request.user
+    if es_administrativo(u):
+        return redirect('citas_list')   # agenda global (admin)
+    if es_veterinario(u):
+        return redirect('mis_citas')    # agenda del vet
+    return redirect('home')            
+
+
+# ------------------------------
+# Función auxiliar para alertas
+# ------------------------------
+def _split_hoy_maniana(qs):
+    """
+    Marca las citas de hoy y mañana y devuelve info para resaltarlas/contarlas.
+    """
+    now_local = timezone.localtime(timezone.now())
+    hoy = now_local.date()
+    maniana = hoy + timezone.timedelta(days=1)
+
+    hoy_ids, maniana_ids = [], []
+    for c in qs:
+        d = timezone.localtime(c.fecha_hora).date()
+        if d == hoy:
+            hoy_ids.append(c.id)
+        elif d == maniana:
+            maniana_ids.append(c.id)
+
+    return {
+        "hoy_ids": hoy_ids,
+        "maniana_ids": maniana_ids,
+        "count_hoy": len(hoy_ids),
+        "count_maniana": len(maniana_ids),
+        "count_total": len(hoy_ids) + len(maniana_ids),
+    }
+
+
+@login_required
+def citas_list(request):
+    if not es_administrativo(request.user):
+        return redirect('mis_citas') 
+    citas = Cita.objects.all().select_related('paciente__propietario', 'veterinario', 'atencion')
+    alerts = _split_hoy_maniana(citas)
+    return render(
+        request,
+        "GestionVeterinaria_app/citas_list.html",
+        {"citas": citas, **alerts}
+    )
+
+
+@login_required
+def mis_citas(request):
+    """
+    Muestra las citas del veterinario asociado al usuario logueado.
+    Requiere que el modelo Veterinario tenga OneToOne con User usando related_name='perfil_veterinario'.
+    """
+    vet = getattr(request.user, 'perfil_veterinario', None)
+    ical_url = None
+    if vet is not None:
+        citas = Cita.objects.select_related('paciente__propietario', 'veterinario').filter(veterinario=vet)
+        ical_url = request.build_absolute_uri(reverse('agenda_ical', args=[agenda_ical.token_para(vet)]))
+    else:
+        citas = []  # usuario sin perfil de veterinario vinculado
+    alerts = _split_hoy_maniana(citas)
+    return render(
+        request,
+        "GestionVeterinaria_app/mis_citas.html",
+        {"citas": citas, "ical_url": ical_url, **alerts}
+    )
+
+
+def agenda_ical_feed(request, token):
+    """
+    GET /agenda/<token>.ics?desde=YYYY-MM-DD&hasta=YYYY-MM-DD
+    Feed para suscribirse desde el calendario del teléfono. Sin sesión: el token
+    firmado identifica al veterinario. Responde 304 con If-Modified-Since.
+    """
+    datos = agenda_ical.leer_token(token)
+    if datos is None:
+        raise Http404("Token inválido.")
+    vet_id, user_id = datos
+    # Antes del 304 y del cuerpo cacheado: un token revocado no recibe nada
+    nombre_vet = agenda_ical.titular(vet_id, user_id)
+    if nombre_vet is None:
+        raise Http404("Token inválido.")
+
+    estampa = agenda_ical.estampa(vet_id)
+    ims = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    if ims is not None and estampa <= ims:
+        response = HttpResponseNotModified()
+        response["Last-Modified"] = http_date(estampa)
+        return response
+
+    desde, hasta = agenda_ical.ventana(request.GET.get("desde"), request.GET.get("hasta"))
+    clave = agenda_ical.clave_cuerpo(vet_id, estampa, desde, hasta)
+    cuerpo = cache.get(clave)
+    if cuerpo is not None:
+        response = HttpResponse(cuerpo, content_type="text/calendar; charset=utf-8")
+    else:
+        lineas = agenda_ical.generar(vet_id, desde, hasta, nombre_vet=nombre_vet)
+        response = StreamingHttpResponse(
+            agenda_ical.generar_y_cachear(clave, lineas),
+            content_type="text/calendar; charset=utf-8",
+        )
+    response["Last-Modified"] = http_date(estampa)
+    response["Cache-Control"] = "private, max-age=300"
+    return response
+
+
+def _tablas_estadisticas(desde, ahora):
+    # Base: citas en los últimos 60 días (+ archivo solo si la ventana lo alcanza)
+    fuentes = archivo.fuentes_de_citas(desde, ahora)
+
+    # Total de citas en la ventana (para mostrar en tarjeta)
+    total_citas_60d = sum(qs.count() for qs in fuentes)
+
+    # ---------- Pacientes nuevos (últimos 60 días) ----------
+    usar_created = hasattr(Paciente, "created_at")
+    if usar_created:
+        pacientes_nuevos_60d = Paciente.objects.filter(created_at__gte=desde).count()
+    else:
+        # Fallback: primera cita dentro de la ventana
+        primeras = (
+            Cita.objects.values("paciente_id")
+            .annotate(primer_turno=Min("fecha_hora"))
+            .filter(primer_turno__gte=desde, primer_turno__lte=ahora)
+            .count()
+        )
+        pacientes_nuevos_60d = primeras
+
+    # ---------- Citas por veterinario (conteo) ----------
+    citas_por_vet = sorted(
+        archivo.contar_por(fuentes, ["veterinario__nombre", "veterinario__apellido"]),
+        key=lambda x: (-x["total"], x["veterinario__apellido"], x["veterinario__nombre"]),
+    )
+    citas_por_vet_list = [{
+        "veterinario": f"{x['veterinario__nombre']} {x['veterinario__apellido']}",
+        "total": x["total"]
+    } for x in citas_por_vet]
+
+    # ---------- Especies más atendidas (pacientes únicos) ----------
+    especies = [
+        {"paciente__especie": x["paciente__especie"], "pacientes_unicos": x["total"]}
+        for x in sorted(
+            archivo.contar_distintos_por(fuentes, ["paciente__especie"], "paciente_id"),
+            key=lambda x: -x["total"],
+        )[:10]
+    ]
+
+    # ---------- Top propietarios (por pacientes únicos atendidos) ----------
+    top_propietarios = sorted(
+        archivo.contar_distintos_por(
+            fuentes, ["paciente__propietario__nombre", "paciente__propietario__apellido"], "paciente_id"
+        ),
+        key=lambda x: (-x["total"], x["paciente__propietario__apellido"]),
+    )[:10]
+    top_propietarios_list = [{
+        "propietario": f"{x['paciente__propietario__nombre']} {x['paciente__propietario__apellido']}",
+        "pacientes_atendidos": x["total"]
+    } for x in top_propietarios]
+
+    # ---------- Horarios pico ----------
+    horarios = archivo.contar_por([qs.annotate(hora=ExtractHour("fecha_hora")) for qs in fuentes], ["hora"])
+    mapa_horas = {h["hora"]: h["total"] for h in horarios}
+    horarios_list = [{"hora": h, "total": mapa_horas.get(h, 0)} for h in range(9, 19)]
+
+    return {
+        "pacientes_nuevos_60d": pacientes_nuevos_60d,
+        "total_citas_60d": total_citas_60d,
+        "citas_por_vet": citas_por_vet_list,
+        "especies": especies,
+        "top_propietarios": top_propietarios_list,
+        "horarios": horarios_list,
+    }
+
+
+@login_required
+@replica.desde_replica
+def estadisticas_view(request):
+    """
+    Estadísticas de los últimos 60 días:
+    - Pacientes nuevos (si hay Paciente.created_at, lo usa; si no, calcula por primera cita)
+    - Citas por veterinario
+    - Especies más atendidas (pacientes únicos)
+    - Top propietarios por cantidad de pacientes atendidos (únicos)
+    - Horarios pico (citas por hora 0-23)
+    - Pronóstico de carga de los próximos 30 días contra la capacidad de turnos
+    Todo limitado a la sucursal activa; los fragmentos se cachean por sucursal.
+    """
+    ahora = timezone.localtime(timezone.now())
+    desde = ahora - timezone.timedelta(days=60)
+
+    context = {
+        "desde": desde,
+        "hasta": ahora,
+        # Clave del fragmento cacheado del template; las consultas corren solo si falta
+        "ventana": desde.strftime("%Y%m%d"),
+        "sucursal_cache": sucursales.clave(),
+        "sucursal": sucursales.obtener(sucursal_activa_id()),
+        "tablas": SimpleLazyObject(lambda: _tablas_estadisticas(desde, ahora)),
+        # Carga esperada del próximo mes (modelo cacheado por día, ver pronostico.py)
+        "pronostico": SimpleLazyObject(pronostico.pronosticar),
+    }
+    return render(request, "GestionVeterinaria_app/estadisticas.html", context)
+
+
+@login_required
+@replica.desde_replica
+def estadisticas_salud(request):
+    """
+    Población atendida: especies, razas, sexo, franjas de edad y diagnósticos
+    más frecuentes por mes. Se arma con los contadores de salud.py, sin
+    recorrer pacientes ni historiales.
+    """
+    if not request.user.has_perm("GestionVeterinaria_app.view_health_stats"):
+        raise PermissionDenied
+    especie = request.GET.get("especie", "").strip()
+    return render(request, "GestionVeterinaria_app/estadisticas_salud.html", {
+        "datos": salud.tablero(especie or None),
+    })
+
+
+@login_required
+@replica.desde_replica
+def vencimientos_view(request):
+    """
+    Vacunas, refuerzos y controles vencidos o por vencer (lista calculada cada
+    noche por calcular_vencimientos), el más urgente primero.
+    """
+    if not (es_administrativo(request.user) or es_veterinario(request.user)):
+        raise PermissionDenied
+    try:
+        dias = min(max(int(request.GET.get("dias", 30)), 0), 365)
+    except ValueError:
+        dias = 30
+    tipo = request.GET.get("tipo", "")
+    tipos = dict(ReglaVencimiento.TIPO_CHOICES)
+    filas = list(vencimientos.proximos(dias, tipo if tipo in tipos else None)[:vencimientos.MAX_LISTADO + 1])
+    return render(request, "GestionVeterinaria_app/vencimientos.html", {
+        "vencimientos": filas[:vencimientos.MAX_LISTADO],
+        "recortado": len(filas) > vencimientos.MAX_LISTADO,
+        "dias": dias,
+        "tipo": tipo,
+        "tipos": ReglaVencimiento.TIPO_CHOICES,
+        "hoy": timezone.localdate(),
+    })
+
+
+def _puede_gestionar_cita(user, cita):
+    # Admins pueden todo; vet solo sus propias
+    if es_administrativo(user):
+        return True
+    vet = getattr(user, 'perfil_veterinario', None)
+    return vet is not None and cita.veterinario_id == vet.id
+
+def _legible(campo, valor):
+    if valor in (None, ""):
+        return "—"
+    if isinstance(campo, forms.ChoiceField) and not isinstance(campo, forms.ModelChoiceField):
+        return dict(campo.choices).get(valor, valor)
+    return str(valor)
+
+
+def _conflicto_version(request, form):
+    """
+    Otro usuario guardó el registro mientras se editaba (ConflictoVersion).
+    Muestra lo que se quiso guardar junto a la versión actual, y permite
+    descartar los cambios o reenviarlos sobre la versión nueva.
+    """
+    instancia = form.instance
+    actual = type(instancia)._base_manager.filter(pk=instancia.pk).first()
+    # Un form sin enlazar sobre la versión actual da sus valores en los mismos campos
+    otro = type(form)(instance=actual) if actual else None
+
+    filas = []
+    for nombre, campo in form.fields.items():
+        if campo.widget.is_hidden:
+            continue
+        mio = _legible(campo, form.cleaned_data.get(nombre))
+        suyo = _legible(campo, campo.to_python(otro[nombre].initial)) if otro else "—"
+        filas.append({"campo": campo.label or nombre.capitalize(), "mio": mio, "actual": suyo, "distinto": mio != suyo})
+
+    reenviar = [
+        (clave, valor)
+        for clave in request.POST if clave not in ("csrfmiddlewaretoken", "version")
+        for valor in request.POST.getlist(clave)
+    ]
+    return render(request, "GestionVeterinaria_app/conflicto_version.html", {
+        "modelo": instancia._meta.verbose_name,
+        "actual": actual,
+        "filas": filas,
+        "reenviar": reenviar,
+    }, status=409)
+
+
+@login_required
+def editar_cita(request, cita_id):
+    cita = get_object_or_404(Cita.objects.select_related("paciente", "veterinario"), pk=cita_id)
+    if not _puede_gestionar_cita(request.user, cita):
+        return HttpResponseForbidden("No tenés permisos para editar esta cita.")
+
+    if request.method == "POST":
+        form = CitaForm(request.POST, instance=cita)
+        if form.is_valid():
+            try:
+                form.save()
+            except ConflictoVersion:
+                return _conflicto_version(request, form)
+            messages.success(request, "La cita se actualizó correctamente.")
+            # redirigir según rol
+            if es_administrativo(request.user):
+                return redirect('citas_list')
+            return redirect('mis_citas')
+    else:
+        form = CitaForm(instance=cita)
+
+    return render(request, "GestionVeterinaria_app/editar_cita.html", {"form": form, "cita": cita})
+
+def _version_leida(request, cita):
+    """
+    La cita se guarda sobre la versión que vio el usuario (campo oculto
+    version_cita de la pantalla): si otro la cambió, save() levanta ConflictoVersion.
+    """
+    try:
+        cita.version = int(request.POST["version_cita"])
+    except (KeyError, ValueError):
+        pass
+
+
+@login_required
+def cancelar_cita(request, cita_id):
+    cita = get_object_or_404(Cita.objects.select_related("paciente", "veterinario"), pk=cita_id)
+    if not _puede_gestionar_cita(request.user, cita):
+        return HttpResponseForbidden("No tenés permisos para cancelar esta cita.")
+
+    if request.method == "POST":
+        _version_leida(request, cita)
+        cita.estado = 'cancelada'
+        try:
+            cita.save()
+        except ConflictoVersion:
+            messages.error(request, "Otro usuario modificó la cita mientras tanto: no se canceló. Revisala y volvé a intentar.")
+            return redirect('cancelar_cita', cita_id=cita.pk)
+        # signals.py ofrece el horario a la lista de espera
+        entrada = getattr(cita, "_lista_espera", None)
+        if entrada is None:
+            messages.success(request, "La cita fue cancelada. El horario quedó disponible.")
+        elif entrada.estado == "asignada":
+            messages.success(request, f"La cita fue cancelada. El horario se reservó para {entrada.paciente} (lista de espera).")
+        else:
+            messages.success(request, f"La cita fue cancelada. Se le ofreció el horario a {entrada.paciente} (lista de espera).")
+        if es_administrativo(request.user):
+            return redirect('citas_list')
+        return redirect('mis_citas')
+
+    # Confirmación
+    return render(request, "GestionVeterinaria_app/cancelar_cita_confirm.html", {"cita": cita})
+
+# Si tenés la vista atender_cita, marcá la cita como atendida al guardar la atención:
+@login_required
+def atender_cita(request, cita_id):
+    cita = get_object_or_404(Cita.objects.select_related("paciente", "veterinario"), pk=cita_id)
+    if not _puede_gestionar_cita(request.user, cita):
+        return HttpResponseForbidden("No tenés permisos para atender esta cita.")
+
+    if request.method == "POST":
+        form = HistorialAtencionForm(request.POST)  # el que ya usás
+        if form.is_valid():
+            _version_leida(request, cita)
+            atencion = form.save(commit=False)
+            atencion.cita = cita
+            atencion.paciente = cita.paciente
+            atencion.fecha_consulta = timezone.now()
+            try:
+                # La atención y el cambio de estado van juntos: un conflicto no deja una atención suelta
+                with transaction.atomic():
+                    atencion.save()
+                    form.save_m2m()  # diagnósticos / tratamientos codificados
+                    cita.estado = 'atendida'
+                    cita.save()
+            except ConflictoVersion:
+                # Se vuelve a mostrar lo cargado, sobre la cita actual, para revisar y reenviar
+                cita.refresh_from_db()
+                form.add_error(None, "Otro usuario modificó la cita mientras la atendías. Revisá su estado y volvé a guardar.")
+                return render(request, "GestionVeterinaria_app/atender_cita.html", {"form": form, "cita": cita}, status=409)
+
+            messages.success(request, "Atención registrada y cita marcada como atendida.")
+            if "adjuntar" in request.POST:
+                return redirect("adjuntos_historial", historial_id=atencion.pk)
+            if es_administrativo(request.user):
+                return redirect('citas_list')
+            return redirect('mis_citas')
+    else:
+        form = HistorialAtencionForm()
+
+    return render(request, "GestionVeterinaria_app/atender_cita.html", {"form": form, "cita": cita})
+
+
+# ------------------------------
+# Adjuntos del historial (ver adjuntos.py)
+# ------------------------------
+def _historial_para_adjuntos(user, historial_id):
+    """
+    (atención, puede_subir) para el personal. La atención puede estar en el
+    archivo histórico: sus adjuntos se ven pero no se agregan.
+    """
+    if not (es_administrativo(user) or es_veterinario(user)):
+        raise PermissionDenied
+    historial = HistorialMedico.objects.select_related("paciente", "cita").filter(pk=historial_id).first()
+    if historial is not None:
+        puede_subir = (
+            es_administrativo(user) or historial.cita is None or _puede_gestionar_cita(user, historial.cita)
+        )
+        return historial, puede_subir
+    historial = get_object_or_404(HistorialMedicoArchivado.objects.select_related("paciente"), pk=historial_id)
+    return historial, False
+
+
+def _adjunto_json(adjunto):
+    return {
+        "id": adjunto.pk,
+        "nombre": adjunto.nombre,
+        "tamanio": adjunto.archivo.tamanio,
+        "tipo": adjunto.archivo.tipo,
+        "url": reverse("descargar_adjunto", args=[adjunto.pk]),
+    }
+
+
+@login_required
+def adjuntos_historial(request, historial_id):
+    """Adjuntos de una atención y subida de nuevos (js/adjuntos.js)."""
+    historial, puede_subir = _historial_para_adjuntos(request.user, historial_id)
+    lista = Adjunto.objects.filter(historial_id=historial.pk).select_related("archivo", "subido_por").order_by("subido_en")
+    return render(request, "GestionVeterinaria_app/adjuntos.html", {
+        "historial": historial,
+        "adjuntos": lista,
+        "puede_subir": puede_subir,
+        "max_bytes": settings.ADJUNTOS_MAX_BYTES,
+        "tamanio_parte": adjuntos.TAMANIO_PARTE,
+    })
+
+
+@login_required
+def api_subidas_adjunto(request, historial_id):
+    """
+    POST /api/historial/<id>/adjuntos/subidas/  nombre=radiografia.dcm&tamanio=73400320
+    Devuelve (201): { "id": "<uuid>", "recibido": 0, "url": "/api/adjuntos/subidas/<uuid>/" }
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    historial, puede_subir = _historial_para_adjuntos(request.user, historial_id)
+    if not puede_subir:
+        raise PermissionDenied
+    try:
+        subida = adjuntos.iniciar(
+            historial, request.POST.get("nombre", ""), int(request.POST.get("tamanio", "")), request.user,
+        )
+    except ValueError:
+        return HttpResponseBadRequest("Tamaño inválido.")
+    except adjuntos.SubidaInvalida as e:
+        return JsonResponse({"error": str(e)}, status=413)
+    return JsonResponse({
+        "id": str(subida.pk),
+        "recibido": 0,
+        "url": reverse("api_subida_adjunto", args=[subida.pk]),
+    }, status=201)
+
+
+@login_required
+def api_subida_adjunto(request, subida_id):
+    """
+    GET: { "recibido": 4194304 } (para reanudar).
+    PUT con Content-Range "bytes <inicio>-<fin>/<total>": agrega la parte. Si
+    no empieza donde termina lo recibido responde 409 con "recibido". Con la
+    última devuelve { "recibido": total, "adjunto": {...} }.
+    DELETE: cancela la subida.
+    """
+    subida = get_object_or_404(SubidaAdjunto, pk=subida_id, usuario=request.user)
+    if request.method == "GET":
+        return JsonResponse({"recibido": adjuntos.recibido(subida), "tamanio": subida.tamanio})
+    if request.method == "DELETE":
+        adjuntos.cancelar(subida)
+        return HttpResponse(status=204)
+    if request.method != "PUT":
+        return HttpResponseNotAllowed(["GET", "PUT", "DELETE"])
+
+    try:
+        inicio, largo = adjuntos.parte(request.headers.get("Content-Range"), subida)
+        # El cuerpo se copia del stream de a bloques: nunca request.body
+        total = adjuntos.recibir(subida, inicio, largo, request)
+    except adjuntos.FueraDeOrden as e:
+        return JsonResponse({"error": str(e), "recibido": e.recibido}, status=409)
+    except adjuntos.SubidaInvalida as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    if total < subida.tamanio:
+        return JsonResponse({"recibido": total})
+    adjunto = adjuntos.completar(subida)
+    return JsonResponse({"recibido": total, "adjunto": _adjunto_json(adjunto)}, status=201)
+
+
+@login_required
+def descargar_adjunto(request, adjunto_id):
+    adjunto = get_object_or_404(Adjunto.objects.select_related("archivo"), pk=adjunto_id)
+    _historial_para_adjuntos(request.user, adjunto.historial_id)
+    return adjuntos.servir(request, adjunto.archivo, adjunto.nombre)
+
+
+@login_required
+def miniatura_adjunto(request, adjunto_id):
+    adjunto = get_object_or_404(Adjunto.objects.select_related("archivo"), pk=adjunto_id)
+    _historial_para_adjuntos(request.user, adjunto.historial_id)
+    return adjuntos.servir_miniatura(request, adjunto.archivo)
+
+
+
+
+
+@login_required
+@replica.desde_replica
+def buscar_paciente(request):
+    """
+    Búsqueda simple por nombre, apellido, especie, raza, o datos del propietario.
+    Si hay resultados, se muestran con botón Editar.
+    """
+    q = request.GET.get("q", "").strip()
+    resultados = []
+    if q:
+        resultados = (
+            Paciente.objects.select_related("propietario")
+            .filter(
+                Q(nombre__icontains=q) |
+                Q(apellido__icontains=q) |
+                Q(especie__icontains=q) |
+                Q(raza__icontains=q) |
+                Q(propietario__nombre__icontains=q) |
+                Q(propietario__apellido__icontains=q) |
+                Q(propietario__email__icontains=q) |
+                Q(propietario__telefono__icontains=q)
+            )
+            .order_by("apellido", "nombre")[:100]
+        )
+
+    return render(
+        request,
+        "GestionVeterinaria_app/buscar_paciente.html",
+        {"q": q, "resultados": resultados},
+    )
+
+
+@login_required
+def editar_paciente(request, paciente_id):
+    """
+    Edición de un paciente existente usando PacienteForm.
+    """
+    paciente = get_object_or_404(Paciente.objects.select_related("propietario"), pk=paciente_id)
+
+    if request.method == "POST":
+        form = PacienteForm(request.POST, instance=paciente)
+        if form.is_valid():
+            try:
+                form.save()
+            except ConflictoVersion:
+                return _conflicto_version(request, form)
+            messages.success(request, "Paciente actualizado correctamente.")
+            # Si querés volver a la búsqueda con el nombre del paciente:
+            return redirect(f"{reverse('buscar_paciente')}?q={paciente.nombre}")
+    else:
+        form = PacienteForm(instance=paciente)
+
+    return render(
+        request,
+        "GestionVeterinaria_app/editar_paciente.html",
+        {"form": form, "paciente": paciente},
+    )
+
+
+
+@login_required
+def linea_tiempo_paciente(request, paciente_id):
+    """
+    Citas (canceladas incluidas, con su atención) e historiales sueltos del
+    paciente en una sola lista, del más reciente al más antiguo, de a páginas.
+    """
+    paciente = get_object_or_404(Paciente.objects.select_related("propietario"), pk=paciente_id)
+    try:
+        eventos, siguiente = linea_tiempo.pagina(paciente.pk, request.GET.get("cursor"))
+    except linea_tiempo.CursorInvalido:
+        return HttpResponseBadRequest("Cursor inválido.")
+
+    return render(request, "GestionVeterinaria_app/linea_tiempo.html", {
+        "paciente": paciente,
+        "eventos": eventos,
+        "siguiente": siguiente,
+        "es_primera": not request.GET.get("cursor"),
+    })
+
+
+@login_required
+def expediente_paciente(request, paciente_id, formato):
+    """
+    Expediente clínico completo (HTML para imprimir o PDF) para el propietario
+    o una clínica derivante. Si no está armado para el historial actual, se
+    arma en segundo plano y la página espera (ver expediente.py); si el
+    armado falló, se muestra el error en lugar de volver a esperar.
+    """
+    if not (es_administrativo(request.user) or es_veterinario(request.user)):
+        raise PermissionDenied
+    if formato not in expediente.FORMATOS:
+        raise Http404
+    if formato == "pdf" and not expediente.pdf_disponible():
+        raise Http404("La exportación a PDF no está disponible en este servidor.")
+    paciente = get_object_or_404(Paciente.objects.select_related("propietario"), pk=paciente_id)
+
+    try:
+        camino, huella = expediente.obtener(paciente, formato)
+    except expediente.ExpedienteFallido:
+        return render(request, "GestionVeterinaria_app/expediente/error.html", {"paciente": paciente}, status=500)
+    if camino is None:
+        return render(request, "GestionVeterinaria_app/expediente/generando.html", {"paciente": paciente}, status=202)
+    etag = f'"{huella}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        respuesta = HttpResponseNotModified()
+    else:
+        respuesta = FileResponse(
+            open(camino, "rb"), content_type=expediente.FORMATOS[formato],
+            filename=f"expediente-{paciente.nombre}-{paciente.pk}.{formato}",
+        )
+    respuesta["ETag"] = etag
+    respuesta["Cache-Control"] = "private, no-cache"
+    return respuesta
+
+
+@login_required
+def api_linea_tiempo(request, paciente_id):
+    """
+    GET /api/pacientes/<id>/linea-tiempo/?cursor=...&limite=20
+    Devuelve: { "eventos": [...], "siguiente": "<cursor>" | null }
+    """
+    if not Paciente.objects.filter(pk=paciente_id).exists():
+        raise Http404("Paciente inexistente.")
+    try:
+        limite = int(request.GET.get("limite") or linea_tiempo.LIMITE)
+        eventos, siguiente = linea_tiempo.pagina(paciente_id, request.GET.get("cursor"), limite)
+    except ValueError:  # incluye CursorInvalido
+        return JsonResponse({"error": "Parámetros inválidos."}, status=400)
+    return JsonResponse({
+        "eventos": [linea_tiempo.serializar(e) for e in eventos],
+        "siguiente": siguiente,
+    })
+
+@login_required
+@replica.desde_replica
+def buscar_propietario(request):
+    query = request.GET.get("q", "").strip()
+    propietarios = Propietario.objects.all()
+    if query and llamadas.parece_telefono(query):
+        # Un número: columnas de dígitos indexadas en lugar de icontains (ver llamadas.py)
+        propietarios = propietarios.filter(llamadas.filtro_telefono(query)).order_by("apellido", "nombre")[:200]
+    elif query:
+        from django.db.models import Q
+        propietarios = propietarios.filter(
+            Q(nombre__icontains=query) |
+            Q(apellido__icontains=query) |
+            Q(email__icontains=query) |
+            Q(telefono__icontains=query) |
+            Q(direccion__icontains=query)
+        ).order_by("apellido", "nombre")[:200]
+
+    return render(request, "GestionVeterinaria_app/buscar_propietario.html",  # ← ruta corregida
+                  {"q": query, "propietarios": propietarios})
+
+
+@login_required
+def abrir_llamada(request):
+    """
+    GET /llamada/?numero=...  (para el softphone: abre la ficha al entrar la llamada)
+    Un solo propietario: su ficha; varios o ninguno: la búsqueda por ese número.
+    """
+    numero = request.GET.get("numero", "").strip()
+    propietarios = llamadas.propietarios_por_telefono(numero, limite=2)
+    if len(propietarios) == 1:
+        return redirect("editar_propietario", propietarios[0].pk)
+    return redirect(f"{reverse('buscar_propietario')}?{urlencode({'q': numero})}")
+
+
+@login_required
+def editar_propietario(request, propietario_id):
+    propietario = get_object_or_404(Propietario.objects, id=propietario_id)
+    if request.method == "POST":
+        form = PropietarioForm(request.POST, instance=propietario)
+        if form.is_valid():
+            try:
+                form.save()
+            except ConflictoVersion:
+                return _conflicto_version(request, form)
+            messages.success(request, "Propietario actualizado correctamente.")
+            return redirect("buscar_propietario")
+    else:
+        form = PropietarioForm(instance=propietario)
+
+    return render(request, "GestionVeterinaria_app/editar_propietario.html",  # ← ruta corregida
+                  {"form": form, "propietario": propietario})
+
+
+
+@login_required
+def duplicados_view(request):
+    """
+    Propietarios y pacientes posiblemente duplicados (solo administrativo).
+    POST: fusiona el par elegido (tipo, conservar, duplicado).
+    """
+    if not es_administrativo(request.user):
+        raise PermissionDenied
+
+    if request.method == "POST":
+        tipo = request.POST.get("tipo")
+        try:
+            conservar = int(request.POST.get("conservar"))
+            duplicado = int(request.POST.get("duplicado"))
+            if tipo == "propietario":
+                duplicados.fusionar_propietarios(conservar, duplicado)
+            elif tipo == "paciente":
+                duplicados.fusionar_pacientes(conservar, duplicado)
+            else:
+                raise ValueError("Tipo inválido.")
+        except (TypeError, ValueError, Propietario.DoesNotExist, Paciente.DoesNotExist) as e:
+            messages.error(request, f"No se pudo fusionar: {e}")
+        else:
+            messages.success(request, "Registros fusionados correctamente.")
+        return redirect("duplicados")
+
+    return render(request, "GestionVeterinaria_app/duplicados.html", {
+        "propietarios": duplicados.propietarios_duplicados(),
+        "pacientes": duplicados.pacientes_duplicados(),
+    })
+
+
+@login_required
+def ausencias_view(request):
+    """
+    Ausencias de veterinarios (solo administrativo). POST: registra una y
+    lleva a la reprogramación de sus citas.
+    """
+    if not es_administrativo(request.user):
+        raise PermissionDenied
+
+    form = AusenciaForm(request.POST or None)
+    if request.method == "POST" and form.is_valid():
+        ausencia = form.save()
+        return redirect("reprogramar_ausencia", ausencia_id=ausencia.pk)
+
+    return render(request, "GestionVeterinaria_app/ausencias.html", {
+        "form": form,
+        "ausencias": AusenciaVeterinario.objects.filter(
+            hasta__gte=timezone.localdate(), veterinario__in=Veterinario.objects.all(),
+        ).select_related("veterinario").order_by("desde"),
+    })
+
+
+@login_required
+def reprogramar_ausencia(request, ausencia_id):
+    """
+    GET: plan de reprogramación de las citas del veterinario ausente (ver
+    ausencias.py) para revisar. POST: aplica el plan confirmado.
+    """
+    if not es_administrativo(request.user):
+        raise PermissionDenied
+    ausencia = get_object_or_404(AusenciaVeterinario.objects.select_related("veterinario"), pk=ausencia_id)
+
+    if request.method == "POST":
+        try:
+            movidas = ausencias.aplicar(ausencia, ausencias.leer(ausencia, request.POST.get("plan", "")))
+        except ausencias.PlanVencido as e:
+            messages.error(request, f"{e} Revisá el plan actualizado.")
+            return redirect("reprogramar_ausencia", ausencia_id=ausencia.pk)
+        messages.success(request, f"{movidas} cita(s) reprogramada(s).")
+        return redirect("ausencias")
+
+    plan = ausencias.planificar(ausencia)
+    return render(request, "GestionVeterinaria_app/reprogramar_ausencia.html", {
+        "ausencia": ausencia,
+        "plan": plan,
+        "firmado": ausencias.firmar(ausencia, plan),
+        "sin_lugar": sum(1 for p in plan if p["veterinario"] is None),
+    })
+
+
+@login_required
+def historial_cambios(request, modelo, objeto_id):
+    """
+    Historial de cambios (auditoría) de una cita, atención, paciente o
+    propietario: quién cambió qué campo, cuándo y desde qué pantalla.
+    """
+    if not (es_administrativo(request.user) or request.user.has_perm("GestionVeterinaria_app.view_registroauditoria")):
+        raise PermissionDenied
+    clase = auditoria.MODELOS.get(modelo)
+    if clase is None:
+        raise Http404("Modelo no auditado.")
+
+    etiquetas = {f.attname: f.verbose_name for f in clase._meta.concrete_fields}
+    registros = [
+        {
+            "registro": r,
+            "cambios": [(etiquetas.get(campo, campo), antes, despues) for campo, (antes, despues) in r.cambios.items()],
+        }
+        for r in auditoria.historial(modelo, objeto_id)
+    ]
+    return render(request, "GestionVeterinaria_app/historial_cambios.html", {
+        "modelo": clase._meta.verbose_name,
+        "objeto_id": objeto_id,
+        "registros": registros,
+        "en_archivo": bool(settings.AUDITORIA_ARCHIVO),
+    })
+
+
+@login_required
+def elegir_sucursal(request):
+    """POST del selector del menú: limita las pantallas del administrativo a una sucursal (o a todas)."""
+    if request.method != "POST" or not es_administrativo(request.user):
+        raise PermissionDenied
+    try:
+        sucursal_id = int(request.POST.get("sucursal") or 0)
+    except ValueError:
+        sucursal_id = 0
+    if sucursal_id in sucursales.todas():
+        request.session[sucursales.SESION_SUCURSAL] = sucursal_id
+    else:
+        request.session.pop(sucursales.SESION_SUCURSAL, None)
+
+    siguiente = request.POST.get("siguiente")
+    if not url_has_allowed_host_and_scheme(siguiente, allowed_hosts={request.get_host()}):
+        siguiente = reverse("citas_list")
+    return redirect(siguiente)
+
+
+@login_required
+def logout_view(request):
+    auth_logout(request)
+    messages.success(request, "Sesión cerrada correctamente.")
+    return redirect('login')
+
+
+
+def api_slots(request):
+    """
+    GET /api/slots/?vet_id=ID&fecha=YYYY-MM-DD
+    Devuelve: { "slots": ["09:00","09:30", ...] }
+    """
+    vet_id = request.GET.get("vet_id")
+    fecha_str = request.GET.get("fecha")
+
+    if not vet_id or not fecha_str:
+        return JsonResponse({"slots": []})
+
+    try:
+        vet_id = int(vet_id)
+        fecha = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+    except ValueError:
+        return JsonResponse({"slots": []})
+    if not Veterinario.objects.filter(pk=vet_id).exists():
+        return JsonResponse({"slots": []})
+
+    # Turnos libres (cacheados por veterinario y día, ver disponibilidad.py)
+    slots = disponibilidad.slots_libres([vet_id], fecha)[vet_id][fecha]
+    return JsonResponse({"slots": slots})
+
+
+@login_required
+def api_recomendar_veterinario(request):
+    """
+    GET /api/slots/recomendados/?fecha=YYYY-MM-DD&paciente=ID&desde=HH:MM&hasta=HH:MM
+    Devuelve: { "recomendados": [{"id": 1, "nombre": "...", "puntaje": 0.8, "carga": 3,
+                "capacidad": 18, "slots": ["10:00", ...], "motivos": [...]}, ...] }
+    El primero es el sugerido (ver recomendacion.py). paciente, desde y hasta son opcionales.
+    """
+    try:
+        fecha = datetime.strptime(request.GET.get("fecha", ""), "%Y-%m-%d").date()
+        desde = request.GET.get("desde") or None
+        hasta = request.GET.get("hasta") or None
+        for hora in (desde, hasta):
+            if hora:
+                datetime.strptime(hora, "%H:%M")
+    except ValueError:
+        return JsonResponse({"recomendados": []})
+    paciente_id = request.GET.get("paciente", "")
+    paciente = Paciente.objects.filter(pk=paciente_id).first() if paciente_id.isdigit() else None
+
+    recomendados = []
+    for s in recomendacion.recomendar(fecha, paciente, desde, hasta):
+        vet = s["veterinario"]
+        motivos = [f"{s['carga']}/{s['capacidad']} turnos ocupados"]
+        if s["especialidad"]:
+            motivos.append(f"atiende {paciente.especie.lower()}")
+        if s["continuidad"]:
+            motivos.append("atendió antes al paciente")
+        recomendados.append({
+            "id": vet.pk,
+            "nombre": f"{vet.nombre} {vet.apellido}",
+            "especialidad": vet.especialidad,
+            "puntaje": s["puntaje"],
+            "carga": s["carga"],
+            "capacidad": s["capacidad"],
+            "slots": s["slots"],
+            "motivos": motivos,
+        })
+    return JsonResponse({"recomendados": recomendados})
+
+
+@login_required
+def api_catalogo(request):
+    """
+    GET /api/catalogo/?tipo=diagnostico|tratamiento&q=parv
+    Devuelve: { "resultados": [{"id": 1, "codigo": "...", "nombre": "..."}, ...] }
+    """
+    resultados = catalogo.autocompletar(request.GET.get("tipo", ""), request.GET.get("q", ""))
+    return JsonResponse({
+        "resultados": [{"id": c.pk, "codigo": c.codigo, "nombre": c.nombre} for c in resultados],
+    })
+
+
+@login_required
+def api_llamada(request):
+    """
+    GET /api/llamada/?numero=+54 9 11 4555-1234
+    Devuelve: { "propietarios": [{..., "pacientes": [{..., "proxima_cita": {...} | null}]}] }
+    """
+    numero = request.GET.get("numero", "")
+    return JsonResponse({
+        "numero": solo_digitos(numero),
+        "propietarios": [llamadas.serializar(p, pacientes) for p, pacientes in llamadas.identificar(numero)],
+    })
+
+
+@login_required
+def api_cambios(request):
+    """
+    GET /api/cambios/?desde=<seq>&limite=500
+    Devuelve: { "cambios": [{"seq": 12, "modelo": "cita", "id": 3, "op": "u", "datos": {...}}
+                            | {"seq": 13, "modelo": "paciente", "id": 7, "op": "b"}, ...],
+                "hasta": 13, "mas": false }
+    El cliente guarda `hasta` y vuelve a pedir desde ahí; mientras `mas` sea
+    true hay otra página. desde=0 trae todo. Un cursor anterior al último
+    corte de compactación responde 410: hay que empezar de nuevo desde 0.
+    """
+    try:
+        desde = int(request.GET.get("desde", 0))
+        limite = min(max(int(request.GET.get("limite", cambios.LIMITE)), 1), cambios.MAX_LIMITE)
+        if desde < 0:
+            raise ValueError(desde)
+    except ValueError:
+        return HttpResponseBadRequest("Parámetros inválidos.")
+    try:
+        lista, hasta, mas = cambios.feed(desde, limite)
+    except cambios.CursorVencido:
+        return JsonResponse({"error": "Cursor vencido: resincronizar desde 0.", "desde": 0}, status=410)
+    return JsonResponse({"cambios": lista, "hasta": hasta, "mas": mas})